@@ -0,0 +1,103 @@
+"""
+Benchmark reads through the boto3 resource against ENGINE = CLIENT_ENGINE.
+
+Decoding: wire format items to model instances, resource deserializer + from_row vs from_wire.
+End to end: Model.all() and Model.query() against moto, which stands in for DynamoDB;
+moto's own overhead dominates those numbers, the decoding numbers are the difference per row.
+
+Usage: python benchmarks/bench_client_engine.py [--rows 2000]
+"""
+import argparse
+import datetime
+import os
+import time
+
+from boto3.dynamodb.types import TypeDeserializer
+from moto import mock_dynamodb2
+from schematics import types as fields
+
+from cc_dynamodb3 import client_engine
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.config import set_config
+from cc_dynamodb3.models import DynamoDBModel
+from cc_dynamodb3.table import create_table
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'dynamodb.yml')
+
+
+class BenchModel(DynamoDBModel):
+    TABLE_NAME = 'hash_only'
+
+    agency_subdomain = fields.StringType(required=True)
+    external_id = fields.IntType()
+    name = fields.StringType()
+    is_enabled = fields.BooleanType()
+    created = fields.DateTimeType(default=DynamoDBModel.utcnow)
+    updated = fields.DateTimeType(default=DynamoDBModel.utcnow)
+
+
+class ClientBenchModel(BenchModel):
+    ENGINE = CLIENT_ENGINE
+
+
+def rows_per_second(func, count, repeat=5):
+    """Best of repeat runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        func()
+        elapsed = time.time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def bench_decoding(rows):
+    wire_items = [client_engine.serialize_item(row) for row in rows]
+    deserializer = TypeDeserializer()
+
+    def resource():
+        for wire_item in wire_items:
+            BenchModel.from_row(dict((name, deserializer.deserialize(value)) for name, value in wire_item.items()), {})
+
+    def client():
+        for wire_item in wire_items:
+            ClientBenchModel.from_wire(wire_item, {})
+
+    print('decoding, %d rows' % len(rows))
+    print('  %-10s %12.0f rows/sec' % ('resource', rows_per_second(resource, len(rows))))
+    print('  %-10s %12.0f rows/sec' % ('client', rows_per_second(client, len(rows))))
+
+
+def bench_end_to_end(rows):
+    create_table(BenchModel.TABLE_NAME)
+    BenchModel.bulk_save(BenchModel(dict(row)) for row in rows)
+
+    print('moto end to end, %d rows' % len(rows))
+    for name, model in (('resource', BenchModel), ('client', ClientBenchModel)):
+        model.get(agency_subdomain='agency0')  # create the connection first
+        print('  %-10s all()   %12.0f rows/sec' % (name, rows_per_second(lambda: list(model.all()), len(rows))))
+        print('  %-10s query() %12.0f rows/sec' % (
+            name, rows_per_second(lambda: list(model.query(external_id=1, query_index='HashOnlyExternalId')),
+                                  len(rows) // 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    set_config(config_file_path=CONFIG_PATH, aws_access_key_id='<KEY>', aws_secret_access_key='<SECRET>',
+               namespace='bench_')
+    now = datetime.datetime(2016, 1, 1)
+    rows = [BenchModel._initial_data_to_dynamodb(dict(agency_subdomain='agency%s' % i, external_id=i % 2,
+                                                      name='Name', is_enabled=True, created=now, updated=now))
+            for i in range(args.rows)]
+
+    bench_decoding(rows)
+    with mock_dynamodb2():
+        bench_end_to_end(rows)
+
+
+if __name__ == '__main__':
+    main()
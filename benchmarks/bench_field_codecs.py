@@ -0,0 +1,99 @@
+"""
+Benchmark field conversion: rows/sec decoded (DynamoDB -> model) and encoded (model -> DynamoDB).
+
+"before" is the isinstance chain that used to run on every field of every row.
+"after" dispatches through the model's precomputed FieldCodecs.
+Also reports end-to-end from_row() and build() throughput.
+
+Usage: python benchmarks/bench_field_codecs.py [--rows 20000]
+"""
+import argparse
+import calendar
+import datetime
+import decimal
+import time
+
+from schematics import types as fields
+
+from cc_dynamodb3.models import DynamoDBModel
+
+
+class BenchModel(DynamoDBModel):
+    TABLE_NAME = 'bench'
+
+    agency_subdomain = fields.StringType(required=True)
+    external_id = fields.IntType()
+    name = fields.StringType()
+    is_enabled = fields.BooleanType()
+    is_archived = fields.BooleanType()
+    created = fields.DateTimeType()
+    updated = fields.DateTimeType()
+    note = fields.StringType()
+
+
+def legacy_value_to_dynamodb(cls, key, value):
+    if isinstance(getattr(cls, key), (fields.DateTimeType, fields.DateType)):
+        if not value:
+            return 0
+        value = getattr(cls, key).to_native(value)
+        return decimal.Decimal(int(calendar.timegm(value.timetuple())))
+    if isinstance(getattr(cls, key), fields.UUIDType) and value:
+        return getattr(cls, key).to_primitive(value)
+    if isinstance(getattr(cls, key), fields.BooleanType):
+        return decimal.Decimal('1') if value else decimal.Decimal('0')
+    if value == '':
+        return None
+    return value
+
+
+def legacy_dynamodb_to_model(model_fields, row):
+    dict_row = dict(row)
+    for field_name, dynamodb_value in row.items():
+        if field_name in model_fields:
+            if isinstance(model_fields[field_name], (fields.DateTimeType, fields.DateType)):
+                if dynamodb_value:
+                    dict_row[field_name] = datetime.datetime.utcfromtimestamp(float(dynamodb_value))
+                else:
+                    dict_row[field_name] = None
+            if isinstance(model_fields[field_name], fields.BooleanType):
+                dict_row[field_name] = bool(dynamodb_value)
+    return dict_row
+
+
+def rows_per_second(func, rows):
+    started = time.time()
+    for row in rows:
+        func(row)
+    return len(rows) / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    now = datetime.datetime(2016, 1, 1)
+    model_rows = [dict(agency_subdomain='agency%s' % i, external_id=i, name='Name %s' % i, note='',
+                       is_enabled=True, is_archived=False, created=now, updated=now)
+                  for i in range(args.rows)]
+    dynamodb_rows = [BenchModel._initial_data_to_dynamodb(row) for row in model_rows]
+    instance = BenchModel.build(agency_subdomain='bench')
+    model_fields = BenchModel._fields
+
+    results = [
+        ('decode before', rows_per_second(lambda row: legacy_dynamodb_to_model(model_fields, row), dynamodb_rows)),
+        ('decode after', rows_per_second(instance._dynamodb_to_model, dynamodb_rows)),
+        ('encode before', rows_per_second(
+            lambda row: dict((key, legacy_value_to_dynamodb(BenchModel, key, value)) for key, value in row.items()),
+            model_rows)),
+        ('encode after', rows_per_second(BenchModel._initial_data_to_dynamodb, model_rows)),
+        ('from_row()', rows_per_second(lambda row: BenchModel.from_row(dict(row)), dynamodb_rows)),
+        ('build()', rows_per_second(lambda row: BenchModel.build(**row), model_rows)),
+    ]
+    print('%d rows, %d fields' % (args.rows, len(model_fields)))
+    for name, value in results:
+        print('  %-14s %12.0f rows/sec' % (name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark get_config(): calls per second before and after the read-only snapshot.
+
+"before" reproduces what get_config() used to return, a deep copy of the whole config on
+every call. "after" is the current get_config(), which returns the snapshot by reference.
+
+Usage: python benchmarks/bench_get_config.py [--tables 60] [--seconds 1]
+"""
+import argparse
+import copy
+import os
+import shutil
+import tempfile
+import time
+
+from munch import Munch
+import yaml
+
+import cc_dynamodb3.config
+
+
+TEST_CONFIG_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'dynamodb.yml')
+
+
+def build_config_file(table_count, directory):
+    """Write a YAML config with table_count tables, modelled on tests/dynamodb.yml."""
+    with open(TEST_CONFIG_PATH) as config_file:
+        base = yaml.safe_load(config_file)
+
+    config = dict(schemas={}, global_indexes={}, indexes={}, columns={},
+                  default_throughput=base['default_throughput'])
+    for i in range(table_count):
+        for section in ('schemas', 'global_indexes', 'indexes', 'columns'):
+            for table_name, value in base[section].items():
+                config[section]['%s_%s' % (table_name, i)] = copy.deepcopy(value)
+
+    path = os.path.join(directory, 'dynamodb.yml')
+    with open(path, 'w') as config_file:
+        yaml.safe_dump(config, config_file)
+    return path
+
+
+def calls_per_second(func, seconds):
+    calls = 0
+    started = time.time()
+    deadline = started + seconds
+    while time.time() < deadline:
+        for _ in range(100):
+            func()
+        calls += 100
+    return calls / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tables', type=int, default=60)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        # Each base table fans out to `tables` copies; scale so the total is close to --tables.
+        with open(TEST_CONFIG_PATH) as config_file:
+            base_tables = len(yaml.safe_load(config_file)['schemas'])
+        path = build_config_file(max(1, args.tables // base_tables), directory)
+        cc_dynamodb3.config.set_config(config_file_path=path, namespace='bench_',
+                                       aws_access_key_id='<KEY>', aws_secret_access_key='<SECRET>')
+    finally:
+        shutil.rmtree(directory)
+
+    legacy_config = cc_dynamodb3.config.get_config().thaw()
+
+    def legacy_get_config():
+        return Munch(copy.deepcopy(legacy_config.toDict()))
+
+    table_count = len(cc_dynamodb3.config.get_config().table_names)
+    before = calls_per_second(legacy_get_config, args.seconds)
+    after = calls_per_second(cc_dynamodb3.config.get_config, args.seconds)
+    print('get_config() with %d tables' % table_count)
+    print('  before (deepcopy): %12.0f calls/sec' % before)
+    print('  after (snapshot):  %12.0f calls/sec' % after)
+    print('  speedup:           %12.1fx' % (after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark readonly=True rows against full model instances: allocations per row and rows/sec.
+
+Usage: python benchmarks/bench_readonly_rows.py [--rows 20000]
+"""
+import argparse
+import datetime
+import time
+import tracemalloc
+
+from schematics import types as fields
+
+from cc_dynamodb3.models import DynamoDBModel
+
+
+class BenchModel(DynamoDBModel):
+    TABLE_NAME = 'bench'
+
+    agency_subdomain = fields.StringType(required=True)
+    external_id = fields.IntType()
+    name = fields.StringType()
+    is_enabled = fields.BooleanType()
+    created = fields.DateTimeType(default=DynamoDBModel.utcnow)
+    updated = fields.DateTimeType(default=DynamoDBModel.utcnow)
+
+
+def measure(from_row, rows):
+    """Build one object per row and read two fields. Returns (allocations per row, rows/sec)."""
+    copies = [dict(row) for row in rows[:1000]]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [from_row(row, {}) for row in copies]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'filename')) / float(len(kept))
+
+    started = time.time()
+    for row in rows:
+        obj = from_row(dict(row), {})
+        obj.external_id, obj.created
+    return allocations, len(rows) / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    now = datetime.datetime(2016, 1, 1)
+    rows = [BenchModel._initial_data_to_dynamodb(dict(agency_subdomain='agency%s' % i, external_id=i, name='Name',
+                                                      is_enabled=True, created=now, updated=now))
+            for i in range(args.rows)]
+
+    print('%d rows' % args.rows)
+    for name, from_row in (('from_row()', BenchModel.from_row), ('readonly', BenchModel.from_row_readonly)):
+        allocations, speed = measure(from_row, rows)
+        print('  %-11s %8.1f allocations/row %12.0f rows/sec' % (name, allocations, speed))
+
+
+if __name__ == '__main__':
+    main()
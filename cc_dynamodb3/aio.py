@@ -0,0 +1,633 @@
+"""
+asyncio support. Python 3 only.
+
+DynamoDBModel gets async variants of its main methods (aget, aquery, aall, asave, adelete,
+abatch_get), which talk to DynamoDB through a pluggable AsyncTransport:
+
+* ExecutorTransport (default) runs the regular, blocking boto3 calls in an executor.
+* InMemoryTransport keeps tables in process memory, for tests and local development.
+
+Use set_transport() to pick one, e.g. set_transport(InMemoryTransport()).
+
+aget() uses the item cache and the Session of the current task, as get() does. Blocking item caches
+(Redis) are called through AsyncTransport.run_blocking, off the event loop with ExecutorTransport.
+Not supported yet: aall() paginate, exclusive_start_key and segments, and aquery() counterparts
+of paginated_query and query_many. Transports always return rows as the resource does, whatever ENGINE.
+"""
+import asyncio
+import copy
+import decimal
+from functools import partial
+import operator
+import re
+
+from boto3.dynamodb.conditions import AttributeBase, Key, Size
+from botocore.exceptions import ClientError
+
+from .conditions import build_condition, filter_condition
+from .config import get_config
+from .registry import table_registry
+from .exceptions import NotFound, VersionConflictException
+from .log import log_enabled
+from .session import get_session
+from .table import (
+    BATCH_GET_MAX_KEYS,
+    batch_get_from_table,
+    get_table,
+    projection_kwargs,
+    query_table,
+    scan_table,
+)
+
+
+__all__ = [
+    'AsyncTransport',
+    'ExecutorTransport',
+    'InMemoryTransport',
+    'alist',
+    'aquery_all_in_table',
+    'ascan_all_in_table',
+    'get_transport',
+    'set_transport',
+]
+
+
+class AsyncTransport(object):
+    """
+    Interface for async access to DynamoDB tables. Table names are unprefixed.
+
+    Request kwargs and responses follow boto3's Table methods, except query and scan,
+    which take the same kwargs as cc_dynamodb3.table.query_table and scan_table.
+    """
+
+    async def get_item(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def put_item(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def update_item(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def delete_item(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def query(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def scan(self, table_name, **kwargs):
+        raise NotImplementedError
+
+    async def batch_get(self, table_name, keys, consistent_read=False):
+        """Return a list of (row, metadata) for up to BATCH_GET_MAX_KEYS keys."""
+        raise NotImplementedError
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Return func(*args, **kwargs), a blocking call such as a Redis item cache access. Called inline here."""
+        return func(*args, **kwargs)
+
+
+# asyncio.get_event_loop() is deprecated in coroutines since Python 3.10, get_running_loop() is new in 3.7.
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class ExecutorTransport(AsyncTransport):
+    """Runs the blocking boto3 calls in an executor (the loop's default one if None)."""
+
+    def __init__(self, executor=None):
+        self.executor = executor
+
+    def _run(self, func, *args, **kwargs):
+        loop = _get_running_loop()
+        return loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def _call_table(self, table_name, method_name, **kwargs):
+        return getattr(get_table(table_name), method_name)(**kwargs)
+
+    async def get_item(self, table_name, **kwargs):
+        return await self._run(self._call_table, table_name, 'get_item', **kwargs)
+
+    async def put_item(self, table_name, **kwargs):
+        return await self._run(self._call_table, table_name, 'put_item', **kwargs)
+
+    async def update_item(self, table_name, **kwargs):
+        return await self._run(self._call_table, table_name, 'update_item', **kwargs)
+
+    async def delete_item(self, table_name, **kwargs):
+        return await self._run(self._call_table, table_name, 'delete_item', **kwargs)
+
+    async def query(self, table_name, **kwargs):
+        return await self._run(query_table, table_name, **kwargs)
+
+    async def scan(self, table_name, **kwargs):
+        return await self._run(scan_table, table_name, **kwargs)
+
+    async def batch_get(self, table_name, keys, consistent_read=False):
+        def batch_get():
+            return list(batch_get_from_table(table_name, keys, consistent_read=consistent_read))
+        return await self._run(batch_get)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        return await self._run(func, *args, **kwargs)
+
+
+def _to_dynamodb_value(value):
+    """Store numbers as Decimal, like DynamoDB returns them."""
+    if isinstance(value, bool):
+        return decimal.Decimal(int(value))
+    if isinstance(value, (int, float)):
+        return decimal.Decimal(str(value))
+    if isinstance(value, dict):
+        return dict((key, _to_dynamodb_value(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [_to_dynamodb_value(item) for item in value]
+    if isinstance(value, set):
+        return set(_to_dynamodb_value(item) for item in value)
+    return value
+
+
+_UPDATE_CLAUSE = re.compile(r'\b(SET|REMOVE|ADD|DELETE)\s')
+
+
+def _apply_update_expression(item, update_expression, names, values):
+    """Apply a simple UpdateExpression (SET a = :v, REMOVE a, ADD a :v, DELETE a :v) to item, in place."""
+    parts = _UPDATE_CLAUSE.split(update_expression)[1:]
+    for action, actions in zip(parts[::2], parts[1::2]):
+        for update in actions.split(','):
+            tokens = update.replace('=', ' ').split()
+            field_name = names.get(tokens[0], tokens[0])
+            value = _to_dynamodb_value(values[tokens[1]]) if len(tokens) > 1 else None
+            if action == 'SET':
+                item[field_name] = value
+            elif action == 'REMOVE':
+                item.pop(field_name, None)
+            elif action == 'ADD':
+                if field_name not in item:
+                    item[field_name] = value
+                elif isinstance(value, set):
+                    item[field_name] = item[field_name] | value
+                else:
+                    item[field_name] = item[field_name] + value
+            elif field_name in item:  # DELETE elements of a set
+                item[field_name] = item[field_name] - value
+                if not item[field_name]:
+                    del item[field_name]
+
+
+_CONDITION = re.compile(r'^\s*(?:(attribute_exists|attribute_not_exists)\(\s*(\S+?)\s*\)|(\S+)\s*=\s*(\S+))\s*$')
+
+
+def _check_condition(operation_name, item, condition_expression, names, values):
+    """
+    Raise ConditionalCheckFailedException unless item (None if missing) meets condition_expression.
+
+    Supports the conditions models write: attribute_exists(a), attribute_not_exists(a) and a = :v,
+    joined with AND.
+    """
+    for condition in re.split(r'\s+AND\s+', condition_expression):
+        match = _CONDITION.match(condition)
+        if not match:
+            raise NotImplementedError('InMemoryTransport does not support condition: %s' % condition)
+        function, function_name, name, placeholder = match.groups()
+        field_name = names.get(function_name or name, function_name or name)
+        exists = item is not None and field_name in item
+        if function == 'attribute_exists':
+            passed = exists
+        elif function == 'attribute_not_exists':
+            passed = not exists
+        else:
+            passed = exists and item[field_name] == _to_dynamodb_value(values[placeholder])
+        if not passed:
+            raise ClientError(dict(Error=dict(Code='ConditionalCheckFailedException',
+                                              Message='The conditional request failed')), operation_name)
+
+
+_MISSING = object()
+
+# Comparisons of boto3 conditions, by their get_expression()['operator']
+_COMPARISONS = {
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'begins_with': lambda value, prefix: value.startswith(prefix),
+    'contains': lambda value, member: member in value,
+    'IN': lambda value, values: value in values,
+    'BETWEEN': lambda value, low, high: low <= value <= high,
+}
+
+
+def _lookup(item, path):
+    """Value at the attribute path 'data.address.zip' of item, or _MISSING."""
+    value = item
+    for name in path.split('.'):
+        if not isinstance(value, dict) or name not in value:
+            return _MISSING
+        value = value[name]
+    return value
+
+
+def _project(item, paths):
+    """Copy of item with only the attribute paths, e.g. ['id', 'address.city'], or all of it if paths is empty."""
+    if not paths:
+        return copy.deepcopy(item)
+    projected = dict()
+    for path in paths:
+        value = _lookup(item, path)
+        if value is _MISSING:
+            continue
+        names = path.split('.')
+        parent = projected
+        for name in names[:-1]:
+            parent = parent.setdefault(name, dict())
+        parent[names[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def _projection_paths(projection_expression, names):
+    """Attribute paths of a ProjectionExpression, e.g. '#p0, #p1.#p2' -> ['id', 'address.city']."""
+    if not projection_expression:
+        return None
+    return ['.'.join((names or {}).get(name, name) for name in path.strip().split('.'))
+            for path in projection_expression.split(',')]
+
+
+def _operand(item, value):
+    if isinstance(value, Size):
+        value = _lookup(item, value.get_expression()['values'][0].name)
+        return _MISSING if value is _MISSING else len(value)
+    if isinstance(value, AttributeBase):
+        return _lookup(item, value.name)
+    if isinstance(value, (list, tuple)):
+        return [_to_dynamodb_value(element) for element in value]
+    return _to_dynamodb_value(value)
+
+
+def _matches(item, condition):
+    """Whether item meets the boto3 condition (None always matches)."""
+    if condition is None:
+        return True
+    expression = condition.get_expression()
+    op, values = expression['operator'], expression['values']
+    if op == 'AND':
+        return all(_matches(item, value) for value in values)
+    if op == 'OR':
+        return any(_matches(item, value) for value in values)
+    if op == 'NOT':
+        return not _matches(item, values[0])
+    if op == 'attribute_exists':
+        return _lookup(item, values[0].name) is not _MISSING
+    if op == 'attribute_not_exists':
+        return _lookup(item, values[0].name) is _MISSING
+    if op not in _COMPARISONS:
+        raise NotImplementedError('InMemoryTransport does not support operator: %s' % op)
+    operands = [_operand(item, value) for value in values]
+    if any(operand is _MISSING for operand in operands):
+        return False
+    try:
+        return _COMPARISONS[op](*operands)
+    except (TypeError, AttributeError):
+        return False
+
+
+class InMemoryTransport(AsyncTransport):
+    """
+    Keeps items in memory, per unprefixed table name. Schemas and indexes come from get_config().
+
+    Supports the query_table operators, projections, Limit and pagination. Update supports AttributeUpdates
+    and UpdateExpression with SET, REMOVE, ADD and DELETE of plain attribute names. Put and update
+    support the ConditionExpressions of VERSION_FIELD models.
+    """
+
+    def __init__(self):
+        self.tables = dict()
+
+    def _key_names(self, table_name, index_name=None):
+        """Return (hash_key, range_key or None) of the table, or of one of its indexes."""
+        return table_registry(get_config()).hash_and_range_keys(table_name, index_name)
+
+    def _primary_key(self, table_name, item):
+        return tuple(item[name] for name in self._key_names(table_name) if name)
+
+    def _table(self, table_name):
+        self._key_names(table_name)
+        return self.tables.setdefault(table_name, dict())
+
+    def _response(self, **kwargs):
+        kwargs['ResponseMetadata'] = dict(HTTPStatusCode=200, Transport='InMemoryTransport')
+        return kwargs
+
+    @staticmethod
+    def _return_old(item, return_values, updated_names=()):
+        if item is None:
+            return dict()
+        if return_values == 'ALL_OLD':
+            return dict(Attributes=copy.deepcopy(item))
+        if return_values == 'UPDATED_OLD':
+            attributes = dict((name, copy.deepcopy(item[name])) for name in updated_names if name in item)
+            return dict(Attributes=attributes) if attributes else dict()
+        return dict()
+
+    async def get_item(self, table_name, Key, ConsistentRead=False, ProjectionExpression=None,
+                       ExpressionAttributeNames=None):
+        item = self._table(table_name).get(self._primary_key(table_name, Key))
+        if item is None:
+            return self._response()
+        return self._response(Item=_project(item, _projection_paths(ProjectionExpression, ExpressionAttributeNames)))
+
+    async def put_item(self, table_name, Item, ReturnValues='NONE', ConditionExpression=None,
+                       ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        item = dict((key, _to_dynamodb_value(value)) for key, value in Item.items() if value is not None)
+        table = self._table(table_name)
+        primary_key = self._primary_key(table_name, item)
+        old_item = table.get(primary_key)
+        if ConditionExpression:
+            _check_condition('PutItem', old_item, ConditionExpression,
+                             ExpressionAttributeNames or dict(), ExpressionAttributeValues or dict())
+        table[primary_key] = item
+        return self._response(**self._return_old(old_item, ReturnValues))
+
+    async def update_item(self, table_name, Key, AttributeUpdates=None, UpdateExpression=None,
+                          ExpressionAttributeNames=None, ExpressionAttributeValues=None, ReturnValues='NONE',
+                          ConditionExpression=None):
+        table = self._table(table_name)
+        primary_key = self._primary_key(table_name, Key)
+        old_item = table.get(primary_key)
+        if ConditionExpression:
+            _check_condition('UpdateItem', old_item, ConditionExpression,
+                             ExpressionAttributeNames or dict(), ExpressionAttributeValues or dict())
+        item = copy.deepcopy(old_item) if old_item is not None else _to_dynamodb_value(dict(Key))
+        if UpdateExpression:
+            names = ExpressionAttributeNames or dict()
+            updated_names = set(names.values())
+            _apply_update_expression(item, UpdateExpression, names, ExpressionAttributeValues or dict())
+        else:
+            updated_names = set(AttributeUpdates or ())
+            for field_name, update in (AttributeUpdates or {}).items():
+                if update['Action'] == 'DELETE':
+                    item.pop(field_name, None)
+                else:
+                    item[field_name] = _to_dynamodb_value(update['Value'])
+        table[primary_key] = item
+        return self._response(**self._return_old(old_item, ReturnValues, updated_names))
+
+    async def delete_item(self, table_name, Key, ReturnValues='NONE'):
+        old_item = self._table(table_name).pop(self._primary_key(table_name, Key), None)
+        return self._response(**self._return_old(old_item, ReturnValues))
+
+    def _sorted_items(self, table_name, index_name=None):
+        hash_key, range_key = self._key_names(table_name, index_name)
+        items = [item for item in self._table(table_name).values()
+                 if hash_key in item and (not range_key or range_key in item)]
+        table_hash_key, table_range_key = self._key_names(table_name)
+        sort_names = [name for name in (hash_key, range_key, table_hash_key, table_range_key) if name]
+        return sorted(items, key=lambda item: tuple(item[name] for name in sort_names)), sort_names
+
+    def _page(self, table_name, items, sort_names, conditions, filter_conditions,
+              limit, exclusive_start_key, descending=False, attributes=None):
+        if descending:
+            items.reverse()
+        if exclusive_start_key:
+            start = tuple(_to_dynamodb_value(exclusive_start_key[name]) for name in sort_names)
+            items = [item for item in items
+                     if (tuple(item[name] for name in sort_names) < start if descending else
+                         tuple(item[name] for name in sort_names) > start)]
+        items = [item for item in items if _matches(item, conditions)]
+
+        response = dict()
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            response['LastEvaluatedKey'] = dict((name, items[-1][name]) for name in sort_names)
+        filtered = [_project(item, attributes) for item in items if _matches(item, filter_conditions)]
+        return self._response(Items=filtered, Count=len(filtered), ScannedCount=len(items), **response)
+
+    async def query(self, table_name, query_index=None, descending=False, limit=None,
+                    exclusive_start_key=None, filter_expression=None, attributes=None, **query_keys):
+        items, sort_names = self._sorted_items(table_name, query_index)
+        return self._page(table_name, items, sort_names,
+                          conditions=build_condition(Key, query_keys),
+                          filter_conditions=filter_condition(filter_expression),
+                          limit=limit, exclusive_start_key=exclusive_start_key, descending=descending,
+                          attributes=attributes)
+
+    async def scan(self, table_name, exclusive_start_key=None, limit=None, filter_expression=None, attributes=None):
+        items, sort_names = self._sorted_items(table_name)
+        return self._page(table_name, items, sort_names, conditions=None,
+                          filter_conditions=filter_condition(filter_expression),
+                          limit=limit, exclusive_start_key=exclusive_start_key, attributes=attributes)
+
+    async def batch_get(self, table_name, keys, consistent_read=False):
+        rows = []
+        for key in keys:
+            response = await self.get_item(table_name, Key=key)
+            if 'Item' in response:
+                rows.append((response['Item'], response['ResponseMetadata']))
+        return rows
+
+
+_transport = None
+
+
+def set_transport(transport):
+    """Set the AsyncTransport used by the async API."""
+    global _transport
+    _transport = transport
+
+
+def get_transport():
+    """Return the AsyncTransport in use, an ExecutorTransport unless set_transport() was called."""
+    global _transport
+    if _transport is None:
+        _transport = ExecutorTransport()
+    return _transport
+
+
+async def _call_item_cache(item_cache, func, *args):
+    """func(*args), which reads or writes item_cache: through the transport if the cache does network I/O."""
+    if item_cache is not None and item_cache.BLOCKING:
+        return await get_transport().run_blocking(func, *args)
+    return func(*args)
+
+
+async def alist(async_iterable):
+    """Collect an async iterable into a list."""
+    return [value async for value in async_iterable]
+
+
+async def _aretrieve_all_matching(query_or_scan_func, limit=None, **kwargs):
+    """Async counterpart of table._retrieve_all_matching, yields (row, metadata)."""
+    total_found = 0
+    while True:
+        response = await query_or_scan_func(**kwargs)
+        metadata = response.get('ResponseMetadata', {})
+        for row in response['Items']:
+            yield row, metadata
+            total_found += 1
+            if limit and total_found == limit:
+                return
+        if not response.get('LastEvaluatedKey'):
+            return
+        kwargs['exclusive_start_key'] = response['LastEvaluatedKey']
+
+
+def ascan_all_in_table(table_name, **kwargs):
+    """
+    Async iterator over all records in a table, as tuples (row, metadata).
+
+    :param table_name: 'some_table', unprefixed
+    :param kwargs: see kwargs accepted by scan_table
+    """
+    return _aretrieve_all_matching(partial(get_transport().scan, table_name), **kwargs)
+
+
+def aquery_all_in_table(table_name, **kwargs):
+    """
+    Async iterator over all records matching a query, as tuples (row, metadata).
+
+    :param table_name: 'some_table', unprefixed
+    :param kwargs: see kwargs accepted by query_table
+    """
+    return _aretrieve_all_matching(partial(get_transport().query, table_name), **kwargs)
+
+
+class AsyncModelMixin(object):
+    """Async variants of DynamoDBModel methods, with the same semantics."""
+
+    @classmethod
+    async def aget(cls, consistent_read=False, readonly=False, attributes=None, **kwargs):
+        """Async DynamoDBModel.get, with the item cache and the Session of the current task."""
+        cls._validate_primary_key(kwargs)
+
+        session = None if readonly or attributes is not None else get_session()
+        if session is not None:
+            model = session.lookup(cls, kwargs)
+            if model is not None:
+                return model
+        model = await cls._aget_item(kwargs, consistent_read, readonly, attributes)
+        return model if session is None else session.add(model)
+
+    @classmethod
+    async def _aget_item(cls, key, consistent_read, readonly, attributes):
+        projected, loaded_fields = cls._projection(attributes)
+        item_cache = None if projected else cls.item_cache()
+        item_cache, cache_key, model = await _call_item_cache(item_cache, cls._get_cached_item,
+                                                              key, consistent_read, readonly, projected)
+        if model is not None:
+            return model
+
+        get_item_kwargs = dict(Key=key, ConsistentRead=consistent_read)
+        if projected:
+            get_item_kwargs.update(projection_kwargs(projected))
+        response = await get_transport().get_item(cls.TABLE_NAME, **get_item_kwargs)
+        return await _call_item_cache(item_cache, cls._from_get_item_response,
+                                      response, key, readonly, loaded_fields, item_cache, cache_key, False)
+
+    @classmethod
+    async def aquery(cls, query_index=None, descending=False, limit=None, filter_expression=None, readonly=False,
+                     attributes=None, **query_keys):
+        """Async DynamoDBModel.query"""
+        query_index = query_index or getattr(cls, 'QUERY_INDEX', None)
+        projected, loaded_fields = cls._projection(attributes)
+        from_row = cls._row_factory(readonly, loaded_fields, wire=False)
+        async for row, metadata in aquery_all_in_table(cls.TABLE_NAME,
+                                                       query_index=query_index,
+                                                       descending=descending,
+                                                       limit=limit,
+                                                       filter_expression=filter_expression,
+                                                       attributes=projected,
+                                                       **query_keys):
+            yield from_row(row, metadata)
+
+    @classmethod
+    async def aall(cls, limit=None, readonly=False, attributes=None, filter_expression=None):
+        """
+        Async DynamoDBModel.all, one scan page at a time: paginate, exclusive_start_key and segments
+        are not supported. Stops after limit models, if given.
+        """
+        projected, loaded_fields = cls._projection(attributes)
+        from_row = cls._row_factory(readonly, loaded_fields, wire=False)
+        async for row, metadata in ascan_all_in_table(cls.TABLE_NAME, limit=limit, attributes=projected,
+                                                      filter_expression=filter_expression):
+            yield from_row(row, metadata)
+
+    @classmethod
+    async def abatch_get(cls, keys, consistent_read=False, preserve_order=False):
+        """Async DynamoDBModel.batch_get. Chunks of keys are fetched concurrently."""
+        table_keys, unique_keys, ordered_key_values = cls._unique_keys(keys)
+        unique_keys = list(unique_keys.values())
+        chunks = [unique_keys[start:start + BATCH_GET_MAX_KEYS]
+                  for start in range(0, len(unique_keys), BATCH_GET_MAX_KEYS)]
+        requests = [get_transport().batch_get(cls.TABLE_NAME, chunk, consistent_read=consistent_read)
+                    for chunk in chunks]
+
+        if not preserve_order:
+            for request in asyncio.as_completed(requests):
+                for row, metadata in await request:
+                    yield cls.from_row(row, metadata)
+            return
+
+        rows = []
+        for chunk_rows in await asyncio.gather(*requests):
+            rows.extend(chunk_rows)
+        for model in cls._in_key_order(rows, table_keys, ordered_key_values):
+            yield model
+
+    async def areload(self):
+        """Async DynamoDBModel.reload"""
+        try:
+            return await self._aget_item(self.get_primary_key(), consistent_read=True, readonly=False,
+                                         attributes=None)
+        except NotFound:
+            return None
+
+    async def adelete(self):
+        """Async DynamoDBModel.delete"""
+        if self._is_deleted:
+            return False
+        await get_transport().delete_item(self.TABLE_NAME, Key=self.get_primary_key())
+        await _call_item_cache(self.item_cache(), self._invalidate_cached_item)
+        self._is_deleted = True
+        return True
+
+    async def aupdate(self, skip_primary_key_check=False, return_values=None):
+        """Async DynamoDBModel.update"""
+        update_kwargs = self._update_item_kwargs(skip_primary_key_check, return_values)
+        if update_kwargs is None:
+            return dict()
+
+        try:
+            response = await get_transport().update_item(self.TABLE_NAME, **update_kwargs)
+        except ClientError as e:
+            self._raise_if_version_conflict(e)
+            raise
+        self._expect_exists_in_db = True
+        return response
+
+    async def asave(self, overwrite=False, return_values=None):
+        """Async DynamoDBModel.save"""
+        is_update, has_changed_primary_key = self._before_save(overwrite)
+
+        try:
+            if is_update:
+                result = await self.aupdate(skip_primary_key_check=has_changed_primary_key,
+                                            return_values=return_values)
+            else:
+                result = await get_transport().put_item(self.TABLE_NAME,
+                                                        **self._put_item_kwargs(return_values, overwrite))
+
+        except VersionConflictException:
+            raise
+        except ClientError as e:
+            self._raise_if_validation_error(e)
+            self._raise_if_version_conflict(e)
+            raise
+        except Exception:
+            if log_enabled('error'):
+                self._log_save_error(None if self.VERSION_FIELD else await self.areload(), overwrite)
+            raise
+
+        # _after_save() invalidates the item cache
+        await _call_item_cache(self.item_cache(), self._after_save, result, overwrite, is_update, return_values)
+        return result
@@ -0,0 +1,256 @@
+"""
+Read-through cache for DynamoDBModel.get(), enabled per model with CACHE_TTL.
+
+Rows are cached as returned by the boto3 resource, keyed by namespace, table and primary key,
+and shared by all models of a table. Backends:
+
+* MemoryItemCache: in process, LRU bounded by CACHE_MAX_SIZE.
+* RedisItemCache: shared through the Redis connection of set_redis_config(), see get_redis_cache().
+  Bound its size with Redis' own maxmemory policy.
+
+save() and delete() invalidate the entry of the model they write, but only in this process
+for MemoryItemCache: keep CACHE_TTL short for items written by other processes.
+"""
+import base64
+import binascii
+import collections
+import copy
+import decimal
+import json
+import threading
+import time
+
+import six
+from boto3.dynamodb.types import Binary
+
+from .client_engine import deserialize_item, serialize_item
+from .config import get_config, get_redis_cache
+from .log import log_data
+
+
+MEMORY_CACHE = 'memory'
+REDIS_CACHE = 'redis'
+
+REDIS_KEY_PREFIX = 'cc_dynamodb3_item:'
+
+
+class ItemCache(object):
+    """Base class for item cache backends. Counts hits, misses and invalidations."""
+
+    # True for backends doing network I/O: the async API calls them in an executor, see cc_dynamodb3.aio.
+    BLOCKING = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return a copy of the cached row, or None."""
+        row = self._get(key)
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def set(self, key, row, ttl):
+        self._set(key, row, ttl)
+
+    def delete(self, key):
+        self.invalidations += 1
+        self._delete(key)
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, invalidations=self.invalidations)
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, row, ttl):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+
+class MemoryItemCache(ItemCache):
+    """In process LRU cache. Rows are copied in and out, so callers never share them."""
+
+    def __init__(self, max_size):
+        super(MemoryItemCache, self).__init__()
+        self.max_size = max_size
+        self.evictions = 0
+        self._rows = collections.OrderedDict()  # key: (expires at, row), least recently used first
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._rows.pop(key, None)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                return None
+            self._rows[key] = entry
+        return copy.deepcopy(entry[1])
+
+    def _set(self, key, row, ttl):
+        entry = (time.time() + ttl, copy.deepcopy(row))
+        with self._lock:
+            self._rows.pop(key, None)
+            self._rows[key] = entry
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+                self.evictions += 1
+
+    def _delete(self, key):
+        with self._lock:
+            self._rows.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self):
+        stats = super(MemoryItemCache, self).stats()
+        stats.update(size=len(self._rows), max_size=self.max_size, evictions=self.evictions)
+        return stats
+
+
+def _json_default(value):
+    if isinstance(value, Binary):
+        value = value.value
+    if isinstance(value, six.binary_type):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError('Cannot encode %r' % (value,))
+
+
+def _decode_binary(attribute_value):
+    """A wire format AttributeValue read from JSON, with its binary values decoded from base64."""
+    (type_code, value), = attribute_value.items()
+    if type_code == 'B':
+        value = base64.b64decode(value)
+    elif type_code == 'BS':
+        value = [base64.b64decode(element) for element in value]
+    elif type_code == 'L':
+        value = [_decode_binary(element) for element in value]
+    elif type_code == 'M':
+        value = dict((name, _decode_binary(element)) for name, element in value.items())
+    return {type_code: value}
+
+
+def _dumps_row(row):
+    """
+    Encode a row as JSON, in DynamoDB's wire format ({'N': '1'}, {'SS': [...]}, ...) with binary values
+    in base64, so Decimals, sets and Binary values come back as they were. See _loads_row.
+    """
+    return json.dumps(serialize_item(row), default=_json_default, separators=(',', ':'))
+
+
+def _loads_row(encoded):
+    """Decode a row from _dumps_row. Raises ValueError if encoded is not one."""
+    if isinstance(encoded, six.binary_type):
+        encoded = encoded.decode('utf-8')
+    try:
+        wire_item = json.loads(encoded)
+        return deserialize_item(dict((name, _decode_binary(value)) for name, value in wire_item.items()))
+    except (AttributeError, KeyError, TypeError, binascii.Error) as e:
+        raise ValueError('Invalid cached row: %s' % e)
+
+
+class RedisItemCache(ItemCache):
+    """
+    Cache shared through Redis. Redis errors are logged and treated as misses: reads never fail on the cache.
+
+    Rows are stored as JSON (see _dumps_row), never pickled: anyone who can write to Redis could otherwise
+    run code in every process reading the cache.
+    """
+
+    BLOCKING = True
+
+    def __init__(self, redis_cache):
+        super(RedisItemCache, self).__init__()
+        self.redis = redis_cache
+
+    def _get(self, key):
+        try:
+            encoded = self.redis.get(REDIS_KEY_PREFIX + key)
+        except Exception:
+            log_data('Item cache get failed, key=%s' % key, logging_level='warning')
+            return None
+        if not encoded:
+            return None
+        try:
+            return _loads_row(encoded)
+        except ValueError:
+            log_data('Item cache entry is invalid, key=%s' % key, logging_level='warning')
+            return None
+
+    def _set(self, key, row, ttl):
+        try:
+            self.redis.setex(REDIS_KEY_PREFIX + key, int(max(ttl, 1)), _dumps_row(row))
+        except Exception:
+            log_data('Item cache set failed, key=%s' % key, logging_level='warning')
+
+    def _delete(self, key):
+        try:
+            self.redis.delete(REDIS_KEY_PREFIX + key)
+        except Exception:
+            log_data('Item cache delete failed, key=%s' % key, logging_level='error')
+
+
+# (backend, table name): ItemCache, shared by all models of a table.
+_item_caches = dict()
+_item_caches_lock = threading.Lock()
+
+
+def get_item_cache(model_class):
+    """
+    Return the ItemCache for model_class, created on first use. None if its CACHE_TTL is not set.
+
+    Falls back to the memory backend when CACHE_BACKEND is REDIS_CACHE but Redis is not configured.
+    """
+    if not model_class.CACHE_TTL:
+        return None
+    backend = model_class.CACHE_BACKEND
+    cache_key = (backend, model_class.TABLE_NAME)
+    item_cache = _item_caches.get(cache_key)
+    if item_cache is None:
+        with _item_caches_lock:
+            item_cache = _item_caches.get(cache_key)
+            if item_cache is None:
+                redis_cache = get_redis_cache() if backend == REDIS_CACHE else None
+                if backend == REDIS_CACHE and redis_cache is None:
+                    log_data('Redis is not configured, caching %s in memory' % model_class.TABLE_NAME,
+                             logging_level='warning', exc_info=False)
+                if redis_cache is not None:
+                    item_cache = RedisItemCache(redis_cache)
+                else:
+                    item_cache = MemoryItemCache(model_class.CACHE_MAX_SIZE)
+                _item_caches[cache_key] = item_cache
+    return item_cache
+
+
+def clear_item_caches():
+    """Forget all item caches and their counters."""
+    with _item_caches_lock:
+        _item_caches.clear()
+
+
+def _key_part(value):
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, six.integer_types + (float, decimal.Decimal)):
+        # get(id=1) and a Decimal('1') read back from DynamoDB are the same key.
+        return str(decimal.Decimal(str(value)).normalize())
+    return six.text_type(value)
+
+
+def item_cache_key(table_name, key):
+    """
+    Cache key for an item of table_name (unprefixed) with primary key dictionary key.
+
+    Key parts are JSON encoded, so values containing any separator cannot collide.
+    """
+    return '%s%s:%s' % (get_config().namespace, table_name,
+                        json.dumps([[name, _key_part(key[name])] for name in sorted(key)], separators=(',', ':')))
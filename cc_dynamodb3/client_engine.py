@@ -0,0 +1,218 @@
+"""
+Opt-in engine reading through the low-level DynamoDB client instead of the boto3 resource.
+
+The boto3 resource deserializes every response by walking its whole shape, then DynamoDBModel
+converts the values a second time. The functions here return items in wire format
+(e.g. {'N': '1'}) so that models decode them in one pass, see DynamoDBModel.from_wire.
+
+Set ENGINE = CLIENT_ENGINE on a model to use it for get, query, paginated_query and all.
+Keys (key, exclusive_start_key, LastEvaluatedKey) are plain Python values, as with the resource.
+"""
+from functools import partial
+
+import six
+
+from boto3.dynamodb.conditions import ConditionExpressionBuilder, Key
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, Binary, TypeSerializer
+
+from .conditions import filter_condition
+from .connection import get_connection
+from . import table
+from .table import (
+    _parallel_scan,
+    _query_many,
+    _retrieve_all_matching,
+    build_condition,
+    get_table_name,
+    projection_kwargs,
+)
+
+
+RESOURCE_ENGINE = 'resource'
+CLIENT_ENGINE = 'client'
+
+_serializer = TypeSerializer()
+
+
+def _deserialize_number(value):
+    return DYNAMODB_CONTEXT.create_decimal(value)
+
+
+def _deserialize_list(value):
+    return [deserialize(element) for element in value]
+
+
+def _deserialize_map(value):
+    return dict((name, deserialize(element)) for name, element in value.items())
+
+
+# Same conversions as boto3's TypeDeserializer, without its per-value getattr dispatch.
+_DESERIALIZERS = {
+    'S': lambda value: value,
+    'N': _deserialize_number,
+    'B': Binary,
+    'BOOL': lambda value: value,
+    'NULL': lambda value: None,
+    'SS': set,
+    'NS': lambda value: set(map(_deserialize_number, value)),
+    'BS': lambda value: set(map(Binary, value)),
+    'L': _deserialize_list,
+    'M': _deserialize_map,
+}
+
+
+def deserialize(attribute_value):
+    """Convert one wire format AttributeValue, e.g. {'N': '1'}, to the value the boto3 resource returns."""
+    (type_code, value), = attribute_value.items()
+    return _DESERIALIZERS[type_code](value)
+
+
+def deserialize_item(wire_item):
+    return dict((name, deserialize(attribute_value)) for name, attribute_value in wire_item.items())
+
+
+def serialize_item(item):
+    return dict((name, _serializer.serialize(value)) for name, value in item.items())
+
+
+def _client():
+    return get_connection(as_resource=False)
+
+
+class _Request(object):
+    """Accumulates a client request, with the expression placeholders shared by its expressions."""
+
+    def __init__(self, table_name):
+        self.kwargs = dict(TableName=get_table_name(table_name))
+        self.names = dict()
+        self.values = dict()
+        self._builder = ConditionExpressionBuilder()
+
+    def add_condition(self, argument, condition, is_key_condition=False):
+        built = self._builder.build_expression(condition, is_key_condition=is_key_condition)
+        self.names.update(built.attribute_name_placeholders)
+        for placeholder, value in built.attribute_value_placeholders.items():
+            self.values[placeholder] = _serializer.serialize(value)
+        self.kwargs[argument] = built.condition_expression
+
+    def add_projection(self, attributes):
+        projection = projection_kwargs(attributes)
+        self.names.update(projection['ExpressionAttributeNames'])
+        self.kwargs['ProjectionExpression'] = projection['ProjectionExpression']
+
+    def add_exclusive_start_key(self, exclusive_start_key):
+        if exclusive_start_key:
+            self.kwargs['ExclusiveStartKey'] = serialize_item(exclusive_start_key)
+
+    def send(self, operation):
+        if self.names:
+            self.kwargs['ExpressionAttributeNames'] = self.names
+        if self.values:
+            self.kwargs['ExpressionAttributeValues'] = self.values
+        response = operation(**self.kwargs)
+        if response.get('LastEvaluatedKey'):
+            response['LastEvaluatedKey'] = deserialize_item(response['LastEvaluatedKey'])
+        return response
+
+
+def get_item(table_name, key, consistent_read=False, attributes=None):
+    """
+    GetItem through the client.
+
+    :param table_name: (string) un-prefixed table name
+    :param key: primary key dictionary of Python values
+    :param consistent_read: (boolean, optional) use a strongly consistent read
+    :param attributes: (list, optional) only return these attributes (ProjectionExpression)
+    :return: client get_item response; 'Item', if any, is in wire format
+    """
+    request = _Request(table_name)
+    request.kwargs.update(Key=serialize_item(key), ConsistentRead=consistent_read)
+    if attributes:
+        request.add_projection(attributes)
+    return request.send(_client().get_item)
+
+
+def query_table(table_name, query_index=None, descending=False, limit=None,
+                exclusive_start_key=None, filter_expression=None, attributes=None, **query_keys):
+    """
+    Same as table.query_table, through the client. 'Items' in the response are in wire format.
+
+    :param table_name: (string) un-prefixed table name
+    """
+    request = _Request(table_name)
+    request.kwargs['ScanIndexForward'] = not descending
+    request.add_condition('KeyConditionExpression', build_condition(Key, query_keys), is_key_condition=True)
+    condition = filter_condition(filter_expression)
+    if condition is not None:
+        request.add_condition('FilterExpression', condition)
+    if limit is not None:
+        request.kwargs['Limit'] = limit
+    if query_index:
+        request.kwargs['IndexName'] = query_index
+    request.add_exclusive_start_key(exclusive_start_key)
+    if attributes:
+        request.add_projection(attributes)
+    return request.send(_client().query)
+
+
+def scan_table(table_name, exclusive_start_key=None, limit=None, attributes=None, filter_expression=None,
+               **scan_kwargs):
+    """
+    Same as table.scan_table, through the client. 'Items' in the response are in wire format.
+
+    :param table_name: (string) un-prefixed table name
+    :param filter_expression: (optional) dictionary of filter attributes or Q object, as in table.query_table
+    :param scan_kwargs: client scan arguments; FilterExpression may be a boto3 condition
+    """
+    request = _Request(table_name)
+    filter_expression = scan_kwargs.pop('FilterExpression', filter_expression)
+    request.kwargs.update(scan_kwargs)
+    if isinstance(filter_expression, six.string_types):
+        request.kwargs['FilterExpression'] = filter_expression
+    else:
+        condition = filter_condition(filter_expression)
+        if condition is not None:
+            request.add_condition('FilterExpression', condition)
+    if limit is not None:
+        request.kwargs['Limit'] = limit
+    request.add_exclusive_start_key(exclusive_start_key)
+    if attributes:
+        request.add_projection(attributes)
+    return request.send(_client().scan)
+
+
+def scan_all_in_table(table_name, *args, **kwargs):
+    """Same as table.scan_all_in_table, through the client. Rows are in wire format."""
+    segments = kwargs.pop('segments', None)
+    if segments:
+        return _parallel_scan(table_name, segments, scan_func=partial(scan_table, table_name), **kwargs)
+    return _retrieve_all_matching(partial(scan_table, table_name), *args, **kwargs)
+
+
+def query_all_in_table(table_name, *args, **kwargs):
+    """Same as table.query_all_in_table, through the client. Rows are in wire format."""
+    return _retrieve_all_matching(partial(query_table, table_name), *args, **kwargs)
+
+
+def query_many_in_table(table_name, queries, max_workers=None, ordered=False, buffer_size=None):
+    """Same as table.query_many_in_table, through the client. Rows are in wire format."""
+    return _query_many(partial(query_all_in_table, table_name), queries, max_workers=max_workers, ordered=ordered,
+                       buffer_size=buffer_size)
+
+
+class PreparedQuery(table.PreparedQuery):
+    """Same as table.PreparedQuery, through the client. Bound values are serialized once, rows are in wire format."""
+
+    def bind(self, values):
+        request = super(PreparedQuery, self).bind(values)
+        request['TableName'] = get_table_name(self.table_name)
+        request['ExpressionAttributeValues'] = serialize_item(request['ExpressionAttributeValues'])
+        return request
+
+    def _send(self, request):
+        if 'ExclusiveStartKey' in request:
+            request['ExclusiveStartKey'] = serialize_item(request['ExclusiveStartKey'])
+        response = _client().query(**request)
+        if response.get('LastEvaluatedKey'):
+            response['LastEvaluatedKey'] = deserialize_item(response['LastEvaluatedKey'])
+        return response
@@ -0,0 +1,166 @@
+"""
+Conditions of query_table and scan_table, written as keyword arguments:
+
+    attribute=value                 equal (no operator means 'eq')
+    attribute__gte=value            eq, ne, lt, lte, gt, gte, begins_with, contains, is_in=[...]
+    attribute__between=(low, high)
+    attribute__exists=True          attribute_exists, or attribute_not_exists with False
+    attribute__not_exists=True      (attribute_exists/attribute_not_exists are accepted too)
+    attribute__size__gt=3           compare the size of a string, binary, list, map or set
+    data__address__zip__eq=value    nested attribute data.address.zip: the operator is required
+    **{'data.address.zip': value}   same, with a dotted path
+
+Keyword arguments are ANDed together. For OR and NOT in filters, combine Q objects:
+
+    Caregiver.query(agency_id=1, filter_expression=Q(is_active=True) | ~Q(tags__size__gt=0))
+
+Key conditions only support eq, lt, lte, gt, gte, begins_with and between, as DynamoDB does.
+"""
+import operator
+
+from boto3.dynamodb.conditions import Attr, ConditionBase, Key
+from six.moves import reduce
+
+from .exceptions import ValidationError
+
+
+OPERATORS = frozenset([
+    'eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'begins_with', 'contains', 'is_in', 'between',
+    'exists', 'not_exists', 'attribute_exists', 'attribute_not_exists', 'attribute_type',
+])
+_ALIASES = {
+    'attribute_exists': 'exists',
+    'attribute_not_exists': 'not_exists',
+}
+_NEGATED = {
+    'exists': 'not_exists',
+    'not_exists': 'exists',
+}
+
+
+def split_argument(argument):
+    """
+    Split a condition argument into its attribute path, operator and whether it applies to size().
+
+        'time__gte' -> ('time', 'gte', False)
+        'data__address__zip__eq' -> ('data.address.zip', 'eq', False)
+        'data.address.zip' -> ('data.address.zip', 'eq', False)
+        'tags__size__gt' -> ('tags', 'gt', True)
+
+    Raises ValidationError if an argument with __ does not end with an operator or size, e.g. 'time__gtee':
+    a misspelled operator must not silently become a nested attribute.
+    """
+    parts = argument.split('__')
+    op = 'eq'
+    if len(parts) > 1 and parts[-1] in OPERATORS:
+        op = parts.pop()
+        op = _ALIASES.get(op, op)
+    elif len(parts) > 1 and parts[-1] != 'size':
+        raise ValidationError('Unknown operator %s in %s (nested attributes need an explicit operator, '
+                              'e.g. data__zip__eq)' % (parts[-1], argument))
+    size = False
+    if len(parts) > 1 and parts[-1] == 'size':
+        parts.pop()
+        size = True
+    return '.'.join(parts), op, size
+
+
+def _bindable(value):
+    if isinstance(value, bool):  # Starting boto3, conversion from True to Decimal('1') is not automatic.
+        return int(value)
+    return value
+
+
+def build_condition(condition_class, conditions):
+    """
+    Build a boto3 condition from query_table style arguments, ANDed together.
+
+    :param condition_class: boto3.dynamodb.conditions Key (key conditions) or Attr (filters)
+    :param conditions: dictionary, e.g. dict(attribute__gte=123), see the module docstring
+    :return: boto3 condition, or None if conditions is empty
+    """
+    built = [_build_one(condition_class, argument, value) for argument, value in conditions.items()]
+    if not built:
+        return None
+    return reduce(operator.and_, built)
+
+
+def _build_one(condition_class, argument, value):
+    path, op, size = split_argument(argument)
+    if condition_class is Key and '.' in path:
+        raise ValidationError('Unknown operator, or nested key attribute: %s' % argument)
+    attribute = condition_class(path)
+    if size:
+        if not hasattr(attribute, 'size'):
+            raise ValidationError('%s: size() is only supported in filters' % argument)
+        attribute = attribute.size()
+    if not hasattr(attribute, op):
+        raise ValidationError('%s: %s is not supported here' % (argument, op))
+
+    if op in _NEGATED:
+        if not value:
+            op = _NEGATED[op]
+        return getattr(attribute, op)()
+    if op == 'between':
+        low, high = value
+        return attribute.between(_bindable(low), _bindable(high))
+    if op == 'is_in':
+        return attribute.is_in([_bindable(item) for item in value])
+    return getattr(attribute, op)(_bindable(value))
+
+
+class Q(object):
+    """
+    Filter conditions, from the same keyword arguments as filter_expression, that combine with
+    & (AND), | (OR) and ~ (NOT). Also combines with boto3 conditions.
+
+        Q(is_active=True) | Q(role__is_in=['admin', 'owner'])
+    """
+
+    def __init__(self, **conditions):
+        self.condition = build_condition(Attr, conditions)
+
+    @classmethod
+    def _from_condition(cls, condition):
+        q = cls()
+        q.condition = condition
+        return q
+
+    def _combine(self, other, combine):
+        other = filter_condition(other)
+        if self.condition is None:
+            return self._from_condition(other)
+        if other is None:
+            return self._from_condition(self.condition)
+        return self._from_condition(combine(self.condition, other))
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __invert__(self):
+        if self.condition is None:
+            raise ValueError('Cannot negate an empty Q()')
+        return self._from_condition(~self.condition)
+
+    def __repr__(self):
+        return 'Q(%r)' % (self.condition,)
+
+
+def filter_condition(filter_expression):
+    """
+    The boto3 condition for a filter_expression argument, or None if it is empty.
+
+    :param filter_expression: dictionary of query_table style arguments, Q, or boto3 condition
+    """
+    if isinstance(filter_expression, Q):
+        return filter_expression.condition
+    if isinstance(filter_expression, ConditionBase):
+        return filter_expression
+    if not filter_expression:
+        return None
+    if isinstance(filter_expression, dict):
+        return build_condition(Attr, filter_expression)
+    raise ValidationError('filter_expression must be a dict, Q or boto3 condition, got %r' % (filter_expression,))
@@ -1,16 +1,25 @@
-import copy
+import hashlib
 import json
 import os
+import tempfile
 
 from munch import Munch
 import redis
+from six.moves import cPickle as pickle
 import yaml
 
 from .exceptions import ConfigurationError
+from .registry import TableRegistry
 
 
 CONFIG_CACHE_KEY = 'cc_dynamodb3_yaml_config_cache'
 
+# Version of the compiled config pickle, see load_compiled_config.
+COMPILED_CONFIG_VERSION = 1
+
+# Fastest safe YAML loader available: the C one needs PyYAML built with libyaml.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 _config_file_path = None
 # Cache to avoid parsing YAML file repeatedly.
 _cached_config = None
@@ -20,6 +29,120 @@ _cached_config = None
 _redis_config = dict()
 
 
+class FrozenDict(dict):
+    """A read-only dict. Shared by reference, so it must never be mutated."""
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('%s is read-only, use get_config().thaw() for a mutable copy' %
+                        self.__class__.__name__)
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class FrozenList(list):
+    """A read-only list, compares equal to a plain list with the same items."""
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('%s is read-only, use get_config().thaw() for a mutable copy' %
+                        self.__class__.__name__)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = reverse = sort = clear = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(value):
+    """Recursively convert dicts and lists to their read-only counterparts."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Recursively convert read-only containers back to plain, mutable ones."""
+    if isinstance(value, dict):
+        return dict((key, thaw(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return set(value)
+    return value
+
+
+class ConfigSnapshot(Munch):
+    """
+    Immutable configuration, as returned by get_config().
+
+    Built once per set_config() and returned by reference, so reading it is free.
+    Besides the settings passed to set_config(), it holds precomputed lookups:
+
+    * table_names: frozenset of unprefixed table names from the YAML schemas
+    * namespaced_table_names: frozenset of the same names, prefixed by namespace
+    * table_metadata: KeySchema, AttributeDefinitions and indexes per table, see table.compile_table_metadata
+    * tables: TableRegistry of the table schemas and indexes, see cc_dynamodb3.registry
+    """
+
+    def __init__(self, settings):
+        yaml_config = settings.get('yaml') or dict()
+        table_names = frozenset(yaml_config.get('schemas') or ())
+        namespace = settings.get('namespace') or ''
+        yaml_config = freeze(yaml_config)
+        dict.__init__(self, dict(
+            settings,
+            yaml=yaml_config,
+            tables=TableRegistry(yaml_config),
+            table_metadata=freeze(settings.get('table_metadata') or dict()),
+            table_names=table_names,
+            namespaced_table_names=frozenset(namespace + name for name in table_names),
+        ))
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('Config is read-only, use get_config().thaw() for a mutable copy')
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def thaw(self):
+        """
+        Return a mutable deep copy, as a plain Munch (what get_config() used to return).
+
+        table_metadata and tables are left out: they are recomputed from the copy's yaml, which may be edited.
+        """
+        thawed = Munch(thaw(dict(self)))
+        del thawed['table_metadata']
+        del thawed['tables']
+        return thawed
+
+
 def set_redis_config(redis_config):
     global _redis_config
     redis_config.setdefault('cache_seconds', 60)
@@ -46,26 +169,105 @@ def get_redis_cache():
 _redis_cache = get_redis_cache()
 
 
-def load_yaml_config():
-    global _config_file_path
+def _read_config_file():
+    with open(_config_file_path, 'rb') as config_file:
+        return config_file.read()
+
+
+def _redis_config_key(content_hash):
+    return '%s:%s' % (CONFIG_CACHE_KEY, content_hash)
+
+
+def load_yaml_config(source=None):
+    """
+    Parse the YAML config file, through the Redis cache when configured.
+
+    The Redis entry is keyed by the hash of the file's content, so a changed file is never
+    served an old config.
+
+    :param source: (bytes, optional) content of the file, when already read
+    """
+    if source is None:
+        source = _read_config_file()
 
     redis_cache = get_redis_cache()
     if redis_cache:
-        yaml_config = redis_cache.get(CONFIG_CACHE_KEY)
+        redis_key = _redis_config_key(hashlib.sha1(source).hexdigest())
+        yaml_config = redis_cache.get(redis_key)
         if yaml_config:
             return json.loads(yaml_config)
 
-    with open(_config_file_path) as config_file:
-        yaml_config = yaml.load(config_file)
-        if redis_cache:
-            redis_config = get_redis_config()
-            redis_cache.setex(CONFIG_CACHE_KEY, redis_config['cache_seconds'], json.dumps(yaml_config))
+    yaml_config = yaml.load(source, Loader=YAML_LOADER)
+    if redis_cache:
+        redis_config = get_redis_config()
+        redis_cache.setex(redis_key, redis_config['cache_seconds'], json.dumps(yaml_config))
 
     return yaml_config
 
 
+def load_compiled_config(compiled_config_path=None):
+    """
+    Return dict(yaml=parsed YAML config, table_metadata=see table.compile_table_metadata).
+
+    The YAML file always decides: the compiled pickle and the Redis cache are only caches of its content,
+    keyed by its hash. In order: the pickle at compiled_config_path if its hash matches, then
+    load_yaml_config (Redis, then parsing). With compiled_config_path, a new pickle is then written, so
+    later calls only read the file, hash it and unpickle.
+    The pickle is trusted like the YAML file: keep it in a directory only the application can write to.
+
+    :param compiled_config_path: (string, optional) where to keep the pickle. None: no pickle
+    """
+    from .table import compile_table_metadata  # avoid circular import
+
+    source = _read_config_file()
+    content_hash = hashlib.sha1(source).hexdigest()
+
+    if compiled_config_path:
+        compiled = _read_compiled_config(compiled_config_path)
+        if compiled and compiled.get('content_hash') == content_hash:
+            return compiled
+
+    yaml_config = load_yaml_config(source)
+    compiled = dict(
+        version=COMPILED_CONFIG_VERSION,
+        content_hash=content_hash,
+        yaml=yaml_config,
+        table_metadata=compile_table_metadata(yaml_config or dict()),
+    )
+    if compiled_config_path:
+        _write_compiled_config(compiled_config_path, compiled)
+    return compiled
+
+
+def _read_compiled_config(compiled_config_path):
+    try:
+        with open(compiled_config_path, 'rb') as compiled_file:
+            compiled = pickle.load(compiled_file)
+    except Exception:  # missing, truncated, or written by another Python version
+        return None
+    if not isinstance(compiled, dict) or compiled.get('version') != COMPILED_CONFIG_VERSION:
+        return None
+    return compiled
+
+
+def _write_compiled_config(compiled_config_path, compiled):
+    """Write atomically, so concurrent readers see the old or the new pickle, never part of one."""
+    from .log import logger  # avoid circular import
+
+    directory = os.path.dirname(os.path.abspath(compiled_config_path))
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.cc_dynamodb3_config')
+        with os.fdopen(fd, 'wb') as temp_file:
+            pickle.dump(compiled, temp_file, pickle.HIGHEST_PROTOCOL)
+        getattr(os, 'replace', os.rename)(temp_path, compiled_config_path)
+    except (IOError, OSError) as e:
+        logger.warning('Could not write the compiled config %s: %s', compiled_config_path, e)
+
+
 def set_config(config_file_path, namespace=None, aws_access_key_id=False, aws_secret_access_key=False,
-               host=None, port=None, is_secure=None, log_extra_callback=None):
+               host=None, port=None, is_secure=None, log_extra_callback=None,
+               max_pool_connections=None, connect_timeout=None, read_timeout=None, tcp_keepalive=None,
+               retry_mode=None, per_thread_connections=None, compiled_config_path=None):
     """
     Set configuration. This is needed only once, globally, per-thread.
 
@@ -77,6 +279,16 @@ def set_config(config_file_path, namespace=None, aws_access_key_id=False, aws_se
     :param port: Port for DynamoDB (useful when running DynamoDB local)
     :param is_secure: boolean, useful when running DynamoDB local
     :param log_extra_callback: callback function to grab extra data for a log call
+    :param max_pool_connections: (optional) HTTP connections kept per client (botocore default: 10).
+                                 Set it to at least the number of threads sharing the connection
+    :param connect_timeout: (optional) seconds, botocore default: 60
+    :param read_timeout: (optional) seconds, botocore default: 60
+    :param tcp_keepalive: (optional) boolean, enable TCP keepalive (needs botocore >= 1.27.84)
+    :param retry_mode: (optional) botocore retry mode: 'legacy' (default), 'standard' or 'adaptive'
+    :param per_thread_connections: (optional) boolean, one session, client and resource per thread
+                                   instead of one shared by all threads
+    :param compiled_config_path: (optional) file to keep the compiled config in, see load_compiled_config.
+                                 Default: None, parse the YAML every time
     """
     from .log import logger  # avoid circular import
 
@@ -84,10 +296,11 @@ def set_config(config_file_path, namespace=None, aws_access_key_id=False, aws_se
     global _config_file_path
     _config_file_path = config_file_path
 
-    yaml_config = load_yaml_config()
+    compiled = load_compiled_config(compiled_config_path)
 
-    _cached_config = Munch({
-        'yaml': yaml_config,
+    config = Munch({
+        'yaml': compiled['yaml'],
+        'table_metadata': compiled['table_metadata'],
         'namespace': namespace
                         or os.environ.get('CC_DYNAMODB_NAMESPACE'),
         'aws_access_key_id': aws_access_key_id if aws_access_key_id != False
@@ -98,9 +311,22 @@ def set_config(config_file_path, namespace=None, aws_access_key_id=False, aws_se
         'port': port or os.environ.get('CC_DYNAMODB_PORT'),
         'is_secure': is_secure or os.environ.get('CC_DYNAMODB_IS_SECURE'),
         'log_extra_callback': log_extra_callback,
+        'max_pool_connections': max_pool_connections or os.environ.get('CC_DYNAMODB_MAX_POOL_CONNECTIONS'),
+        'connect_timeout': connect_timeout if connect_timeout is not None
+                              else os.environ.get('CC_DYNAMODB_CONNECT_TIMEOUT'),
+        'read_timeout': read_timeout if read_timeout is not None
+                           else os.environ.get('CC_DYNAMODB_READ_TIMEOUT'),
+        'tcp_keepalive': tcp_keepalive if tcp_keepalive is not None
+                            else _env_flag('CC_DYNAMODB_TCP_KEEPALIVE'),
+        'retry_mode': retry_mode or os.environ.get('CC_DYNAMODB_RETRY_MODE'),
+        'per_thread_connections': per_thread_connections if per_thread_connections is not None
+                                     else _env_flag('CC_DYNAMODB_PER_THREAD_CONNECTIONS'),
     })
 
-    _validate_config()
+    _validate_config(config)
+    previous_config = _cached_config
+    _cached_config = ConfigSnapshot(config)
+    _clear_caches_if_changed(previous_config, _cached_config)
 
     extra = dict(status='config loaded', namespace=_cached_config.namespace)
     if log_extra_callback:
@@ -109,36 +335,91 @@ def set_config(config_file_path, namespace=None, aws_access_key_id=False, aws_se
     logger.info('set_config', extra=extra)
 
 
-def _validate_config():
-    from .log import logger  # avoid circular import
+def _env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
 
-    global _cached_config
 
-    if not _cached_config.namespace:
+# Settings that determine which endpoint cached connections point to, and how.
+_CONNECTION_SETTINGS = ('aws_access_key_id', 'aws_secret_access_key', 'host', 'port', 'is_secure',
+                        'max_pool_connections', 'connect_timeout', 'read_timeout', 'tcp_keepalive',
+                        'retry_mode', 'per_thread_connections')
+
+RETRY_MODES = ('legacy', 'standard', 'adaptive')
+
+
+def _clear_caches_if_changed(previous_config, config):
+    """Drop cached connections and Table handles when they no longer match the config."""
+    from .connection import clear_connection_cache  # avoid circular import
+    from .table import clear_table_cache  # avoid circular import
+
+    if previous_config is None:
+        return
+    if any(previous_config.get(key) != config.get(key) for key in _CONNECTION_SETTINGS):
+        clear_connection_cache()
+        clear_table_cache()
+    elif previous_config.namespace != config.namespace:
+        clear_table_cache()
+
+
+def _validate_config(config):
+    from .log import logger  # avoid circular import
+
+    if not config.namespace:
         msg = 'Missing namespace kwarg OR environment variable CC_DYNAMODB_NAMESPACE'
         logger.error('ConfigurationError: ' + msg)
         raise ConfigurationError(msg)
-    if _cached_config.aws_access_key_id is False:
+    if config.aws_access_key_id is False:
         # TODO: Is this really necessary? In the case of IAM authentication, no access key wanted
         msg = 'Missing aws_access_key_id kwarg OR environment variable CC_DYNAMODB_ACCESS_KEY_ID'
         logger.error('ConfigurationError: ' + msg)
         raise ConfigurationError(msg)
-    if _cached_config.aws_secret_access_key is False:
+    if config.aws_secret_access_key is False:
         # TODO: Is this really necessary? In the case of IAM authentication, no secret key wanted
         msg = 'Missing aws_secret_access_key kwarg OR environment variable CC_DYNAMODB_SECRET_ACCESS_KEY'
         logger.error('ConfigurationError: ' + msg)
         raise ConfigurationError(msg)
-    if _cached_config.port:
+    if config.port:
         try:
-            _cached_config.port = int(_cached_config.port)
+            config.port = int(config.port)
         except ValueError:
             msg = ('Integer value expected for port '
-                   'OR environment variable CC_DYNAMODB_PORT. Got %s' % _cached_config.port)
+                   'OR environment variable CC_DYNAMODB_PORT. Got %s' % config.port)
+            logger.error('ConfigurationError: ' + msg)
+            raise ConfigurationError(msg)
+    if config.max_pool_connections:
+        try:
+            config.max_pool_connections = int(config.max_pool_connections)
+        except ValueError:
+            msg = ('Integer value expected for max_pool_connections '
+                   'OR environment variable CC_DYNAMODB_MAX_POOL_CONNECTIONS. Got %s' % config.max_pool_connections)
             logger.error('ConfigurationError: ' + msg)
             raise ConfigurationError(msg)
+    for timeout_name in ('connect_timeout', 'read_timeout'):
+        if config[timeout_name] is not None:
+            try:
+                config[timeout_name] = float(config[timeout_name])
+            except ValueError:
+                msg = ('Number of seconds expected for %s OR environment variable CC_DYNAMODB_%s. Got %s' %
+                       (timeout_name, timeout_name.upper(), config[timeout_name]))
+                logger.error('ConfigurationError: ' + msg)
+                raise ConfigurationError(msg)
+    if config.retry_mode and config.retry_mode not in RETRY_MODES:
+        msg = ('retry_mode must be one of %s OR environment variable CC_DYNAMODB_RETRY_MODE. Got %s' %
+               (', '.join(RETRY_MODES), config.retry_mode))
+        logger.error('ConfigurationError: ' + msg)
+        raise ConfigurationError(msg)
+    if config.tcp_keepalive:
+        from .connection import SUPPORTS_TCP_KEEPALIVE  # avoid circular import
+        if not SUPPORTS_TCP_KEEPALIVE:
+            logger.warning('tcp_keepalive ignored: it needs botocore >= 1.27.84')
 
 
 def get_config(**kwargs):
+    """
+    Return the current configuration as a read-only ConfigSnapshot.
+
+    The snapshot is shared, not copied: call .thaw() on it if you need to modify it.
+    """
     global _cached_config
 
     if not _cached_config:
@@ -150,4 +431,4 @@ def get_config(**kwargs):
         # be invoked before calling get_config().
         set_config(**kwargs)
 
-    return Munch(copy.deepcopy(_cached_config.toDict()))
+    return _cached_config
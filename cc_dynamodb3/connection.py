@@ -1,25 +1,59 @@
 import os
+import threading
+
 from boto3.session import Session
+from botocore.config import Config
 
 from .config import get_config
 
 
 _cached_client = None
 _cached_resource = None
+_connection_lock = threading.Lock()
 
+# With per_thread_connections, each thread keeps its own session, client and resource here.
+# Entries from before the last clear_connection_cache() are ignored: see _generation.
+_thread_connections = threading.local()
+_generation = 0
 
-def get_connection(as_resource=True, use_cache=True):
-    """Returns a DynamoDBConnection even if credentials are invalid."""
+# botocore added tcp_keepalive in 1.27.84
+SUPPORTS_TCP_KEEPALIVE = 'tcp_keepalive' in Config.OPTION_DEFAULTS
+
+
+def clear_connection_cache():
+    """Forget the cached client and resource, e.g. after the endpoint or credentials change."""
     global _cached_client
     global _cached_resource
+    global _generation
+
+    with _connection_lock:
+        _cached_client = None
+        _cached_resource = None
+        _generation += 1
 
-    if use_cache:
-        if as_resource and _cached_resource:
-            return _cached_resource
 
-        if not as_resource and _cached_client:
-            return _cached_client
+def get_client_config(config=None):
+    """
+    Returns the botocore Config for the connection settings passed to set_config(), or None for the defaults.
 
+    :param config: (optional) configuration, defaults to get_config()
+    """
+    config = config or get_config()
+    options = dict()
+    if config.get('max_pool_connections'):
+        options['max_pool_connections'] = config.max_pool_connections
+    if config.get('connect_timeout') is not None:
+        options['connect_timeout'] = config.connect_timeout
+    if config.get('read_timeout') is not None:
+        options['read_timeout'] = config.read_timeout
+    if config.get('tcp_keepalive') and SUPPORTS_TCP_KEEPALIVE:
+        options['tcp_keepalive'] = True
+    if config.get('retry_mode'):
+        options['retries'] = dict(mode=config.retry_mode)
+    return Config(**options) if options else None
+
+
+def _create_connection(as_resource):
     config = get_config()
 
     session = Session(
@@ -28,28 +62,57 @@ def get_connection(as_resource=True, use_cache=True):
         region_name=os.environ.get('CC_AWS_REGION', 'us-west-2'),
     )
 
+    kwargs = dict(verify=False, config=get_client_config(config))
     if config.host:
-        endpoint_url = '%s://%s:%s' % (
+        kwargs['endpoint_url'] = '%s://%s:%s' % (
             'https' if config.is_secure else 'http',  # Host where DynamoDB Local resides
             config.host,                              # DynamoDB Local port (8000 is the default)
             config.port,                              # For DynamoDB Local, disable secure connections
         )
 
-        if not as_resource:
-            _cached_client = session.client('dynamodb',
-                                            endpoint_url=endpoint_url,
-                                            verify=False)
-            return _cached_client
-        _cached_resource = session.resource('dynamodb',
-                                            endpoint_url=endpoint_url,
-                                            verify=False)
-        return _cached_resource
-
-    if not as_resource:
-        _cached_client = session.client('dynamodb',
-                                        verify=False)
-        return _cached_client
+    if as_resource:
+        return session.resource('dynamodb', **kwargs)
+    return session.client('dynamodb', **kwargs)
+
+
+def _get_thread_connection(as_resource):
+    """Return this thread's client or resource, created on first use. Sessions are not thread safe."""
+    connections = _thread_connections.__dict__
+    if connections.get('generation') != _generation:
+        connections.clear()
+        connections['generation'] = _generation
+    name = 'resource' if as_resource else 'client'
+    if connections.get(name) is None:
+        connections[name] = _create_connection(as_resource)
+    return connections[name]
 
-    _cached_resource = session.resource('dynamodb',
-                                        verify=False)
-    return _cached_resource
+
+def get_connection(as_resource=True, use_cache=True):
+    """
+    Returns a DynamoDBConnection even if credentials are invalid.
+
+    The client and the resource are created once and shared by all threads, or created once per thread
+    with set_config(per_thread_connections=True). Size max_pool_connections to the number of threads
+    sharing a connection.
+    """
+    global _cached_client
+    global _cached_resource
+
+    if not use_cache:
+        return _create_connection(as_resource)
+
+    if get_config().get('per_thread_connections'):
+        return _get_thread_connection(as_resource)
+
+    connection = _cached_resource if as_resource else _cached_client
+    if connection:
+        return connection
+
+    with _connection_lock:
+        if as_resource:
+            if not _cached_resource:
+                _cached_resource = _create_connection(as_resource)
+            return _cached_resource
+        if not _cached_client:
+            _cached_client = _create_connection(as_resource)
+        return _cached_client
@@ -32,3 +32,34 @@ class MissingTableNameException(Exception):
 
 class PrimaryKeyUpdateException(Exception):
     pass
+
+
+class PartialModelException(Exception):
+    """Raised when saving a model loaded with attributes=[...] would write fields it did not load."""
+    pass
+
+
+class VersionConflictException(Exception):
+    """Raised when a model with a VERSION_FIELD was changed, or created, by another writer since it was loaded."""
+    pass
+
+
+class TransactionCanceledException(Exception):
+    """Raised when DynamoDB cancels a transaction. reasons has the cancellation code of each action, e.g. 'NONE'."""
+    def __init__(self, message, reasons):
+        super(TransactionCanceledException, self).__init__(message)
+        self.reasons = reasons
+
+
+class BatchRetriesExceededException(Exception):
+    """Raised when a batch request still has unprocessed keys or items after all retries."""
+    def __init__(self, message, unprocessed):
+        super(BatchRetriesExceededException, self).__init__(message)
+        self.unprocessed = unprocessed
+
+
+class QueryManyException(Exception):
+    """Raised by query_many once all queries are done, if any failed. errors maps query index to exception."""
+    def __init__(self, message, errors):
+        super(QueryManyException, self).__init__(message)
+        self.errors = errors
@@ -15,20 +15,39 @@ def create_logger(namespace=None):
 logger = create_logger()
 
 
+def _resolve_level(logging_level):
+    if isinstance(logging_level, six.string_types):
+        try:
+            return getattr(logging, logging_level.upper())
+        except AttributeError:
+            return logging.ERROR
+    return logging_level
+
+
+def log_enabled(logging_level):
+    """Return whether log_data() would log at logging_level. Use it to skip work only needed for logging."""
+    return logger.isEnabledFor(_resolve_level(logging_level))
+
+
 def log_data(message, logging_level=logging.DEBUG, exc_info=True, extra=None):
     """
     Central place to log, with callback configuration support.
 
-    :param message: logging message
+    Does nothing, not even calling log_extra_callback, if the logger is not enabled for logging_level.
+    Pass callables as message or extra to only build them when they are logged.
+
+    :param message: logging message, or a callable returning it
     :param logging_level: logging level
     :param exc_info: include exception info
-    :param extra: extra data, useful for e.g. sentry
+    :param extra: extra data, useful for e.g. sentry, or a callable returning it
     """
-    if isinstance(logging_level, six.string_types):
-        try:
-            logging_level = getattr(logging, logging_level.upper())
-        except AttributeError:
-            logging_level = logging.ERROR
+    logging_level = _resolve_level(logging_level)
+    if not logger.isEnabledFor(logging_level):
+        return
+    if callable(message):
+        message = message()
+    if callable(extra):
+        extra = extra()
     config = get_config()
 
     extra = extra or dict()
@@ -37,4 +56,3 @@ def log_data(message, logging_level=logging.DEBUG, exc_info=True, extra=None):
         extra.update(config.log_extra_callback())
 
     logger.log(logging_level, message, exc_info=exc_info, extra=extra)
-
@@ -1,38 +1,145 @@
 import six
 import calendar
+import collections
 import copy
 import datetime
 import decimal
+from functools import partial
 import json
 import types
 import uuid
 
-from schematics.models import Model
+from schematics.models import FieldDescriptor, Model
 from schematics import types as fields
+from schematics.exceptions import ConversionError
 
 from botocore.exceptions import ClientError
 
-from . import exceptions
+from . import client_engine, exceptions
+from . import table as resource_engine
+from .cache import MEMORY_CACHE, get_item_cache, item_cache_key
+from .cc_types import SetType
+from .client_engine import CLIENT_ENGINE, RESOURCE_ENGINE
 from .config import get_config
-from .log import log_data
-from .table import get_table, query_table, query_all_in_table, scan_all_in_table
-
-
-class DynamoDBModel(Model):
+from .registry import table_registry
+from .log import log_data, log_enabled
+from .session import get_session
+from .table import (
+    batch_get_from_table,
+    batch_write_to_table,
+    decode_lek,
+    encode_lek,
+    get_table,
+    next_page_limit,
+    projection_kwargs,
+)
+
+try:
+    from .aio import AsyncModelMixin
+except SyntaxError:  # Python 2: no asyncio API
+    class AsyncModelMixin(object):
+        pass
+
+
+class DynamoDBModel(AsyncModelMixin, Model):
     TABLE_NAME = None  # This is required for subclasses.
     FIELDS_SAFE_TO_OVERWRITE = []
+    _loaded_fields = None  # frozenset of fields for models loaded with attributes=[...], see from_row
+    # Reads (get, query, paginated_query, all) go through the boto3 resource, or with CLIENT_ENGINE
+    # through the low-level client, decoding wire format items in one pass. See cc_dynamodb3.client_engine
+    ENGINE = RESOURCE_ENGINE
+    # Seconds to cache get() results, None to disable. See cc_dynamodb3.cache
+    CACHE_TTL = None
+    CACHE_MAX_SIZE = 1000  # LRU bound of the memory cache, in items per table
+    CACHE_BACKEND = MEMORY_CACHE  # or REDIS_CACHE, shared through get_redis_cache()
+    # Numeric fields saved as ADD <difference>, so that concurrent increments all count.
+    COUNTER_FIELDS = []
+    # ReturnValues of save(). Only 'ALL_OLD' returns enough to check for overwrites, see log_if_unsafe_save.
+    # 'UPDATED_OLD' or 'NONE' make writes cheaper. None: 'ALL_OLD', or 'NONE' for models with a VERSION_FIELD.
+    RETURN_VALUES = None
+    # Integer field for optimistic locking: save() and update() increment it, and only write if the stored
+    # item still has the version last loaded, raising VersionConflictException otherwise.
+    VERSION_FIELD = None
 
     @classmethod
-    def from_row(cls, row, metadata=None):
+    def from_row(cls, row, metadata=None, loaded_fields=None):
         """Take a row from the DB and return an instantiated object with all of
         the attributes populated from the row's data.
 
         :param row: A dictionary representing dynamodb data
         :param metadata: (optional) A dictionary representing metadata associated with the DynamoDB request
+        :param loaded_fields: (optional) set of the fields fetched, if the row is the result of a projection.
+                              Such partial models can only save changes to those fields, see save()
         :returns: An instantiated subclass of ``DynamoDBModel``
 
         """
-        return cls(row, metadata=metadata)
+        return cls(row, metadata=metadata, loaded_fields=loaded_fields)
+
+    @classmethod
+    def from_row_readonly(cls, row, metadata=None):
+        """Like from_row, but return a lightweight ReadOnlyRow instead of a model instance."""
+        row_class = cls.__dict__.get('_readonly_row_class')
+        if row_class is None:
+            row_class = type(str('%sReadOnlyRow' % cls.__name__), (ReadOnlyRow,), dict(
+                __slots__=(),
+                _model_class=cls,
+                _decoders=cls._field_codecs().native_decoders,
+            ))
+            setattr(cls, '_readonly_row_class', row_class)
+        return row_class(row, metadata)
+
+    @classmethod
+    def from_wire(cls, wire_item, metadata=None, loaded_fields=None):
+        """Like from_row, for an item in DynamoDB wire format, e.g. {'name': {'S': 'abc'}}."""
+        row, model_data = cls._field_codecs().decode_wire(wire_item)
+        return cls(row, metadata=metadata, loaded_fields=loaded_fields, model_data=model_data)
+
+    @classmethod
+    def from_wire_readonly(cls, wire_item, metadata=None):
+        return cls.from_row_readonly(client_engine.deserialize_item(wire_item), metadata)
+
+    @classmethod
+    def _row_factory(cls, readonly, loaded_fields=None, wire=None):
+        """:param wire: rows are in the client's wire format, default: if ENGINE is CLIENT_ENGINE"""
+        if wire is None:
+            wire = cls.ENGINE == CLIENT_ENGINE
+        if readonly:
+            return cls.from_wire_readonly if wire else cls.from_row_readonly
+        from_row = cls.from_wire if wire else cls.from_row
+        if loaded_fields is not None:
+            return partial(from_row, loaded_fields=loaded_fields)
+        return from_row
+
+    @classmethod
+    def _engine(cls):
+        """Return (module, table argument) implementing query_table, query_all_in_table and scan_all_in_table."""
+        if cls.ENGINE == CLIENT_ENGINE:
+            return client_engine, cls.TABLE_NAME
+        return resource_engine, cls.table()
+
+    @classmethod
+    def _projection(cls, attributes):
+        """
+        Return (projected attributes, loaded fields) for attributes=[...].
+
+        The primary key is always fetched so the resulting models can be saved or reloaded.
+        Only attributes fetched whole count as loaded: 'address.city' does not load 'address'.
+        """
+        if attributes is None:
+            return None, None
+        key_names = list(cls._table_schema().key_names)
+        projected = key_names + [name for name in attributes if name not in key_names]
+        loaded_fields = frozenset(name for name in projected if '.' not in name)
+        return projected, loaded_fields
+
+    @classmethod
+    def _field_codecs(cls):
+        """Return this class's FieldCodecs, built on first use."""
+        codecs = cls.__dict__.get('_codecs')
+        if codecs is None:
+            codecs = FieldCodecs(cls)
+            setattr(cls, '_codecs', codecs)
+        return codecs
 
     @classmethod
     def _value_to_dynamodb(cls, key, value):
@@ -43,30 +150,15 @@ class DynamoDBModel(Model):
         :param value: field value
         :return: dynamodb-friendly value
         """
-        if isinstance(getattr(cls, key), (fields.DateTimeType,
-                                          fields.DateType)):
-            if not value:
-                return 0
-
-            value = getattr(cls, key).to_native(value)
-            return decimal.Decimal(int(calendar.timegm(value.timetuple())))
-
-        if isinstance(getattr(cls, key), fields.UUIDType) and value:
-            return getattr(cls, key).to_primitive(value)
-
-        if isinstance(getattr(cls, key), fields.BooleanType):
-            return decimal.Decimal('1') if value else decimal.Decimal('0')
-
-        if value == '':  # Empty AttributeValue is an error in DynamoDB
-            return None
-        return value
+        return cls._field_codecs().type_encoders.get(key, _encode_default)(value)
 
     @classmethod
     def _key_value_to_dynamodb(cls, obj, key, value):
         # DynamoDB doesn't treat None as e.g. strings or numbers, so we don't
         # set those values.
-        if cls._fields.get(key, None) is not None:
-            obj[key] = cls._value_to_dynamodb(key, value)
+        encode = cls._field_codecs().encoders.get(key)
+        if encode is not None:
+            obj[key] = encode(value)
 
     @classmethod
     def table(cls):
@@ -81,47 +173,341 @@ class DynamoDBModel(Model):
         return get_table(cls.TABLE_NAME)
 
     @classmethod
-    def get(cls, consistent_read=False, **kwargs):
+    def get(cls, consistent_read=False, readonly=False, attributes=None, **kwargs):
         """
         Retrieve a DynamoDB item via GetItem.
 
+        With CACHE_TTL set, items are served from the item cache unless consistent_read or attributes is passed.
+        Within a Session, returns the instance already loaded for this primary key, see cc_dynamodb3.session.
+
+        :param readonly: return a ReadOnlyRow instead of a model instance
+        :param attributes: (list, optional) only fetch these fields (plus the primary key)
         :param kwargs: primary key fields.
         :return: instance of this model
         """
-        table_keys = [key['name'] for key in cls.get_schema()]
+        cls._validate_primary_key(kwargs)
+
+        session = None if readonly or attributes is not None else get_session()
+        if session is None:
+            return cls._get_item(kwargs, consistent_read, readonly, attributes)
+        model = session.lookup(cls, kwargs)
+        if model is None:
+            model = session.add(cls._get_item(kwargs, consistent_read, readonly, attributes))
+        return model
 
-        if set(kwargs.keys()) != set(table_keys):
-            raise exceptions.ValidationError('Invalid get kwargs: %s, expecting: %s' %
-                                             (', '.join(kwargs.keys()), ', '.join(table_keys)))
+    @classmethod
+    def _get_item(cls, key, consistent_read, readonly, attributes):
+        projected, loaded_fields = cls._projection(attributes)
+        item_cache, cache_key, model = cls._get_cached_item(key, consistent_read, readonly, projected)
+        if model is not None:
+            return model
+
+        if cls.ENGINE == CLIENT_ENGINE:
+            response = client_engine.get_item(cls.TABLE_NAME, key, consistent_read=consistent_read,
+                                              attributes=projected)
+        else:
+            get_item_kwargs = dict(Key=key, ConsistentRead=consistent_read)
+            if projected:
+                get_item_kwargs.update(projection_kwargs(projected))
+            response = cls.table().get_item(**get_item_kwargs)
+        return cls._from_get_item_response(response, key, readonly, loaded_fields, item_cache, cache_key,
+                                           wire=cls.ENGINE == CLIENT_ENGINE)
 
-        response = cls.table().get_item(Key=kwargs,
-                                        ConsistentRead=consistent_read)
+    @classmethod
+    def _get_cached_item(cls, key, consistent_read, readonly, projected):
+        """Return (item cache or None, cache key, model from the item cache or None) for get()."""
+        item_cache = None if projected else cls.item_cache()
+        if item_cache is None:
+            return None, None, None
+        cache_key = item_cache_key(cls.TABLE_NAME, key)
+        row = None if consistent_read else item_cache.get(cache_key)
+        if row is None:
+            return item_cache, cache_key, None
+        return item_cache, cache_key, cls._row_factory(readonly, wire=False)(row, dict())
+
+    @classmethod
+    def _from_get_item_response(cls, response, key, readonly, loaded_fields, item_cache, cache_key, wire):
+        """The model of a GetItem response, also stored in item_cache if not None. Raises NotFound."""
         if not response or 'Item' not in response:
-            raise exceptions.NotFound('Item not found with kwargs: %s' % kwargs)
+            raise exceptions.NotFound('Item not found with kwargs: %s' % key)
 
         row = response['Item']
         metadata = response.get('ResponseMetadata', {})
-        return cls.from_row(row, metadata)
+        if item_cache is not None:
+            if wire:  # Rows are cached as the resource returns them.
+                row = client_engine.deserialize_item(row)
+                wire = False
+            item_cache.set(cache_key, row, cls.CACHE_TTL)
+        return cls._row_factory(readonly, loaded_fields, wire=wire)(row, metadata)
+
+    @classmethod
+    def item_cache(cls):
+        """Return the ItemCache used by get(), or None if CACHE_TTL is not set."""
+        return get_item_cache(cls)
+
+    @classmethod
+    def cache_stats(cls):
+        """Return the item cache counters (hits, misses, ...), or None if CACHE_TTL is not set."""
+        item_cache = cls.item_cache()
+        return item_cache.stats() if item_cache is not None else None
+
+    @classmethod
+    def _validate_primary_key(cls, key):
+        table_keys = list(cls._table_schema().key_names)
+
+        if set(key.keys()) != set(table_keys):
+            raise exceptions.ValidationError('Invalid get kwargs: %s, expecting: %s' %
+                                             (', '.join(key.keys()), ', '.join(table_keys)))
+        return table_keys
+
+    @classmethod
+    def batch_get(cls, keys, consistent_read=False, preserve_order=False):
+        """
+        Retrieve many DynamoDB items via BatchGetItem, 100 keys per request.
+
+        Duplicate keys are fetched once. Keys that are not found are skipped.
+
+        :param keys: iterable of primary key dictionaries, as passed to cls.get
+        :param consistent_read: (boolean, optional) use strongly consistent reads
+        :param preserve_order: if True, yield in the order of keys (waits for all responses)
+        :return: generator of instances of this model
+        """
+        table_keys, unique_keys, ordered_key_values = cls._unique_keys(keys)
+        if not unique_keys:
+            return
+
+        rows = batch_get_from_table(cls.table(), list(unique_keys.values()), consistent_read=consistent_read)
+        if not preserve_order:
+            for row, metadata in rows:
+                yield cls.from_row(row, metadata)
+            return
+
+        for model in cls._in_key_order(rows, table_keys, ordered_key_values):
+            yield model
+
+    @classmethod
+    def _unique_keys(cls, keys):
+        """Validate keys. Returns (table_keys, {key_values: key}, [key_values in input order])."""
+        table_keys = list(cls._table_schema().key_names)
+        unique_keys = collections.OrderedDict()
+        ordered_key_values = []
+        for key in keys:
+            cls._validate_primary_key(key)
+            key_values = tuple(key[name] for name in table_keys)
+            unique_keys.setdefault(key_values, key)
+            ordered_key_values.append(key_values)
+        return table_keys, unique_keys, ordered_key_values
+
+    @classmethod
+    def _in_key_order(cls, rows, table_keys, ordered_key_values):
+        found = dict(
+            (tuple(row[name] for name in table_keys), (row, metadata))
+            for row, metadata in rows
+        )
+        for key_values in ordered_key_values:
+            if key_values in found:
+                row, metadata = found[key_values]
+                yield cls.from_row(dict(row), metadata)
+
+    @classmethod
+    def _unique_by_primary_key(cls, models):
+        """Return models deduped by primary key, keeping the last one for each key."""
+        table_keys = list(cls._table_schema().key_names)
+        unique_models = collections.OrderedDict()
+        for model in models:
+            if not isinstance(model, cls):
+                raise ValueError('Expected %s instances, got: %r' % (cls.__name__, model))
+            key_values = tuple(model._item.get(name) for name in table_keys)
+            unique_models.pop(key_values, None)
+            unique_models[key_values] = model
+        return list(unique_models.values())
+
+    @classmethod
+    def bulk_save(cls, models, overwrite=False):
+        """
+        Save many models via BatchWriteItem (PutItem semantics), 25 items per request.
+
+        If several models share a primary key, only the last one is written.
+
+        :param models: iterable of instances of this model
+        :param overwrite: set to True to force re-save deleted objects.
+        :return: list of the models written
+        """
+        models = list(models)
+        for model in models:
+            if getattr(model, '_loaded_fields', None) is not None:
+                raise exceptions.PartialModelException(
+                    'Cannot bulk_save %s loaded with attributes=[...], load the whole item' % cls.__name__)
+            model.validate(overwrite=overwrite)
+        models = cls._unique_by_primary_key(models)
+        if not models:
+            return models
+
+        batch_write_to_table(cls.table(), put_items=[model._item for model in models])
+        for model in models:
+            model._mark_saved()
+        return models
+
+    @classmethod
+    def bulk_delete(cls, models):
+        """
+        Delete many models via BatchWriteItem, 25 keys per request. Already deleted models are skipped.
+
+        :param models: iterable of instances of this model
+        :return: list of the models deleted
+        """
+        models = cls._unique_by_primary_key([model for model in models if not model._is_deleted])
+        if not models:
+            return models
+
+        batch_write_to_table(cls.table(), delete_keys=[model.get_primary_key() for model in models])
+        for model in models:
+            model._invalidate_cached_item()
+            model._is_deleted = True
+        return models
+
+    @classmethod
+    def increment(cls, key, field_name, by=1, return_new_value=False):
+        """
+        Atomically add by to a number field of an existing item, in one UpdateItem (ADD), without reading it.
+
+        :param key: primary key dictionary
+        :param field_name: IntType, FloatType or DecimalType field
+        :param by: amount to add, negative to decrement
+        :param return_new_value: return the field's new value instead of the update_item response
+        """
+        return cls._atomic_update(key, field_name, cls._increment_kwargs(key, field_name, by), return_new_value)
+
+    @classmethod
+    def add_to_set(cls, key, field_name, values, return_new_value=False):
+        """
+        Atomically add values to a SetType field of an existing item, in one UpdateItem (ADD).
+
+        :param key: primary key dictionary
+        :param values: iterable of values to add
+        :param return_new_value: return the field's new value instead of the update_item response
+        """
+        return cls._atomic_update(key, field_name, cls._set_update_kwargs(key, field_name, 'ADD', values),
+                                  return_new_value)
+
+    @classmethod
+    def remove_from_set(cls, key, field_name, values, return_new_value=False):
+        """
+        Atomically remove values from a SetType field of an existing item, in one UpdateItem (DELETE).
+
+        :param key: primary key dictionary
+        :param values: iterable of values to remove
+        :param return_new_value: return the field's new value instead of the update_item response
+        """
+        return cls._atomic_update(key, field_name, cls._set_update_kwargs(key, field_name, 'DELETE', values),
+                                  return_new_value)
+
+    @classmethod
+    def _atomic_update_field(cls, key, field_name, field_types, description):
+        table_keys = cls._validate_primary_key(key)
+        field = cls._fields.get(field_name)
+        if field_name in table_keys or not isinstance(field, field_types):
+            raise exceptions.ValidationError('%s.%s is not a %s field' % (cls.__name__, field_name, description))
+        return field
+
+    @classmethod
+    def _increment_kwargs(cls, key, field_name, by):
+        cls._atomic_update_field(key, field_name, (fields.NumberType, fields.DecimalType), 'number')
+        if not _is_number(by):
+            raise exceptions.ValidationError('Cannot increment %s by %r' % (field_name, by))
+        value = decimal.Decimal(str(by)) if isinstance(by, float) else by
+        return cls._atomic_update_kwargs(key, field_name, 'ADD', value)
+
+    @classmethod
+    def _set_update_kwargs(cls, key, field_name, action, values):
+        field = cls._atomic_update_field(key, field_name, SetType, 'SetType')
+        try:
+            values = field.to_native(values)
+        except ConversionError:
+            raise exceptions.ValidationError('Invalid values for %s: %r' % (field_name, values))
+        if not values:
+            raise exceptions.ValidationError('No values to update %s with' % field_name)
+        return cls._atomic_update_kwargs(key, field_name, action, values)
+
+    @classmethod
+    def _atomic_update_kwargs(cls, key, field_name, action, value):
+        """UpdateItem kwargs of a single ADD or DELETE, on an existing item. Increments VERSION_FIELD, if any."""
+        hash_key = cls._table_schema().hash_key
+        update_kwargs = dict(
+            Key=key,
+            UpdateExpression='%s #f :f' % action,
+            ConditionExpression='attribute_exists(#k)',
+            ExpressionAttributeNames={'#f': field_name, '#k': hash_key},
+            ExpressionAttributeValues={':f': value},
+        )
+        if cls.VERSION_FIELD:
+            update_kwargs['UpdateExpression'] += ' ADD #ver :one' if action == 'DELETE' else ', #ver :one'
+            update_kwargs['ExpressionAttributeNames']['#ver'] = cls.VERSION_FIELD
+            update_kwargs['ExpressionAttributeValues'][':one'] = 1
+        return update_kwargs
+
+    @classmethod
+    def _invalidate_cached_key(cls, key):
+        item_cache = cls.item_cache()
+        if item_cache is not None:
+            item_cache.delete(item_cache_key(cls.TABLE_NAME, key))
+
+    @classmethod
+    def _atomic_update(cls, key, field_name, update_kwargs, return_new_value):
+        update_kwargs['ReturnValues'] = 'UPDATED_NEW' if return_new_value else 'NONE'
+        try:
+            response = cls.table().update_item(**update_kwargs)
+        except ClientError as e:
+            if getattr(e, 'response', None) and \
+                    e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                raise exceptions.NotFound('%s %s not found' % (cls.__name__, key))
+            raise
+        finally:
+            cls._invalidate_cached_key(key)
+
+        if not return_new_value:
+            return response
+        # Removing the last elements of a set removes the attribute.
+        return cls._fields[field_name].to_native(response.get('Attributes', {}).get(field_name))
 
     @classmethod
     def _initial_data_to_dynamodb(cls, data):
-        dynamodb_data = dict()
-        for key, value in data.items():
-            cls._key_value_to_dynamodb(dynamodb_data, key, value)
-        return dynamodb_data
+        encoders = cls._field_codecs().encoders
+        return dict(
+            (key, encoders[key](value))
+            for key, value in data.items()
+            if key in encoders
+        )
 
     @classmethod
-    def all(cls, limit=None, paginate=False, exclusive_start_key=None):
+    def all(cls, limit=None, paginate=False, exclusive_start_key=None, segments=None, readonly=False,
+            attributes=None, filter_expression=None):
+        """
+        Scan the whole table.
+
+        :param segments: (int, optional) scan this many segments in parallel, see scan_all_in_table.
+                         With paginate, the second value yielded is then the per-segment resume keys.
+        :param readonly: yield ReadOnlyRow objects instead of model instances
+        :param attributes: (list, optional) only fetch these fields (plus the primary key)
+        :param filter_expression: (optional) dictionary of filter attributes or Q object, see query_table
+        """
+        projected, loaded_fields = cls._projection(attributes)
+        from_row = cls._row_factory(readonly, loaded_fields)
+        engine, table = cls._engine()
         if paginate:
-            for row, metadata, last_evaluated_key in scan_all_in_table(cls.table(), limit=limit, paginate=paginate,
-                                                                       exclusive_start_key=exclusive_start_key):
-                yield cls.from_row(row, metadata), last_evaluated_key
+            for row, metadata, last_evaluated_key in engine.scan_all_in_table(table, limit=limit, paginate=paginate,
+                                                                              exclusive_start_key=exclusive_start_key,
+                                                                              segments=segments, attributes=projected,
+                                                                              filter_expression=filter_expression):
+                yield from_row(row, metadata), last_evaluated_key
         else:
-            for row, metadata in scan_all_in_table(cls.table()):
-                yield cls.from_row(row, metadata)
+            for row, metadata in engine.scan_all_in_table(table, segments=segments, attributes=projected,
+                                                          filter_expression=filter_expression):
+                yield from_row(row, metadata)
 
     @classmethod
-    def paginated_query(cls, query_index=None, descending=False, limit=None, exclusive_start_key=None, filter_expression=None, **query_keys):
+    def paginated_query(cls, query_index=None, descending=False, limit=None, exclusive_start_key=None, filter_expression=None,
+                        readonly=False, attributes=None, as_token=False, **query_keys):
         """
         Return 'limit' number results along with the Last Evaluated Key.
         Keep your 'limit' reasonable, this returns a list (not a generator, as query() does).
@@ -132,12 +518,18 @@ class DynamoDBModel(Model):
         :type query_index: String
         :param descending: If True, return results in descending range key order. Default False
         :type descending: Boolean
-        :param limit: Count of Items to return
+        :param limit: Count of Items to return, at most
         :type limit: int
-        :param exclusive_start_key: LastEvaluatedKey (lek) returned from previous paginated_query()
-        :type exclusive_start_key: dict
+        :param exclusive_start_key: LastEvaluatedKey (lek) returned from previous paginated_query(), or its token
+        :type exclusive_start_key: dict or string
         :param filter_expression:
-        :type filter_expression: dict
+        :type filter_expression: dict or Q
+        :param readonly: If True, return ReadOnlyRow objects instead of model instances. Default False
+        :type readonly: Boolean
+        :param attributes: Only fetch these fields (plus the primary key). Default None, fetch all fields
+        :type attributes: list
+        :param as_token: Return the LastEvaluatedKey as an opaque, URL-safe string, see encode_lek. Default False
+        :type as_token: Boolean
         :param query_keys:
         :type query_keys: dict
         :return: list of items fulfilling query, LastEvaluatedKey to use for successive query exclusive_start_key
@@ -145,6 +537,30 @@ class DynamoDBModel(Model):
         """
 
         query_index = query_index or getattr(cls, 'QUERY_INDEX', None)
+        key_names = cls._query_key_names(query_index)
+        projected, loaded_fields = cls._projection(attributes)
+        if projected:
+            # Needed to resume after the last item returned, see _paginate.
+            projected += [name for name in key_names if name not in projected]
+        engine, _ = cls._engine()
+        query_page = partial(engine.query_table, cls.TABLE_NAME,
+                             query_index=query_index,
+                             descending=descending,
+                             filter_expression=filter_expression,
+                             attributes=projected,
+                             **query_keys)
+        return cls._paginate(query_page, cls._row_factory(readonly, loaded_fields), key_names,
+                             limit, exclusive_start_key, as_token)
+
+    @classmethod
+    def _paginate(cls, query_page, from_row, key_names, limit, exclusive_start_key, as_token):
+        """
+        Query up to limit items, see paginated_query.
+
+        :param query_page: function(limit=..., exclusive_start_key=...) returning a query response
+        """
+        if isinstance(exclusive_start_key, six.string_types):
+            exclusive_start_key = decode_lek(exclusive_start_key)
         result_list = list()
         # Prime our loop variables. Query isn't fulfilled until remaining_count == 0 or LastEvaluatedKey says no more
         # Because we don't have a LEK yet, initialize it to True. It will be set to something or None from the
@@ -152,32 +568,114 @@ class DynamoDBModel(Model):
         # set to True.
         remaining_count = limit
         lek = True if limit else None
+        page_limit = limit
+        returned_total = scanned_total = 0
         while remaining_count and lek:
-            response = query_table(cls.TABLE_NAME,
-                                   query_index=query_index,
-                                   descending=descending,
-                                   limit=limit,
-                                   exclusive_start_key=exclusive_start_key,
-                                   filter_expression=filter_expression,
-                                   **query_keys)
+            # Only ask for what is still missing, scaled by how selective the filter has been so far.
+            page_limit = next_page_limit(remaining_count, returned_total, scanned_total, page_limit)
+            response = query_page(limit=page_limit, exclusive_start_key=exclusive_start_key)
             exclusive_start_key = lek = response.get('LastEvaluatedKey')
-            returned_count = response['Count']  # This is the count of Items actually returned (post filtering)
+            rows = response['Items']  # Items actually returned (post filtering)
+            returned_total += len(rows)
+            scanned_total += response.get('ScannedCount', len(rows))
+            if len(rows) > remaining_count:
+                # More matches than needed: resume right after the last one returned.
+                rows = rows[:remaining_count]
+                lek = cls._row_key(rows[-1], key_names)
             metadata = response.get('ResponseMetadata', {})
-            result_list += [cls.from_row(row, metadata) for row in response['Items']]
-            remaining_count -= returned_count
-        return result_list, lek
+            result_list += [from_row(row, metadata) for row in rows]
+            remaining_count -= len(rows)
+        return result_list, encode_lek(lek) if as_token else lek
+
+    @classmethod
+    def prepare_query(cls, query_index=None, key_ops=(), filter_ops=(), descending=False, readonly=False,
+                      attributes=None):
+        """
+        Compile a query once, to run it many times with different values. See PreparedModelQuery.
+
+            recent = Caregiver.prepare_query(key_ops=['agency_id', 'created__gte'], filter_ops=['is_active'])
+            caregivers = list(recent.query(agency_id=1, created__gte=yesterday, is_active=True))
+
+        Conditions are validated against the schema of the table, or of query_index, right away.
+
+        :param query_index: Name of DynamoDB LSI or GSI to use for query key lookup. Default QUERY_INDEX, if any
+        :param key_ops: key conditions, as query() arguments without values, e.g. ['agency_id', 'created__gte']
+        :param filter_ops: filters, in the same syntax, e.g. ['name__begins_with']
+        :param descending: If True, return results in descending range key order. Default False
+        :param readonly: If True, return ReadOnlyRow objects instead of model instances. Default False
+        :param attributes: Only fetch these fields (plus the primary key). Default None, fetch all fields
+        """
+        query_index = query_index or getattr(cls, 'QUERY_INDEX', None)
+        key_names = cls._query_key_names(query_index)
+        projected, loaded_fields = cls._projection(attributes)
+        if projected:
+            projected += [name for name in key_names if name not in projected]
+        engine, _ = cls._engine()
+        prepared = engine.PreparedQuery(cls.TABLE_NAME, query_index=query_index, key_ops=key_ops,
+                                        filter_ops=filter_ops, descending=descending, attributes=projected)
+        return PreparedModelQuery(cls, prepared, cls._row_factory(readonly, loaded_fields), key_names)
+
+    @classmethod
+    def _query_key_names(cls, query_index=None):
+        """Names of the attributes in the LastEvaluatedKey of a query of the table, or of query_index."""
+        return list(cls._table_schema().query_key_names(query_index))
 
     @classmethod
-    def query(cls, query_index=None, descending=False, limit=None, filter_expression=None, **query_keys):
+    def _row_key(cls, row, key_names):
+        """The LastEvaluatedKey that resumes a query after row, as returned by the engine."""
+        if cls.ENGINE == CLIENT_ENGINE:
+            return dict((name, client_engine.deserialize(row[name])) for name in key_names)
+        return dict((name, row[name]) for name in key_names)
+
+    @classmethod
+    def query(cls, query_index=None, descending=False, limit=None, filter_expression=None, readonly=False,
+              attributes=None, **query_keys):
+        """
+        Query the table, or one of its indexes. May perform multiple calls to DynamoDB.
+
+        :param readonly: yield ReadOnlyRow objects instead of model instances
+        :param attributes: (list, optional) only fetch these fields (plus the primary key)
+        :param query_keys: query arguments, see query_table
+        """
         query_index = query_index or getattr(cls, 'QUERY_INDEX', None)
-        for row, metadata in query_all_in_table(
-                cls.table(),
+        projected, loaded_fields = cls._projection(attributes)
+        from_row = cls._row_factory(readonly, loaded_fields)
+        engine, table = cls._engine()
+        for row, metadata in engine.query_all_in_table(
+                table,
                 query_index=query_index,
                 descending=descending,
                 limit=limit,
                 filter_expression=filter_expression,
+                attributes=projected,
                 **query_keys):
-            yield cls.from_row(row, metadata)
+            yield from_row(row, metadata)
+
+    @classmethod
+    def query_many(cls, queries, max_workers=None, ordered=False, readonly=False, attributes=None):
+        """
+        Run many queries on a pool of threads, e.g. one per hash key, yielding results as they arrive.
+
+        A failed query does not stop the others: QueryManyException is raised once all are done.
+        See query_many_in_table.
+
+        :param queries: list of dictionaries of query() kwargs, e.g. [dict(agency_id=1), dict(agency_id=2)]
+        :param max_workers: (integer, optional) number of threads, default QUERY_MANY_MAX_WORKERS
+        :param ordered: yield all results of queries[0], then queries[1], etc.
+        :param readonly: yield ReadOnlyRow objects instead of model instances
+        :param attributes: (list, optional) only fetch these fields (plus the primary key)
+        :return: generator of (index in queries, instance of this model) tuples
+        """
+        default_query_index = getattr(cls, 'QUERY_INDEX', None)
+        projected, loaded_fields = cls._projection(attributes)
+        from_row = cls._row_factory(readonly, loaded_fields)
+        engine, table = cls._engine()
+
+        queries = [dict(query, query_index=query.get('query_index') or default_query_index, attributes=projected)
+                   for query in queries]
+        for position, row, metadata in engine.query_many_in_table(table, queries, max_workers=max_workers,
+                                                                  ordered=ordered):
+            yield position, from_row(row, metadata)
 
     @classmethod
     def build(cls, **kwargs):
@@ -186,8 +684,12 @@ class DynamoDBModel(Model):
 
     @classmethod
     def create(cls, **kwargs):
+        """
+        Build and save a new item. Overwrites any item with the same primary key, unless the model has
+        a VERSION_FIELD: then VersionConflictException is raised if the item exists.
+        """
         model = cls.build(**kwargs)
-        model.save(overwrite=True)
+        model.save(overwrite=not cls.VERSION_FIELD)
         return model
 
     @classmethod
@@ -204,59 +706,120 @@ class DynamoDBModel(Model):
         """Easy way to mock utcnow. Useful for testing."""
         return datetime.datetime.utcnow()
 
-    def __init__(self, row, metadata=None):
-        for field_name in self._fields.keys():
-            if isinstance(self._fields[field_name],
-                          fields.UUIDType) and row.get(field_name) is None:
-                if field_name.startswith('id'):
-                    row[field_name] = self.gen_uuid()
-        super(DynamoDBModel, self).__init__(self._dynamodb_to_model(row),
-                                            strict=False)
-        self.item = row
+    def __init__(self, row, metadata=None, loaded_fields=None, model_data=None):
+        for field_name in self._field_codecs().uuid_id_fields:
+            if loaded_fields is not None and field_name not in loaded_fields:
+                continue
+            if row.get(field_name) is None:
+                row[field_name] = self.gen_uuid()
+                if model_data is not None:
+                    model_data[field_name] = row[field_name]
+        decoded = model_data is not None
+        if not decoded:
+            model_data = self._dynamodb_to_model(row)
+        super(DynamoDBModel, self).__init__(model_data, strict=False)
+        # Dirty tracking, relative to self.item as last saved or loaded, see get_unsaved_fields:
+        # _saved_values: {field: value before it was first set} (_MISSING if it was absent)
+        # _container_snapshots: {field: deep copy of a dict/list/set value, taken when first handed out}
+        # _item_exposed: self.item was handed out, so any of its values may have changed
+        self._saved_values = dict()
+        self._container_snapshots = dict()
+        self._item_exposed = False
+        if loaded_fields is not None:
+            self._loaded_fields = loaded_fields
+        self._item = row
         self.metadata = metadata
         self._is_deleted = False
 
-        self._set_model_defaults(defaults=self._data)
-        self._last_saved_item = copy.deepcopy(self.item)
+        if decoded:
+            # Decoded from wire format by from_wire: row already holds DynamoDB values, only add defaults.
+            self._set_model_defaults(defaults=dict(
+                (key, value) for key, value in self._data.items() if key not in row))
+        else:
+            self._set_model_defaults(defaults=self._data)
         self._expect_exists_in_db = self.metadata is not None
+        if not self._expect_exists_in_db:
+            # Built from values the caller may still hold and change: watch its containers.
+            self._snapshot_containers(row)
+
+    @property
+    def item(self):
+        """The item in DynamoDB format. Changes to it, or to the values in it, are saved."""
+        self._expose_item()
+        return self._item
+
+    @item.setter
+    def item(self, item):
+        self._expose_item()
+        self._item = item
+
+    def _snapshot_containers(self, keys):
+        """Deep copy the dict, list and set values of keys not snapshotted or set yet, to see in place changes."""
+        item = self._item
+        snapshots = self._container_snapshots
+        for key in keys:
+            value = item.get(key)
+            if (isinstance(value, _CONTAINER_TYPES) and
+                    key not in snapshots and key not in self._saved_values):
+                snapshots[key] = copy.deepcopy(value)
+
+    def _expose_item(self):
+        """Remember all of self.item as last saved, before it is handed out: anything in it may change."""
+        if self.__dict__.get('_item_exposed', True):
+            return
+        self._item_exposed = True
+        item = self._item
+        self._snapshot_containers(item)
+        for key, value in item.items():
+            if key not in self._container_snapshots:
+                self._saved_values.setdefault(key, value)
 
     def _set_model_defaults(self, defaults):
+        encoders = self._field_codecs().encoders
+        loaded_fields = self._loaded_fields
         for key, value in defaults.items():
-            if value:
-                self._key_value_to_dynamodb(self.item, key, value)
+            if loaded_fields is not None and key not in loaded_fields:
+                continue  # Not fetched: the stored value is unknown, not the default.
+            if value and key in encoders:
+                self._item[key] = encoders[key](value)
 
     def _dynamodb_to_model(self, row):
         dict_row = dict(row)
-        for field_name, dynamodb_value in row.items():
-            if field_name in self._fields:
-                if isinstance(self._fields[field_name],
-                              (fields.DateTimeType,
-                               fields.DateType)):
-                    if dynamodb_value:
-                        dict_row[field_name] = datetime.datetime.utcfromtimestamp(
-                            float(dynamodb_value)
-                        )  # TODO: test for this
-                    else:
-                        dict_row[field_name] = None
-                if isinstance(self._fields[field_name],
-                              fields.BooleanType):
-                    # tests/test_gis_report_provider.py covers this
-                    dict_row[field_name] = bool(
-                        dynamodb_value
-                    )  # DynamoDB loads boolean as e.g. Decimal('1')
+        for field_name, decode in self._field_codecs().decoders:
+            if field_name in dict_row:
+                dict_row[field_name] = decode(dict_row[field_name])
         return dict_row
 
     def __setattr__(self, key, value):
         super(DynamoDBModel, self).__setattr__(key, value)
-        if hasattr(self, 'item'):
-            self._key_value_to_dynamodb(self.item, key, value)
+        item = self.__dict__.get('_item')
+        if item is not None:
+            encode = self._field_codecs().encoders.get(key)
+            if encode is not None:
+                if key not in self._saved_values and key not in self._container_snapshots:
+                    self._saved_values[key] = item.get(key, _MISSING)
+                item[key] = encode(value)
+
+    @property
+    def _last_saved_item(self):
+        """self.item as it was last saved or loaded."""
+        # Once exposed, every saved value is in _saved_values or _container_snapshots.
+        last_saved_item = dict() if self._item_exposed else dict(self._item)
+        for key, value in self._saved_values.items():
+            if value is _MISSING:
+                last_saved_item.pop(key, None)
+            else:
+                last_saved_item[key] = value
+        last_saved_item.update(self._container_snapshots)
+        return last_saved_item
 
     def validate(self, partial=False, strict=False, overwrite=False):
         if self._is_deleted and not overwrite:
             raise exceptions.ValidationError('%s already deleted. Pass overwrite=True to force.' % self.__class__.__name__)
 
         try:
-            super(DynamoDBModel, self).validate()
+            # Required fields may simply not have been fetched for partial models.
+            super(DynamoDBModel, self).validate(partial=self._loaded_fields is not None)
         except exceptions.ModelValidationError as e:
             raise exceptions.ValidationError(e.messages)
 
@@ -264,21 +827,29 @@ class DynamoDBModel(Model):
         serialized = self.serialize(role=role, context=context)
         return to_json(serialized)
 
+    @classmethod
+    def _table_schema(cls):
+        """This model's TableSchema, from the registry of the current config."""
+        return table_registry(get_config())[cls.TABLE_NAME]
+
     @classmethod
     def get_schema(cls):
-        config_yaml = get_config().yaml
-        return config_yaml['schemas'][cls.TABLE_NAME]
+        return cls._table_schema().schema
 
     def get_primary_key(self):
         """Return a dictionary used for cls.get by an item's primary key."""
-        return dict(
-            (key['name'], self.item[key['name']])
-            for key in self.get_schema()
-        )
+        item = self._item
+        return dict((name, item[name]) for name in self._table_schema().key_names)
 
     def reload(self):
+        """
+        Return a new instance of this item as stored in the table, or None if it is not there.
+
+        Bypasses the Session identity map, which would return this instance and its unsaved changes, and
+        the item cache, which may be up to CACHE_TTL old: this is a consistent read.
+        """
         try:
-            return self.get(**self.get_primary_key())
+            return self._get_item(self.get_primary_key(), consistent_read=True, readonly=False, attributes=None)
         except exceptions.NotFound:
             return None
 
@@ -286,19 +857,60 @@ class DynamoDBModel(Model):
         if self._is_deleted:
             return False
         self.table().delete_item(Key=self.get_primary_key())
+        self._invalidate_cached_item()
         self._is_deleted = True
         return True
 
+    def _invalidate_cached_item(self):
+        """Drop this item from the item cache, under its current and its last saved primary key."""
+        item_cache = self.item_cache()
+        if item_cache is None:
+            return
+        primary_key = self.get_primary_key()
+        cache_keys = set([item_cache_key(self.TABLE_NAME, primary_key)])
+        last_saved_item = self._last_saved_item
+        if all(last_saved_item.get(name) is not None for name in primary_key):
+            cache_keys.add(item_cache_key(self.TABLE_NAME, dict((name, last_saved_item[name]) for name in primary_key)))
+        for cache_key in cache_keys:
+            item_cache.delete(cache_key)
+
     def get_unsaved_fields(self):
-        different_fields = return_different_fields_except(self.item, self._last_saved_item,
-                                                          self.FIELDS_SAFE_TO_OVERWRITE)
-        return different_fields.get('new') or dict()
+        """
+        Fields of self.item added or changed since it was last saved or loaded, with their new value.
+
+        Only fields set, containers handed out through their attribute, or all of self.item once it was
+        handed out, are compared: a model that is only read costs nothing.
+        """
+        item = self._item
+        saved_values = self._saved_values
+        container_snapshots = self._container_snapshots
+        if self._item_exposed:
+            keys = item
+        else:
+            keys = set(saved_values) | set(container_snapshots)
+        unsaved_fields = dict()
+        for key in keys:
+            if key not in item or key in self.FIELDS_SAFE_TO_OVERWRITE:
+                continue
+            value = item[key]
+            if key in container_snapshots:
+                saved_value = container_snapshots[key]
+            else:
+                saved_value = saved_values.get(key, _MISSING)
+                if saved_value is value:
+                    continue
+            if saved_value is _MISSING or saved_value != value:
+                unsaved_fields[key] = value
+        return unsaved_fields
 
     def log_if_unsafe_save(self, result, is_update):
-        different_fields = return_different_fields_except(self.item, result['Attributes'],
+        item = self._item
+        if self._loaded_fields is not None:
+            item = dict((key, value) for key, value in item.items() if key in self._loaded_fields)
+        different_fields = return_different_fields_except(item, result['Attributes'],
                                                           self.FIELDS_SAFE_TO_OVERWRITE)
 
-        saved_new = dict(self.item.items())                 # what we have locally
+        saved_new = dict(item.items())                      # what we have locally
         saved_old = dict(result['Attributes'].items())      # what was upstream
         new_fields = different_fields.get('new') or dict()  # changed locally vs upstream
         old_fields = different_fields.get('old') or dict()  # changed upstream vs locally
@@ -354,97 +966,494 @@ class DynamoDBModel(Model):
             return True
         return False
 
-    def update(self, skip_primary_key_check=False):
+    def get_update_expression(self):
         """
-        Update an existing item via boto. Called by save(), mostly for internal use.
+        Return UpdateExpression, ExpressionAttributeNames and ExpressionAttributeValues for the unsaved fields,
+        or None if there are none.
 
-        WARNING: Will not work if the item doesn't exist.
-        :param skip_primary_key_check:
-        :return:
+        Fields set to None, or to an empty set, are REMOVEd. COUNTER_FIELDS are ADDed their difference,
+        and sets ADD their new elements and DELETE the removed ones. Other fields are SET.
         """
-        attribute_updates = self.get_attribute_updates()
-        if not attribute_updates:
-            return dict()
+        unsaved_fields = self.get_unsaved_fields()
+        if not unsaved_fields:
+            return None
+
+        last_saved_item = self._last_saved_item
+        clauses = collections.OrderedDict((action, []) for action in ('SET', 'REMOVE', 'ADD', 'DELETE'))
+        names = dict()
+        values = dict()
+        for i, field_name in enumerate(sorted(unsaved_fields)):
+            value = unsaved_fields[field_name]
+            saved_value = last_saved_item.get(field_name)
+            name = '#u%d' % i
+            names[name] = field_name
+            if value is None or value == set():
+                clauses['REMOVE'].append(name)
+            elif field_name in self.COUNTER_FIELDS and _is_number(value) and _is_number(saved_value):
+                values[':u%d' % i] = value - saved_value
+                clauses['ADD'].append('%s :u%d' % (name, i))
+            elif isinstance(value, set) and isinstance(saved_value, set):
+                if value - saved_value:
+                    values[':u%da' % i] = value - saved_value
+                    clauses['ADD'].append('%s :u%da' % (name, i))
+                if saved_value - value:
+                    values[':u%dd' % i] = saved_value - value
+                    clauses['DELETE'].append('%s :u%dd' % (name, i))
+            else:
+                values[':u%d' % i] = value
+                clauses['SET'].append('%s = :u%d' % (name, i))
+
+        update_expression = dict(
+            UpdateExpression=' '.join('%s %s' % (action, ', '.join(actions))
+                                      for action, actions in clauses.items() if actions),
+            ExpressionAttributeNames=names,
+        )
+        if values:
+            update_expression['ExpressionAttributeValues'] = values
+        return update_expression
+
+    def _return_values(self, return_values=None):
+        if return_values:
+            return return_values
+        if self.RETURN_VALUES:
+            return self.RETURN_VALUES
+        # Conditional writes already guard against lost updates: no need for the old item.
+        return 'NONE' if self.VERSION_FIELD else 'ALL_OLD'
+
+    def _next_version(self):
+        """Set VERSION_FIELD to the last saved version + 1. Returns the last saved version, None for none."""
+        saved_version = self._last_saved_item.get(self.VERSION_FIELD)
+        setattr(self, self.VERSION_FIELD, int(saved_version or 0) + 1)
+        return saved_version
+
+    def _version_condition(self, is_update):
+        """
+        Bump VERSION_FIELD and return the ConditionExpression kwargs of the write.
+
+        Updates require the stored version to be the last saved one, puts require the item not to exist.
+        """
+        if is_update:
+            saved_version = self._next_version()
+            if saved_version is None:
+                return dict(ConditionExpression='attribute_not_exists(#ver)',
+                            ExpressionAttributeNames={'#ver': self.VERSION_FIELD})
+            return dict(ConditionExpression='#ver = :ver',
+                        ExpressionAttributeNames={'#ver': self.VERSION_FIELD},
+                        ExpressionAttributeValues={':ver': saved_version})
+        self._next_version()
+        return dict(ConditionExpression='attribute_not_exists(#hk)',
+                    ExpressionAttributeNames={'#hk': self._table_schema().hash_key})
+
+    def _raise_if_version_conflict(self, client_error):
+        """Raise VersionConflictException for a failed version check, restoring VERSION_FIELD."""
+        e = client_error
+        if not self.VERSION_FIELD or not getattr(e, 'response', None):
+            return
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            return
+        saved_version = self._restore_version()
+        raise exceptions.VersionConflictException(
+            '%s %s was changed by another writer since version %s' %
+            (self.__class__.__name__, self.get_primary_key(), saved_version))
+
+    def _restore_version(self):
+        """Undo _next_version() after a failed write. Returns the last saved version."""
+        saved_version = self._last_saved_item.get(self.VERSION_FIELD)
+        setattr(self, self.VERSION_FIELD, None if saved_version is None else int(saved_version))
+        return saved_version
+
+    def _update_item_kwargs(self, skip_primary_key_check=False, return_values=None):
+        """Return the kwargs for update_item(), or None if there is nothing to update."""
+        if not self.get_unsaved_fields():
+            return None
 
         if not skip_primary_key_check and self.has_changed_primary_key():
             raise exceptions.PrimaryKeyUpdateException(
                     'Cannot change primary key, use %s.save(overwrite=True)' % self.TABLE_NAME)
 
-        response = self.table().update_item(
+        condition = self._version_condition(is_update=True) if self.VERSION_FIELD else dict()
+        update_kwargs = self.get_update_expression()
+        if condition:
+            update_kwargs['ConditionExpression'] = condition['ConditionExpression']
+            update_kwargs['ExpressionAttributeNames'].update(condition['ExpressionAttributeNames'])
+            if 'ExpressionAttributeValues' in condition:
+                update_kwargs.setdefault('ExpressionAttributeValues', dict()).update(
+                    condition['ExpressionAttributeValues'])
+
+        return_values = self._return_values(return_values)
+        if self._loaded_fields is not None:
+            not_loaded = set(update_kwargs['ExpressionAttributeNames'].values()) - self._loaded_fields
+            not_loaded.discard(self.VERSION_FIELD)
+            if not_loaded:
+                raise exceptions.PartialModelException(
+                    'Cannot save fields that were not loaded on %s: %s' %
+                    (self.__class__.__name__, ', '.join(sorted(not_loaded))))
+            if return_values == 'ALL_OLD':
+                # The rest of the stored item is unknown locally: only compare what is being updated.
+                return_values = 'UPDATED_OLD'
+
+        update_kwargs.update(
             Key=self.get_primary_key(),
-            AttributeUpdates=attribute_updates,
-            ReturnValues='ALL_OLD',
+            ReturnValues=return_values,
         )
-        self._expect_exists_in_db = True
-        return response
+        return update_kwargs
 
-    def save(self, overwrite=False):
+    def update(self, skip_primary_key_check=False, return_values=None):
         """
-        Save this object to the database.
+        Update an existing item via boto. Called by save(), mostly for internal use.
 
-        :param overwrite: set to True to force re-save deleted objects.
+        WARNING: Will not work if the item doesn't exist.
+        :param skip_primary_key_check:
+        :param return_values: ReturnValues, default RETURN_VALUES
+        :return:
         """
+        update_kwargs = self._update_item_kwargs(skip_primary_key_check, return_values)
+        if update_kwargs is None:
+            return dict()
+
+        try:
+            response = self.table().update_item(**update_kwargs)
+        except ClientError as e:
+            self._raise_if_version_conflict(e)
+            raise
+        self._expect_exists_in_db = True
+        return response
+
+    def _put_item_kwargs(self, return_values=None, overwrite=False):
+        # PutItem only supports ALL_OLD or NONE
+        return_values = 'ALL_OLD' if self._return_values(return_values) == 'ALL_OLD' else 'NONE'
+        put_kwargs = dict()
+        if self.VERSION_FIELD:
+            condition = self._version_condition(is_update=False)
+            if not overwrite:
+                put_kwargs.update(condition)
+        put_kwargs.update(Item=self._item, ReturnValues=return_values)
+        return put_kwargs
+
+    def _before_save(self, overwrite):
+        """Validate and decide how to save. Returns (is_update, has_changed_primary_key)."""
         self.validate(overwrite=overwrite)
 
         has_changed_primary_key = self.has_changed_primary_key()
         if has_changed_primary_key:
             log_data('Primary key changed for table=%s, overwrite=%s' %
                      (self.table().name, overwrite),
-                     extra=dict(
-                         new=dict(self.item.items()),
+                     extra=lambda: dict(
+                         new=dict(self._item.items()),
                          old=dict(self._last_saved_item.items()),
                      ),
                      logging_level='warning')
 
-        try:
-            if overwrite or has_changed_primary_key or not self._expect_exists_in_db:
-                result = self.table().put_item(Item=self.item,
-                                               ReturnValues='ALL_OLD')
-                is_update = False
-            else:
-                result = self.update(skip_primary_key_check=has_changed_primary_key)
-                is_update = True
-
-        except ClientError as e:
-            if getattr(e, 'response', None) and e.response.get('Error', {}).get('Code') == 'ValidationException':
-                message = repr(e)
-                raise exceptions.ValidationError(message)
-            raise
-        except Exception:
-            existing = self.reload()
-            different_fields = existing and return_different_fields_except(self.item, existing.item,
-                                                                           self.FIELDS_SAFE_TO_OVERWRITE)
-            log_data('Error saving, table=%s, overwrite=%s' %
-                     (self.table().name, overwrite),
-                     extra=dict(
-                         save_new=dict(self.item.items()),
-                         save_old=dict(existing.item.items()) if existing else None,
-                         different_fields=different_fields,
-                     ),
-                     logging_level='error')
-
-            raise
+        is_update = not (overwrite or has_changed_primary_key or not self._expect_exists_in_db)
+        if not is_update and self._loaded_fields is not None:
+            # PutItem would drop every field that was not fetched.
+            raise exceptions.PartialModelException(
+                'Cannot overwrite %s loaded with attributes=%s, load the whole item to save it' %
+                (self.__class__.__name__, sorted(self._loaded_fields)))
+        return is_update, has_changed_primary_key
 
+    @staticmethod
+    def _raise_if_validation_error(client_error):
+        e = client_error
+        if getattr(e, 'response', None) and e.response.get('Error', {}).get('Code') == 'ValidationException':
+            message = repr(e)
+            raise exceptions.ValidationError(message)
+
+    def _log_save_error(self, existing, overwrite):
+        log_data('Error saving, table=%s, overwrite=%s' %
+                 (self.table().name, overwrite),
+                 extra=lambda: dict(
+                     save_new=dict(self._item.items()),
+                     save_old=dict(existing._item.items()) if existing else None,
+                     different_fields=existing and return_different_fields_except(self._item, existing._item,
+                                                                                  self.FIELDS_SAFE_TO_OVERWRITE),
+                 ),
+                 logging_level='error')
+
+    def _after_save(self, result, overwrite, is_update, return_values=None):
         if result.get('ResponseMetadata', {}):
             self.metadata = result['ResponseMetadata']
 
         if overwrite:
             log_data('save overwrite=True table=%s' % self.table().name,
-                     extra=dict(
-                         db_item=dict(self.item.items()),
+                     extra=lambda: dict(
+                         db_item=dict(self._item.items()),
                          put_item_result=result,
                      ),
                      logging_level='warning')
 
-        if not overwrite:
+        # Only ALL_OLD returns enough of the old item to compare (UPDATED_OLD for partial models, see update).
+        if not overwrite and self._return_values(return_values) == 'ALL_OLD' and log_enabled('error'):
             # If there are no differences at all, don't bother logging
-            if 'Attributes' in result and result['Attributes'] != self.item:
+            if 'Attributes' in result and result['Attributes'] != self._item:
                 self.log_if_unsafe_save(result, is_update)
         # Save succeeded, update locally
+        self._mark_saved()
+
+    def save(self, overwrite=False, return_values=None):
+        """
+        Save this object to the database.
+
+        :param overwrite: set to True to force re-save deleted objects.
+        :param return_values: ReturnValues: 'ALL_OLD', 'UPDATED_OLD' (updates only) or 'NONE'. Default RETURN_VALUES
+        """
+        is_update, has_changed_primary_key = self._before_save(overwrite)
+
+        try:
+            if is_update:
+                result = self.update(skip_primary_key_check=has_changed_primary_key, return_values=return_values)
+            else:
+                result = self.table().put_item(**self._put_item_kwargs(return_values, overwrite))
+
+        except exceptions.VersionConflictException:
+            raise
+        except ClientError as e:
+            self._raise_if_validation_error(e)
+            self._raise_if_version_conflict(e)
+            raise
+        except Exception:
+            # With a VERSION_FIELD, concurrent writes fail their condition: no need to reload to compare.
+            if log_enabled('error'):
+                self._log_save_error(None if self.VERSION_FIELD else self.reload(), overwrite)
+            raise
+
+        self._after_save(result, overwrite, is_update, return_values)
+        return result
+
+    def _mark_saved(self):
+        self._invalidate_cached_item()
         self._is_deleted = False
-        self._last_saved_item = copy.deepcopy(self.item)
+        # Containers handed out, or set, may still be changed in place: keep watching them.
+        watched = set(self._container_snapshots) | set(self._saved_values)
+        self._saved_values = dict()
+        self._container_snapshots = dict()
+        if self._item_exposed:
+            self._item_exposed = False
+            self._expose_item()
+        else:
+            self._snapshot_containers(watched)
         self._expect_exists_in_db = True
-        return result
+
+
+_DECIMAL_ONE = decimal.Decimal('1')
+_DECIMAL_ZERO = decimal.Decimal('0')
+
+
+def _is_number(value):
+    return isinstance(value, six.integer_types + (float, decimal.Decimal)) and not isinstance(value, bool)
+
+
+def _encode_default(value):
+    if value == '':  # Empty AttributeValue is an error in DynamoDB
+        return None
+    return value
+
+
+def _datetime_encoder(field):
+    def encode(value):
+        if not value:
+            return 0
+        if not isinstance(value, datetime.date):
+            value = field.to_native(value)
+        return decimal.Decimal(int(calendar.timegm(value.timetuple())))
+    return encode
+
+
+def _uuid_encoder(field):
+    def encode(value):
+        if value:
+            return field.to_primitive(value)
+        return _encode_default(value)
+    return encode
+
+
+def _encode_boolean(value):
+    return _DECIMAL_ONE if value else _DECIMAL_ZERO
+
+
+def _decode_datetime(value):
+    if value:
+        return datetime.datetime.utcfromtimestamp(float(value))  # TODO: test for this
+    return None
+
+
+def _decode_boolean(value):
+    # tests/test_gis_report_provider.py covers this
+    return bool(value)  # DynamoDB loads boolean as e.g. Decimal('1')
+
+
+_MISSING = object()
+_CONTAINER_TYPES = (dict, list, set)
+
+# Fields holding immutable values. Others may hold containers that can be changed in place.
+_SCALAR_FIELD_TYPES = (
+    fields.BooleanType,
+    fields.DateTimeType,
+    fields.DateType,
+    fields.DecimalType,
+    fields.NumberType,
+    fields.StringType,
+    fields.UUIDType,
+)
+
+
+class SnapshotFieldDescriptor(FieldDescriptor):
+    """
+    Field descriptor for fields that may hold a dict, list or set.
+
+    On first read of a value shared with instance.item, keeps a deep copy of it,
+    so that get_unsaved_fields() sees changes made in place. Unread fields cost nothing.
+    """
+
+    def __get__(self, instance, cls):
+        value = super(SnapshotFieldDescriptor, self).__get__(instance, cls)
+        if instance is not None and isinstance(value, _CONTAINER_TYPES):
+            item = instance.__dict__.get('_item')
+            if item is not None and item.get(self.name) is value:
+                instance._snapshot_containers([self.name])
+        return value
+
+
+class PreparedModelQuery(object):
+    """A query of a model compiled by DynamoDBModel.prepare_query. Values are passed by condition name."""
+
+    def __init__(self, model_class, prepared, from_row, key_names):
+        self.model_class = model_class
+        self.prepared = prepared  # table.PreparedQuery or client_engine.PreparedQuery
+        self._from_row = from_row
+        self._key_names = key_names
+
+    def query(self, limit=None, **values):
+        """Like DynamoDBModel.query: yield the models of all pages."""
+        from_row = self._from_row
+        for row, metadata in self.prepared.query_all(limit=limit, **values):
+            yield from_row(row, metadata)
+
+    def paginated_query(self, limit=None, exclusive_start_key=None, as_token=False, **values):
+        """Like DynamoDBModel.paginated_query: return (up to limit models, LastEvaluatedKey)."""
+        query_page = partial(self.prepared.query_page, self.prepared.bind(values))
+        return self.model_class._paginate(query_page, self._from_row, self._key_names,
+                                          limit, exclusive_start_key, as_token)
+
+
+class FieldCodecs(object):
+    """
+    Per-model conversion between schematics and DynamoDB values, resolved once per field.
+
+    type_encoders: {field_name: function(model value) -> DynamoDB value}, for every field, by field type
+    encoders: same as type_encoders, unless the model overrides _value_to_dynamodb
+    decoders: [(field_name, function(DynamoDB value) -> model value)], only for fields needing conversion
+    uuid_id_fields: UUIDType fields named id*, generated when missing
+    native_decoders: {field_name: function(DynamoDB value) -> model native value}, for ReadOnlyRow
+    """
+
+    def __init__(self, model_class):
+        self.type_encoders = dict()
+        self.encoders = dict()
+        self.decoders = []
+        self.uuid_id_fields = []
+        self.native_decoders = dict()
+
+        # Subclasses overriding _value_to_dynamodb keep working, through the slower generic path.
+        custom_encoder = (model_class._value_to_dynamodb.__func__ is not
+                          DynamoDBModel._value_to_dynamodb.__func__)
+
+        for field_name, field in model_class._fields.items():
+            if isinstance(field, (fields.DateTimeType, fields.DateType)):
+                self.type_encoders[field_name] = _datetime_encoder(field)
+            elif isinstance(field, fields.UUIDType):
+                self.type_encoders[field_name] = _uuid_encoder(field)
+            elif isinstance(field, fields.BooleanType):
+                self.type_encoders[field_name] = _encode_boolean
+            else:
+                self.type_encoders[field_name] = _encode_default
+
+            if custom_encoder:
+                self.encoders[field_name] = partial(model_class._value_to_dynamodb, field_name)
+            else:
+                self.encoders[field_name] = self.type_encoders[field_name]
+
+            if isinstance(field, (fields.DateTimeType, fields.DateType)):
+                self.decoders.append((field_name, _decode_datetime))
+            elif isinstance(field, fields.BooleanType):
+                self.decoders.append((field_name, _decode_boolean))
+
+            if isinstance(field, fields.UUIDType) and field_name.startswith('id'):
+                self.uuid_id_fields.append(field_name)
+
+            self.native_decoders[field_name] = _native_decoder(field, dict(self.decoders).get(field_name))
+
+            if (not isinstance(field, _SCALAR_FIELD_TYPES) and
+                    type(model_class.__dict__.get(field_name)) is FieldDescriptor):
+                setattr(model_class, field_name, SnapshotFieldDescriptor(field_name))
+
+        self._decoders_by_name = dict(self.decoders)
+
+    def decode_wire(self, wire_item):
+        """Decode a wire format item in one pass. Returns (row, model data), see DynamoDBModel.from_wire."""
+        deserialize = client_engine.deserialize
+        decoders = self._decoders_by_name
+        row = dict()
+        model_data = dict()
+        for name, attribute_value in wire_item.items():
+            value = row[name] = deserialize(attribute_value)
+            decode = decoders.get(name)
+            model_data[name] = value if decode is None else decode(value)
+        return row, model_data
+
+
+def _native_decoder(field, decode=None):
+    def decode_native(value):
+        if decode is not None:
+            value = decode(value)
+        if value is None:
+            return None
+        return field.to_native(value)
+    return decode_native
+
+
+class ReadOnlyRow(object):
+    """
+    Lightweight, read-only view of a DynamoDB row, as returned with readonly=True.
+
+    Fields are decoded from self.item on each attribute access, using the model's field types.
+    No schematics Model is built: no validation, no defaults and no generated UUIDs,
+    so fields missing from the row are None. Use to_model() to get a full model instance.
+    """
+    __slots__ = ('item', 'metadata')
+    _model_class = None
+    _decoders = {}
+
+    def __init__(self, item, metadata=None):
+        object.__setattr__(self, 'item', item)
+        object.__setattr__(self, 'metadata', metadata)
+
+    def __getattr__(self, name):
+        try:
+            decode = self._decoders[name]
+        except KeyError:
+            raise AttributeError('%r has no field %r' % (self._model_class, name))
+        value = self.item.get(name)
+        return decode(value) if value is not None else None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is read-only, use to_model() to change it' % self.__class__.__name__)
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, self.get_primary_key())
+
+    def get_primary_key(self):
+        """Return a dictionary used for cls.get by an item's primary key."""
+        item = self.item
+        return dict((name, item[name]) for name in self._model_class._table_schema().key_names)
+
+    def to_dict(self):
+        """Return all fields present in the row, decoded."""
+        return dict((name, getattr(self, name)) for name in self.item if name in self._decoders)
+
+    def to_model(self):
+        """Return a full model instance for this row."""
+        return self._model_class.from_row(dict(self.item), self.metadata)
 
 
 class DynamoDBJSONEncoder(json.JSONEncoder):
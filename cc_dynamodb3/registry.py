@@ -0,0 +1,140 @@
+"""
+Table schemas and indexes of the YAML config, indexed once per set_config: get_config().tables.
+
+    tables = get_config().tables
+    tables['nps_survey'].key_names  # ('agency_id', 'profile_id')
+    tables['nps_survey'].indexes['SomeIndex']  # IndexSchema
+    tables.hash_and_range_keys('nps_survey', 'SomeIndex')  # (hash key, range key or None) of the index
+"""
+from .exceptions import UnknownTableException
+
+
+# Config index type: DynamoDB ProjectionType
+PROJECTION_TYPES = {
+    'AllIndex': 'ALL',
+    'GlobalAllIndex': 'ALL',
+}
+
+
+def _key_types(parts):
+    return dict((part['name'], part['type']) for part in parts)
+
+
+def _key_name(parts, key_type):
+    for part in parts:
+        if part['type'] == key_type:
+            return part['name']
+    return None
+
+
+class IndexSchema(object):
+    """A local or global secondary index, from the 'indexes' or 'global_indexes' config."""
+
+    def __init__(self, config, is_global):
+        """
+        :param config: the index config: dict(name=..., type=..., parts=[...])
+        :param is_global: True for a GSI, False for an LSI
+        """
+        parts = config['parts']
+        self.name = config['name']
+        self.config = config
+        self.is_global = is_global
+        self.hash_key = _key_name(parts, 'HashKey')
+        self.range_key = _key_name(parts, 'RangeKey')
+        self.key_names = tuple(part['name'] for part in parts)
+        self.key_types = _key_types(parts)
+        self.projection_type = PROJECTION_TYPES.get(config.get('type'))
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.name)
+
+
+class TableSchema(object):
+    """Keys, attribute types and indexes of one table."""
+
+    def __init__(self, name, schema, indexes_config=(), global_indexes_config=()):
+        """
+        :param name: unprefixed table name
+        :param schema: the table's 'schemas' config, a list of key parts
+        """
+        self.name = name
+        self.schema = schema
+        self.hash_key = _key_name(schema, 'HashKey')
+        self.range_key = _key_name(schema, 'RangeKey')
+        self.key_names = tuple(part['name'] for part in schema)
+        self.key_types = _key_types(schema)
+
+        self.indexes = dict()
+        for index_config in global_indexes_config or ():
+            self.indexes[index_config['name']] = IndexSchema(index_config, is_global=True)
+        for index_config in indexes_config or ():  # local indexes win on a name clash, as they always did
+            self.indexes[index_config['name']] = IndexSchema(index_config, is_global=False)
+
+        self.attribute_types = dict()
+        for parts in [schema] + [index.config['parts'] for index in self.indexes.values()]:
+            for part in parts:
+                self.attribute_types.setdefault(part['name'], part.get('data_type'))
+
+        self._query_key_names = dict(
+            (index_name, self.key_names + tuple(name for name in index.key_names if name not in self.key_names))
+            for index_name, index in self.indexes.items()
+        )
+
+    def query_key_names(self, index_name=None):
+        """Names of the attributes in the LastEvaluatedKey of a query of the table, or of index_name."""
+        return self._query_key_names.get(index_name, self.key_names)
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.name)
+
+
+class TableRegistry(object):
+    """TableSchema by unprefixed table name. Built from the YAML config, see ConfigSnapshot."""
+
+    def __init__(self, yaml_config):
+        indexes = yaml_config.get('indexes') or {}
+        global_indexes = yaml_config.get('global_indexes') or {}
+        self._tables = dict(
+            (name, TableSchema(name, schema, indexes.get(name), global_indexes.get(name)))
+            for name, schema in (yaml_config.get('schemas') or {}).items()
+        )
+
+    def __getitem__(self, table_name):
+        return self._tables[table_name]
+
+    def __contains__(self, table_name):
+        return table_name in self._tables
+
+    def __iter__(self):
+        return iter(self._tables)
+
+    def __len__(self):
+        return len(self._tables)
+
+    def get(self, table_name, default=None):
+        return self._tables.get(table_name, default)
+
+    def index(self, table_name, index_name):
+        """The IndexSchema, or None if table_name has no such index."""
+        table = self._tables.get(table_name)
+        return table.indexes.get(index_name) if table else None
+
+    def hash_and_range_keys(self, table_name, index_name=None):
+        """Return (hash key, range key or None) of the table, or of index_name. Raises UnknownTableException."""
+        table = self._tables.get(table_name)
+        if table is None:
+            raise UnknownTableException('Unknown table: %s' % table_name)
+        if not index_name:
+            return table.hash_key, table.range_key
+        index = table.indexes.get(index_name)
+        if index is None:
+            raise UnknownTableException('Unknown index %s on table %s' % (index_name, table_name))
+        return index.hash_key, index.range_key
+
+
+def table_registry(config):
+    """config.tables, or a TableRegistry of config.yaml for configs without one (e.g. thawed copies)."""
+    registry = config.get('tables')
+    if registry is None:
+        registry = TableRegistry(config.get('yaml') or {})
+    return registry
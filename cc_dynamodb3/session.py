@@ -0,0 +1,187 @@
+"""
+Unit of work for models: an identity map, and one flush of every change at the end.
+
+    with Session() as session:
+        agency = Agency.get(agency_id=1)           # GetItem
+        assert Agency.get(agency_id=1) is agency   # same instance, no round trip
+        agency.name = 'New name'
+        session.add(Caregiver.build(...))
+    # On exit, new models are written with BatchWriteItem, 25 per request, changed ones with UpdateItem.
+
+While a session is active in the current context (thread, or asyncio task on Python 3.7+, see
+contextvars), DynamoDBModel.get() and aget() return the instance already in the session for that
+primary key, if any, and add what they load. Concurrent tasks on one event loop do not see each
+other's sessions. Keys deleted in the session raise NotFound until it is flushed. readonly and
+attributes=[...] reads bypass the session. Nothing is written if the block raises.
+
+Session(transactional=True) flushes everything in one TransactWriteItems instead: all or nothing,
+up to TRANSACT_MAX_ITEMS changed models, at twice the write cost.
+"""
+import collections
+import threading
+
+try:
+    import contextvars
+except ImportError:  # Python 2 and 3.6: sessions are per thread only.
+    contextvars = None
+
+from . import exceptions
+from .cache import item_cache_key
+from .transaction import Transaction
+
+
+# Active sessions, innermost last, as a tuple: contexts copied into new asyncio tasks must not share a list.
+if contextvars is not None:
+    _sessions = contextvars.ContextVar('cc_dynamodb3_sessions', default=())
+else:
+    _local = threading.local()
+
+
+def _get_sessions():
+    if contextvars is not None:
+        return _sessions.get()
+    return getattr(_local, 'sessions', ())
+
+
+def _set_sessions(sessions):
+    if contextvars is not None:
+        _sessions.set(sessions)
+    else:
+        _local.sessions = sessions
+
+
+def get_session():
+    """Return the innermost Session active in this context (thread or asyncio task), or None."""
+    sessions = _get_sessions()
+    return sessions[-1] if sessions else None
+
+
+class Session(object):
+    """Identity map and unit of work. Use as a context manager, see the module docstring."""
+
+    def __init__(self, transactional=False):
+        """:param transactional: flush in one transaction, see cc_dynamodb3.transaction"""
+        self.transactional = transactional
+        # (model class, normalized primary key): model
+        self._identity_map = collections.OrderedDict()
+        self._deleted = collections.OrderedDict()
+
+    def __enter__(self):
+        _set_sessions(_get_sessions() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _set_sessions(tuple(session for session in _get_sessions() if session is not self))
+        if exc_type is None:
+            self.flush()
+        return False
+
+    @staticmethod
+    def _identity(model_class, primary_key):
+        return model_class, item_cache_key(model_class.TABLE_NAME, primary_key)
+
+    def lookup(self, model_class, primary_key):
+        """
+        Return the model in this session with this primary key, or None.
+
+        Raises NotFound if it is deleted in this session, and not flushed yet.
+        """
+        identity = self._identity(model_class, primary_key)
+        if identity in self._deleted:
+            raise exceptions.NotFound('%s %s is deleted in this session' % (model_class.__name__, primary_key))
+        model = self._identity_map.get(identity)
+        if model is not None and model._is_deleted:  # deleted directly, with model.delete()
+            del self._identity_map[identity]
+            return None
+        return model
+
+    def get(self, model_class, **primary_key):
+        """model_class.get(**primary_key), through this session's identity map, even if it is not active."""
+        model = self.lookup(model_class, primary_key)
+        if model is None:
+            model = self.add(model_class.get(**primary_key))
+        return model
+
+    def add(self, model):
+        """
+        Track model, to be written on flush() if it is new or changed.
+
+        Returns the model. Raises ValueError if another instance with the same primary key is tracked,
+        or if that key is deleted in this session: flush() first to create it again.
+        """
+        identity = self._identity(model.__class__, model.get_primary_key())
+        if identity in self._deleted:
+            raise ValueError('%s with primary key %s is deleted in this session' %
+                             (model.__class__.__name__, model.get_primary_key()))
+        tracked = self._identity_map.setdefault(identity, model)
+        if tracked is not model:
+            raise ValueError('Another %s with primary key %s is already in this session' %
+                             (model.__class__.__name__, model.get_primary_key()))
+        return model
+
+    def delete(self, model):
+        """Delete model on flush()."""
+        identity = self._identity(model.__class__, model.get_primary_key())
+        self._identity_map.pop(identity, None)
+        self._deleted[identity] = model
+
+    def dirty_models(self):
+        """Return the tracked models that flush() would save: new or with unsaved changes."""
+        return [model for model in self._identity_map.values()
+                if not model._expect_exists_in_db or model.get_unsaved_fields()]
+
+    def flush(self):
+        """
+        Write all changes. New models are put with one BatchWriteItem per 25 models of a table. Models
+        loaded from the table are saved one by one, with an UpdateItem of their changed fields only.
+
+        BatchWriteItem puts whole items, unconditionally: cheaper for many new models, but it would
+        overwrite fields written concurrently by others if used for existing ones. New models with a
+        VERSION_FIELD are saved one by one too, for their condition. Session(transactional=True) makes
+        a single request, with UpdateItem for existing models, at twice the write cost.
+
+        :return: list of the models saved and deleted
+        """
+        if self.transactional:
+            return self._flush_in_transaction()
+
+        to_save = collections.OrderedDict()
+        saved = []
+        for model in self.dirty_models():
+            if model._expect_exists_in_db or model._loaded_fields is not None or model.VERSION_FIELD:
+                model.save()
+                saved.append(model)
+            else:
+                to_save.setdefault(model.__class__, []).append(model)
+        for model_class, models in to_save.items():
+            saved.extend(model_class.bulk_save(models))
+
+        to_delete = collections.OrderedDict()
+        for model in self._deleted.values():
+            to_delete.setdefault(model.__class__, []).append(model)
+        for model_class, models in to_delete.items():
+            saved.extend(model_class.bulk_delete(models))
+        self._deleted.clear()
+        self._rekey()
+        return saved
+
+    def _flush_in_transaction(self):
+        transaction = Transaction()
+        saved = self.dirty_models()
+        for model in saved:
+            transaction.save(model)
+        deleted = list(self._deleted.values())
+        for model in deleted:
+            transaction.delete(model)
+        transaction.commit()
+
+        self._deleted.clear()
+        self._rekey()
+        return saved + deleted
+
+    def _rekey(self):
+        # Primary keys may have changed: re-key the identity map.
+        models = list(self._identity_map.values())
+        self._identity_map.clear()
+        for model in models:
+            self.add(model)
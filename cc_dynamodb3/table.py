@@ -1,17 +1,32 @@
 import six
-from six.moves import reduce
+from six.moves import queue
+import base64
+import binascii
+import collections
+import decimal
 from functools import partial
-import operator
-
-from boto3.dynamodb.conditions import Key, Attr
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, Binary
 from botocore.exceptions import ClientError
 
-from .config import get_config
+from .conditions import _bindable, build_condition, filter_condition, split_argument
+from .config import get_config, thaw
+from .registry import table_registry
 from .connection import get_connection
 from .exceptions import (
+    BatchRetriesExceededException,
+    QueryManyException,
     TableAlreadyExistsException,
     UpdateTableException,
     UnknownTableException,
+    ValidationError,
 )
 from .log import log_data
 
@@ -50,17 +65,40 @@ def _build_index_type(index_type):
 
 
 def _get_table_metadata(table_name):
-    config = get_config().yaml
+    """KeySchema, AttributeDefinitions and indexes of a table, precompiled by set_config when possible."""
+    config = get_config()
+    metadata = (config.get('table_metadata') or {}).get(table_name)
+    if metadata is not None:
+        return thaw(metadata)
 
     try:
-        keys_config = config['schemas'][table_name]
+        keys_config = config.yaml['schemas'][table_name]
     except KeyError:
         log_data('Unknown Table',
-                 extra=dict(table_name=table_name,
-                            config=config),
+                 extra=lambda: dict(table_name=table_name,
+                                    config=config.yaml),
                  logging_level='exception')
         raise UnknownTableException('Unknown table: %s' % table_name)
+    # Not precompiled: raise the error that made it fail to compile.
+    return _build_table_metadata(config.yaml, table_name, keys_config)
+
+
+def compile_table_metadata(yaml_config):
+    """
+    Table metadata (see _get_table_metadata) of every table in yaml_config, computed once by set_config.
+
+    Tables whose schema is invalid are left out, to fail only when used.
+    """
+    compiled = dict()
+    for table_name, keys_config in (yaml_config.get('schemas') or {}).items():
+        try:
+            compiled[table_name] = _build_table_metadata(yaml_config, table_name, keys_config)
+        except (KeyError, NotImplementedError, TypeError, ValueError):
+            continue
+    return compiled
+
 
+def _build_table_metadata(config, table_name, keys_config):
     metadata = dict(
         KeySchema=_build_key_schema(keys_config),
         AttributeDefinitions=_build_attribute_definitions(keys_config)
@@ -95,7 +133,7 @@ def _get_table_metadata(table_name):
     if global_indexes_config:
         gsis = []
         for gsi_config in global_indexes_config:
-            formatted = _get_or_default_throughput(gsi_config.get('throughput') or False)
+            formatted = _get_or_default_throughput(gsi_config.get('throughput') or False, yaml_config=config)
             provisioned_throughput = formatted['ProvisionedThroughput']
             gsis.append({
                 'IndexName': gsi_config['name'],
@@ -154,15 +192,9 @@ def get_reverse_table_name(table_name):
 
 
 def get_table_index(table_name, index_name):
-    """Given a table name and an index name, return the index."""
-    config = get_config()
-    all_indexes = (config.yaml.get('indexes', {}).items() +
-                   config.yaml.get('global_indexes', {}).items())
-    for config_table_name, table_indexes in all_indexes:
-        if config_table_name == table_name:
-            for index in table_indexes:
-                if index['name'] == index_name:
-                    return index
+    """Given a table name and an index name, return the index config, or None."""
+    index = table_registry(get_config()).index(table_name, index_name)
+    return index.config if index else None
 
 
 def get_table_columns(table_name):
@@ -180,6 +212,34 @@ def get_table_columns(table_name):
         raise UnknownTableException('Unknown table: %s' % table_name)
 
 
+# Ready-made Table handles of the shared default connection, keyed by (namespace, table_name).
+# Values are (connection, table): an entry is only used with the connection it was made from.
+# Tables of connections passed to get_table() are not cached, so those connections are freed with their users.
+_table_cache = dict()
+_table_cache_lock = threading.Lock()
+# With per_thread_connections, each thread caches the Table handles of its own connection, see _thread_table_cache.
+_thread_tables = threading.local()
+_table_cache_generation = 0
+
+
+def clear_table_cache():
+    """Drop all cached Table handles. Called by set_config() when namespace or endpoint change."""
+    global _table_cache_generation
+
+    with _table_cache_lock:
+        _table_cache.clear()
+        _table_cache_generation += 1
+
+
+def _thread_table_cache(dynamodb):
+    """This thread's Table handles, dropped when its connection changes or by clear_table_cache()."""
+    tables = _thread_tables.__dict__
+    if tables.get('connection') is not dynamodb or tables.get('generation') != _table_cache_generation:
+        tables.clear()
+        tables.update(connection=dynamodb, generation=_table_cache_generation, tables=dict())
+    return tables['tables']
+
+
 def get_table(table_name, connection=None):
     """Returns a dict with table and preloaded schema, plus columns.
 
@@ -188,21 +248,69 @@ def get_table(table_name, connection=None):
 
     This function avoids additional lookups when using a table.
     The columns included are only the optional columns you may find in some of the items.
+
+    Table handles of the default connection are cached per process (per thread with per_thread_connections),
+    so attributes loaded on them (e.g. item_count) are not refreshed automatically: call table.reload()
+    when you need current metadata. With connection, a new handle is returned every time.
     """
-    if table_name not in list_table_names():
+    config = get_config()
+    if table_name not in config.table_names:
         raise UnknownTableException('Unknown table: %s' % table_name)
 
-    dynamodb = connection or get_connection()
-    return dynamodb.Table(
-        get_table_name(table_name),
-    )
+    if connection is not None:
+        return connection.Table(config.namespace + table_name)
+
+    dynamodb = get_connection()
+    cache_key = (config.namespace, table_name)
+    if config.get('per_thread_connections'):
+        tables = _thread_table_cache(dynamodb)
+        if cache_key not in tables:
+            tables[cache_key] = dynamodb.Table(config.namespace + table_name)
+        return tables[cache_key]
+
+    cached = _table_cache.get(cache_key)
+    if cached is None or cached[0] is not dynamodb:
+        with _table_cache_lock:
+            cached = _table_cache.get(cache_key)
+            if cached is None or cached[0] is not dynamodb:
+                cached = _table_cache[cache_key] = (
+                    dynamodb,
+                    dynamodb.Table(config.namespace + table_name),
+                )
+    return cached[1]
 
 
 def _maybe_table_from_name(table_name_or_class):
     return get_table(table_name_or_class) if isinstance(table_name_or_class, six.string_types) else table_name_or_class
 
+def projection_kwargs(attributes):
+    """
+    Build the ProjectionExpression arguments that make DynamoDB return only some attributes.
+
+    Every path element is aliased through ExpressionAttributeNames, so reserved words are safe and
+    nested paths may be given dotted (e.g. 'address.city'). The placeholders use a '#p' prefix so
+    boto3 can merge its own generated '#n' names for key and filter conditions into the same dict.
+
+    :param attributes: iterable of attribute names or dotted paths
+    :return: dict of ProjectionExpression and ExpressionAttributeNames to pass to boto3
+    """
+    placeholders = {}
+    paths = []
+    for attribute in attributes:
+        path = []
+        for name in attribute.split('.'):
+            if name not in placeholders:
+                placeholders[name] = '#p%d' % len(placeholders)
+            path.append(placeholders[name])
+        paths.append('.'.join(path))
+    return dict(
+        ProjectionExpression=', '.join(paths),
+        ExpressionAttributeNames=dict((placeholder, name) for name, placeholder in placeholders.items()),
+    )
+
+
 def query_table(table_name_or_class, query_index=None, descending=False, limit=None,
-                exclusive_start_key=None, filter_expression=None, **query_keys):
+                exclusive_start_key=None, filter_expression=None, attributes=None, **query_keys):
     """
     Friendly version to query a table using boto3's interface
 
@@ -211,55 +319,20 @@ def query_table(table_name_or_class, query_index=None, descending=False, limit=N
     :param descending: (boolean, optional) sort in descending order (default: False)
     :param limit: (integer, optional) limit the number of results directly in the query to dynamodb
     :param exclusive_start_key: (dictionary) resume from the prior query's LastEvaluatedKey
-    :param filter_expression: (dictionary, optional) Dictionary of filter attributes, expressed same as query_keys
+    :param filter_expression: (optional) filter attributes, expressed same as query_keys, in a dictionary
+                              (ANDed together) or a Q object (combined with &, | and ~), see cc_dynamodb3.conditions
+    :param attributes: (list, optional) only return these attributes (ProjectionExpression)
     :param query_keys: query arguments, syntax: attribute__gte=123 (similar to boto2's interface)
     :return: boto3 query response
     """
-    # filter_expression is limited in its expressiveness relative to what boto3 is capable.
-    # Only arity 1 conditions are supported, e.g., 'eq', 'gt', 'gte', 'lt', 'lte', 'begins_with', 'contains',
-    # 'is_in', 'ne'. Arity 0 conditions ('not_exists', 'size') and arity 2 conditions ('between') are not supported.
-    # Multiple expressions are all ANDed together. There is no option for ORing or creating more complex
-    # expressions with combinations of AND/OR/NOT.
-
-    keys = []
-    for key_name, value in query_keys.items():
-        key_name_and_operator = key_name.split('__')
-        if len(key_name_and_operator) == 1:
-            op = 'eq'
-        else:
-            key_name = key_name_and_operator[0]
-            op = key_name_and_operator[1]
-
-        if isinstance(value, bool):  # Starting boto3, conversion from True to Decimal('1') is not automatic.
-            value = int(value)
-
-        keys.append(
-            getattr(Key(key_name), op)(value)
-        )
-
     query_kwargs = dict(
-        KeyConditionExpression=reduce(operator.and_, keys),
+        KeyConditionExpression=build_condition(Key, query_keys),
         ScanIndexForward=False if descending else True,
     )
 
-    if filter_expression is not None:
-        attrs = []
-        for key_name, value in filter_expression.items():
-            key_name_and_operator = key_name.split('__')
-            if len(key_name_and_operator) == 1:
-                op = 'eq'
-            else:
-                key_name = key_name_and_operator[0]
-                op = key_name_and_operator[1]
-
-            if isinstance(value, bool):  # See above
-                value = int(value)
-
-            attrs.append(
-                getattr(Attr(key_name), op)(value)
-            )
-        if attrs:
-            query_kwargs['FilterExpression'] = reduce(operator.and_, attrs)
+    condition = filter_condition(filter_expression)
+    if condition is not None:
+        query_kwargs['FilterExpression'] = condition
 
     if limit is not None:
         query_kwargs['Limit'] = limit
@@ -267,15 +340,29 @@ def query_table(table_name_or_class, query_index=None, descending=False, limit=N
         query_kwargs['IndexName'] = query_index
     if exclusive_start_key:
         query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    if attributes:
+        query_kwargs.update(projection_kwargs(attributes))
 
     return _maybe_table_from_name(table_name_or_class).query(**query_kwargs)
 
 
-def scan_table(table_name_or_class, exclusive_start_key=None, limit=None, **scan_kwargs):
+def scan_table(table_name_or_class, exclusive_start_key=None, limit=None, attributes=None, filter_expression=None,
+               **scan_kwargs):
+    """
+    Scan one page of a table.
+
+    :param filter_expression: (optional) dictionary of filter attributes or Q object, as in query_table
+    :param scan_kwargs: boto3 scan arguments
+    """
+    condition = filter_condition(filter_expression)
+    if condition is not None:
+        scan_kwargs['FilterExpression'] = condition
     if exclusive_start_key:
         scan_kwargs['ExclusiveStartKey'] = exclusive_start_key
     if limit is not None:
         scan_kwargs['Limit'] = limit
+    if attributes:
+        scan_kwargs.update(projection_kwargs(attributes))
     return _maybe_table_from_name(table_name_or_class).scan(**scan_kwargs)
 
 
@@ -310,6 +397,379 @@ def _retrieve_all_matching(query_or_scan_func, *args, **kwargs):
             break
 
 
+# Operators of query_table style arguments, as expression templates.
+_EXPRESSION_TEMPLATES = {
+    'eq': '{name} = {value}',
+    'ne': '{name} <> {value}',
+    'lt': '{name} < {value}',
+    'lte': '{name} <= {value}',
+    'gt': '{name} > {value}',
+    'gte': '{name} >= {value}',
+    'begins_with': 'begins_with({name}, {value})',
+    'contains': 'contains({name}, {value})',
+    'between': '{name} BETWEEN {value}_0 AND {value}_1',
+    'is_in': '{name} IN ({values})',
+}
+HASH_KEY_OPERATORS = frozenset(['eq'])
+RANGE_KEY_OPERATORS = frozenset(['eq', 'lt', 'lte', 'gt', 'gte', 'begins_with', 'between'])
+FILTER_OPERATORS = frozenset(_EXPRESSION_TEMPLATES)
+SIZE_OPERATORS = frozenset(['eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'between'])
+
+
+class PreparedQuery(object):
+    """
+    A query_table call compiled once, to run many times with different values.
+
+    The key conditions and filters are validated against the schema of the table, or of query_index, and
+    turned into expressions with placeholders when prepared. Running it only binds the values, once for all
+    the pages it reads:
+
+        prepared = PreparedQuery('caregivers', key_ops=['agency_id', 'created__gte'], filter_ops=['is_active'])
+        for row, metadata in prepared.query_all(agency_id=1, created__gte=1500000000, is_active=True):
+            ...
+
+    See DynamoDBModel.prepare_query for models.
+    """
+
+    def __init__(self, table_name, query_index=None, key_ops=(), filter_ops=(), descending=False, attributes=None):
+        """
+        :param table_name: (string) un-prefixed table name
+        :param query_index: (string, optional) name of a GSI or LSI
+        :param key_ops: key conditions, in query_table syntax without values, e.g. ['agency_id', 'created__gte']
+        :param filter_ops: filters, in the same syntax, e.g. ['name__begins_with']
+        :param descending: (boolean, optional) sort in descending order
+        :param attributes: (list, optional) only return these attributes (ProjectionExpression)
+        """
+        self.table_name = table_name
+        self.query_index = query_index
+        hash_key, range_key = self._key_names(table_name, query_index)
+        self.key_names = [name for name in (hash_key, range_key) if name]
+
+        self._placeholders = dict()  # attribute name: '#a<n>', one per name
+        # [(argument, operator, value placeholder)]
+        self._conditions = []
+        key_conditions = [self._add_condition(argument, 'k', i, hash_key, range_key)
+                          for i, argument in enumerate(key_ops)]
+        if not any(argument == hash_key or argument == hash_key + '__eq' for argument in key_ops):
+            raise ValidationError('Query of %s needs a condition on its hash key %s' % (table_name, hash_key))
+        # [(expression template, value placeholder)]
+        self._filters = [(self._add_condition(argument, 'f', len(key_ops) + i, hash_key, range_key),
+                          self._conditions[-1][2])
+                         for i, argument in enumerate(filter_ops)]
+        arguments = [argument for argument, op, placeholder in self._conditions]
+        if len(set(arguments)) != len(arguments):
+            raise ValidationError('Duplicate conditions: %s' % ', '.join(arguments))
+
+        self._request = dict(
+            KeyConditionExpression=' AND '.join(key_conditions),
+            ScanIndexForward=not descending,
+        )
+        if query_index:
+            self._request['IndexName'] = query_index
+        if attributes:
+            self._request['ProjectionExpression'] = ', '.join(self._path(attribute) for attribute in attributes)
+        self._request['ExpressionAttributeNames'] = dict(
+            (placeholder, name) for name, placeholder in self._placeholders.items())
+        # IN takes one placeholder per value: only known when values are bound.
+        if not any(op == 'is_in' for argument, op, placeholder in self._conditions):
+            self._set_filter_expression(self._request, dict())
+
+    @staticmethod
+    def _key_names(table_name, query_index):
+        """Return (hash key, range key or None) of the table, or of query_index."""
+        return table_registry(get_config()).hash_and_range_keys(table_name, query_index)
+
+    def _add_condition(self, argument, prefix, i, hash_key, range_key):
+        """Register a condition, return its expression template ('{values}' still to fill for is_in)."""
+        name, op, size = split_argument(argument)
+        if size:
+            if prefix == 'k' or name in (hash_key, range_key):
+                raise ValidationError('%s: size() is only supported in filters' % argument)
+            allowed = SIZE_OPERATORS
+        elif prefix == 'k':
+            if name == hash_key:
+                allowed = HASH_KEY_OPERATORS
+            elif name == range_key:
+                allowed = RANGE_KEY_OPERATORS
+            else:
+                raise ValidationError('%s is not a key of %s' % (name, self.query_index or self.table_name))
+        else:
+            if name in (hash_key, range_key):
+                raise ValidationError('Cannot filter on the key %s, use a key condition' % name)
+            allowed = FILTER_OPERATORS
+        if op not in allowed:
+            raise ValidationError('Unsupported operator %s for %s' % (op, name))
+
+        placeholder = ':%s%d' % (prefix, i)
+        self._conditions.append((argument, op, placeholder))
+        path = 'size(%s)' % self._path(name) if size else self._path(name)
+        return _EXPRESSION_TEMPLATES[op].replace('{name}', path).replace('{value}', placeholder)
+
+    def _path(self, attribute):
+        """'address.city' -> '#a0.#a1'"""
+        path = []
+        for name in attribute.split('.'):
+            if name not in self._placeholders:
+                self._placeholders[name] = '#a%d' % len(self._placeholders)
+            path.append(self._placeholders[name])
+        return '.'.join(path)
+
+    def _set_filter_expression(self, request, in_placeholders):
+        if self._filters:
+            request['FilterExpression'] = ' AND '.join(
+                template.replace('{values}', ', '.join(in_placeholders.get(placeholder, ())))
+                for template, placeholder in self._filters)
+
+    def bind(self, values):
+        """
+        Return the query kwargs with values bound, reusable for every page.
+
+        :param values: one value per condition, named like the conditions, e.g. dict(created__gte=123)
+        """
+        missing = [argument for argument, op, placeholder in self._conditions if argument not in values]
+        unknown = set(values) - set(argument for argument, op, placeholder in self._conditions)
+        if missing or unknown:
+            raise ValidationError('Missing values: %s. Unknown values: %s' %
+                                  (', '.join(missing) or 'none', ', '.join(sorted(unknown)) or 'none'))
+
+        request = dict(self._request)
+        bound = dict()
+        in_placeholders = dict()
+        for argument, op, placeholder in self._conditions:
+            value = values[argument]
+            if op == 'between':
+                low, high = value
+                bound[placeholder + '_0'] = _bindable(low)
+                bound[placeholder + '_1'] = _bindable(high)
+            elif op == 'is_in':
+                in_values = list(value)
+                if not in_values:
+                    raise ValidationError('%s needs at least one value' % argument)
+                in_placeholders[placeholder] = ['%s_%d' % (placeholder, i) for i in range(len(in_values))]
+                for in_placeholder, in_value in zip(in_placeholders[placeholder], in_values):
+                    bound[in_placeholder] = _bindable(in_value)
+            else:
+                bound[placeholder] = _bindable(value)
+        if in_placeholders:
+            self._set_filter_expression(request, in_placeholders)
+        request['ExpressionAttributeValues'] = bound
+        return request
+
+    def query_page(self, bound, limit=None, exclusive_start_key=None):
+        """Query one page, with kwargs from bind(). Returns the query response, like query_table."""
+        request = dict(bound)
+        if limit is not None:
+            request['Limit'] = limit
+        if exclusive_start_key:
+            request['ExclusiveStartKey'] = exclusive_start_key
+        return self._send(request)
+
+    def _send(self, request):
+        return get_table(self.table_name).query(**request)
+
+    def query(self, limit=None, exclusive_start_key=None, **values):
+        """Query one page. Same as query_table with the prepared arguments."""
+        return self.query_page(self.bind(values), limit=limit, exclusive_start_key=exclusive_start_key)
+
+    def query_all(self, limit=None, **values):
+        """Yield (row, metadata) of all pages. Same as query_all_in_table with the prepared arguments."""
+        return _retrieve_all_matching(partial(self.query_page, self.bind(values)), limit=limit)
+
+
+PAGINATION_MAX_PAGE_SIZE = 1000
+
+
+def next_page_limit(remaining_count, returned_count, scanned_count, previous_limit):
+    """
+    Return the Limit of the next query page, when remaining_count more items are needed.
+
+    Limit counts items read, before any filter: scale remaining_count by the share of items read so far
+    that passed the filter (returned_count out of scanned_count), so that selective filters take fewer
+    round trips. Without a filter, this is remaining_count. Never more than PAGINATION_MAX_PAGE_SIZE.
+    """
+    if not scanned_count:
+        limit = remaining_count
+    elif not returned_count:
+        limit = max(previous_limit * 2, remaining_count)
+    else:
+        limit = int(math.ceil(remaining_count * float(scanned_count) / returned_count))
+    return min(limit, PAGINATION_MAX_PAGE_SIZE)
+
+
+def _encode_key_value(value):
+    if isinstance(value, Binary):
+        value = value.value
+    elif isinstance(value, six.string_types):
+        return ['S', value]
+    if isinstance(value, six.binary_type):
+        return ['B', base64.b64encode(value).decode('ascii')]
+    if isinstance(value, six.integer_types + (float, decimal.Decimal)) and not isinstance(value, bool):
+        return ['N', str(value)]
+    raise ValidationError('Cannot encode key value %r' % (value,))
+
+
+_KEY_VALUE_DECODERS = {
+    'S': lambda value: value,
+    'N': DYNAMODB_CONTEXT.create_decimal,
+    'B': lambda value: Binary(base64.b64decode(value)),
+}
+
+
+def encode_lek(last_evaluated_key):
+    """
+    Encode a LastEvaluatedKey as an opaque, URL-safe string, e.g. for the next page link of an API.
+    Returns None for None. See decode_lek.
+    """
+    if not last_evaluated_key:
+        return None
+    encoded = dict((name, _encode_key_value(value)) for name, value in last_evaluated_key.items())
+    token = base64.urlsafe_b64encode(json.dumps(encoded, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return token.decode('ascii').rstrip('=')
+
+
+def decode_lek(token):
+    """Decode a string from encode_lek back to a LastEvaluatedKey. Raises ValidationError if it is invalid."""
+    if not token:
+        return None
+    try:
+        padded = str(token) + '=' * (-len(token) % 4)
+        encoded = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return dict((name, _KEY_VALUE_DECODERS[type_code](value))
+                    for name, (type_code, value) in encoded.items())
+    except (AttributeError, KeyError, TypeError, ValueError, binascii.Error, UnicodeError):
+        raise ValidationError('Invalid pagination token: %r' % (token,))
+
+
+# Events emitted by _iterate_in_threads
+TASK_ITEM = 'item'
+TASK_ERROR = 'error'
+TASK_DONE = 'done'
+# How often blocked workers check whether the consumer went away.
+_WORKER_POLL_SECONDS = 0.1
+
+
+def _iterate_in_threads(tasks, max_workers, buffer_size):
+    """
+    Run iterables on a bounded pool of worker threads and merge what they produce.
+
+    :param tasks: list of callables, each returning an iterable
+    :param max_workers: number of worker threads
+    :param buffer_size: max values waiting for the consumer; workers block when it is full
+    :return: generator of (task_index, event, value) tuples, where event is
+             TASK_ITEM (value produced), TASK_ERROR (value is sys.exc_info()) or TASK_DONE.
+             Exactly one TASK_ERROR or TASK_DONE is emitted per task.
+
+    Closing the generator stops the workers.
+    """
+    pending = queue.Queue()
+    for task_index, task in enumerate(tasks):
+        pending.put((task_index, task))
+    results = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+
+    def put(result):
+        while not stopped.is_set():
+            try:
+                results.put(result, timeout=_WORKER_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work():
+        while not stopped.is_set():
+            try:
+                task_index, task = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                for value in task():
+                    if not put((task_index, TASK_ITEM, value)):
+                        return
+            except Exception:
+                put((task_index, TASK_ERROR, sys.exc_info()))
+            else:
+                put((task_index, TASK_DONE, None))
+
+    workers = [threading.Thread(target=work) for _ in range(min(max_workers, len(tasks)))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            result = results.get()
+            if result[1] != TASK_ITEM:
+                remaining -= 1
+            yield result
+    finally:
+        stopped.set()
+
+
+def _scan_segment_pages(scan_func, segment, total_segments, exclusive_start_key, scan_kwargs):
+    """Yield (exclusive_start_key, response) for each page of one scan segment."""
+    while True:
+        response = scan_func(exclusive_start_key=exclusive_start_key,
+                             Segment=segment, TotalSegments=total_segments, **scan_kwargs)
+        yield exclusive_start_key, response
+        exclusive_start_key = response.get('LastEvaluatedKey')
+        if not exclusive_start_key:
+            return
+
+
+def _parallel_scan(table_name_or_class, segments, limit=None, paginate=False,
+                   exclusive_start_key=None, buffer_size=None, scan_func=None, **scan_kwargs):
+    """
+    Scan a table with segments parallel Scan calls (Segment/TotalSegments). Used by scan_all_in_table.
+
+    Rows are yielded as (row, metadata), or (row, metadata, resume_keys) when paginate.
+    resume_keys maps each segment to the ExclusiveStartKey of the page being yielded,
+    or None once the segment is exhausted; segments still on their first page are absent. It is the same dict on every row, updated
+    in place: copy it to checkpoint, and pass it back as exclusive_start_key to resume.
+    Resuming is at-least-once: rows of a partially consumed page are yielded again.
+
+    scan_func, if given, makes one Scan call instead of scan_table (see client_engine.scan_all_in_table).
+    """
+    if scan_func is None:
+        scan_func = partial(scan_table, _maybe_table_from_name(table_name_or_class))
+    resume_keys = dict(exclusive_start_key or {})
+    for segment in resume_keys:
+        if not 0 <= segment < segments:
+            raise ValueError('Invalid segment %s for %s segments' % (segment, segments))
+
+    segments_to_scan = [segment for segment in range(segments)
+                        if segment not in resume_keys or resume_keys[segment] is not None]
+    tasks = [partial(_scan_segment_pages, scan_func, segment, segments, resume_keys.get(segment), scan_kwargs)
+             for segment in segments_to_scan]
+
+    total_found = 0
+    results = _iterate_in_threads(tasks, max_workers=len(tasks), buffer_size=buffer_size or 2 * segments)
+    try:
+        for task_index, event, value in results:
+            segment = segments_to_scan[task_index]
+            if event == TASK_ERROR:
+                six.reraise(*value)
+            if event == TASK_DONE:
+                resume_keys[segment] = None
+                continue
+
+            page_start_key, response = value
+            if page_start_key is not None:  # None means the segment is done, absent means from the start
+                resume_keys[segment] = page_start_key
+            metadata = response.get('ResponseMetadata', {})
+            for row in response['Items']:
+                if paginate:
+                    yield row, metadata, resume_keys
+                else:
+                    yield row, metadata
+                total_found += 1
+                if limit and total_found == limit:
+                    return
+    finally:
+        results.close()
+
+
 def scan_all_in_table(table_name_or_class, *args, **kwargs):
     """
     Scan all records in a table. May perform multiple calls to DynamoDB.
@@ -317,11 +777,18 @@ def scan_all_in_table(table_name_or_class, *args, **kwargs):
     DynamoDB only returns up to 1MB of data per scan, so we need to keep scanning,
     using LastEvaluatedKey.
 
+    With segments=N, the table is scanned as N segments in parallel threads, and rows are
+    yielded in no particular order. See _parallel_scan for paginate and exclusive_start_key,
+    which then hold per-segment resume keys.
+
     :param table_name_or_class: 'some_table' or get_table('some_table')
     :param args: see args accepted by boto3 dynamodb scan
     :param kwargs: see kwargs accepted by boto3 dynamodb scan
     :return: list of records as tuples (row, metadata)
     """
+    segments = kwargs.pop('segments', None)
+    if segments:
+        return _parallel_scan(table_name_or_class, segments, **kwargs)
     scan_partial = partial(scan_table, table_name_or_class)
     return _retrieve_all_matching(scan_partial, *args, **kwargs)
 
@@ -342,15 +809,178 @@ def query_all_in_table(table_name_or_class, *args, **kwargs):
     return _retrieve_all_matching(query_partial, *args, **kwargs)
 
 
+# Default worker threads for query_many_in_table, the size of botocore's default connection pool.
+QUERY_MANY_MAX_WORKERS = 10
+
+
+def _query_many(query_all_func, queries, max_workers=None, ordered=False, buffer_size=None):
+    """
+    Run query_all_func(**query_kwargs) for each of queries on a pool of threads. See query_many_in_table.
+    """
+    queries = list(queries)
+    if not queries:
+        return
+    max_workers = max_workers or QUERY_MANY_MAX_WORKERS
+    tasks = [partial(query_all_func, **query_kwargs) for query_kwargs in queries]
+    errors = dict()
+
+    # With ordered, rows of queries after the one being yielded wait here until their turn.
+    buffered = collections.defaultdict(list)
+    finished = set()
+    next_index = 0
+
+    results = _iterate_in_threads(tasks, max_workers=max_workers, buffer_size=buffer_size or 2 * max_workers)
+    try:
+        for query_index, event, value in results:
+            if event == TASK_ERROR:
+                errors[query_index] = value[1]
+            if not ordered:
+                if event == TASK_ITEM:
+                    yield (query_index,) + tuple(value)
+                continue
+
+            if event == TASK_ITEM:
+                if query_index == next_index:
+                    yield (query_index,) + tuple(value)
+                else:
+                    buffered[query_index].append(value)
+                continue
+
+            finished.add(query_index)
+            while next_index in finished:
+                next_index += 1
+                for value in buffered.pop(next_index, ()):
+                    yield (next_index,) + tuple(value)
+    finally:
+        results.close()
+
+    if errors:
+        raise QueryManyException('%s of %s queries failed: %s' % (
+            len(errors), len(queries),
+            '; '.join('query %s: %r' % (index, errors[index]) for index in sorted(errors))), errors)
+
+
+def query_many_in_table(table_name_or_class, queries, max_workers=None, ordered=False, buffer_size=None):
+    """
+    Run many queries on a bounded pool of threads, e.g. one per hash key, streaming rows as they arrive.
+
+    The threads share the connection, and its pool: see set_config(max_pool_connections=...).
+    A failed query does not stop the others. Once every query is done, QueryManyException is raised
+    if any failed, with exception.errors mapping the index of each failed query to its exception.
+
+    :param table_name_or_class: 'some_table' or get_table('some_table')
+    :param queries: list of dictionaries of query_all_in_table kwargs, e.g. [dict(agency_id=1), dict(agency_id=2)]
+    :param max_workers: (integer, optional) number of threads, default QUERY_MANY_MAX_WORKERS
+    :param ordered: (boolean, optional) yield all rows of queries[0], then queries[1], etc.
+                    Rows of later queries are held in memory until their turn.
+    :param buffer_size: (integer, optional) rows waiting for the consumer before workers block
+    :return: generator of (query index, row, metadata) tuples
+    """
+    table = _maybe_table_from_name(table_name_or_class)
+    return _query_many(partial(query_all_in_table, table), queries, max_workers=max_workers, ordered=ordered,
+                       buffer_size=buffer_size)
+
+
+# DynamoDB limits for BatchGetItem and BatchWriteItem.
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+# Retries for UnprocessedKeys / UnprocessedItems, with exponential backoff and full jitter.
+BATCH_MAX_RETRIES = 8
+BATCH_RETRY_BASE_SECONDS = 0.05
+BATCH_RETRY_MAX_SECONDS = 5
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _batch_retry_sleep(attempt):
+    time.sleep(random.uniform(0, min(BATCH_RETRY_MAX_SECONDS, BATCH_RETRY_BASE_SECONDS * 2 ** attempt)))
+
+
+def batch_get_from_table(table_name_or_class, keys, consistent_read=False):
+    """
+    Get items by primary key via BatchGetItem. May perform multiple calls to DynamoDB.
+
+    Keys are sent in chunks of BATCH_GET_MAX_KEYS; UnprocessedKeys are retried with backoff.
+    Items are yielded as they arrive, in no particular order. Keys not found are skipped.
+
+    :param table_name_or_class: 'some_table' or get_table('some_table')
+    :param keys: list of primary key dictionaries, without duplicates
+    :param consistent_read: (boolean, optional) use strongly consistent reads
+    :return: generator of records as tuples (row, metadata)
+    """
+    table = _maybe_table_from_name(table_name_or_class)
+    for chunk in _chunks(list(keys), BATCH_GET_MAX_KEYS):
+        request_items = {table.name: dict(Keys=chunk, ConsistentRead=consistent_read)}
+        attempt = 0
+        while request_items:
+            response = table.meta.client.batch_get_item(RequestItems=request_items)
+            metadata = response.get('ResponseMetadata', {})
+            for row in response.get('Responses', {}).get(table.name, []):
+                yield row, metadata
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            if attempt >= BATCH_MAX_RETRIES:
+                log_data('batch_get_from_table: retries exceeded for %s' % table.name,
+                         extra=dict(unprocessed_count=len(request_items[table.name]['Keys'])),
+                         logging_level='error')
+                raise BatchRetriesExceededException('Unprocessed keys after %s retries' % attempt,
+                                                    unprocessed=request_items)
+            _batch_retry_sleep(attempt)
+            attempt += 1
+
+
+def batch_write_to_table(table_name_or_class, put_items=None, delete_keys=None):
+    """
+    Put and delete items via BatchWriteItem. May perform multiple calls to DynamoDB.
+
+    Requests are sent in chunks of BATCH_WRITE_MAX_ITEMS; UnprocessedItems are retried with backoff.
+    DynamoDB rejects a batch with two requests for the same primary key, so callers must dedupe.
+
+    :param table_name_or_class: 'some_table' or get_table('some_table')
+    :param put_items: list of items (dictionaries) to put
+    :param delete_keys: list of primary key dictionaries to delete
+    :return: list of response metadata, one per call to DynamoDB
+    """
+    table = _maybe_table_from_name(table_name_or_class)
+    write_requests = ([dict(PutRequest=dict(Item=item)) for item in put_items or []] +
+                      [dict(DeleteRequest=dict(Key=key)) for key in delete_keys or []])
+    all_metadata = []
+    for chunk in _chunks(write_requests, BATCH_WRITE_MAX_ITEMS):
+        request_items = {table.name: chunk}
+        attempt = 0
+        while request_items:
+            response = table.meta.client.batch_write_item(RequestItems=request_items)
+            all_metadata.append(response.get('ResponseMetadata', {}))
+
+            request_items = response.get('UnprocessedItems')
+            if not request_items:
+                break
+            if attempt >= BATCH_MAX_RETRIES:
+                log_data('batch_write_to_table: retries exceeded for %s' % table.name,
+                         extra=dict(unprocessed_count=len(request_items[table.name])),
+                         logging_level='error')
+                raise BatchRetriesExceededException('Unprocessed items after %s retries' % attempt,
+                                                    unprocessed=request_items)
+            _batch_retry_sleep(attempt)
+            attempt += 1
+    return all_metadata
+
+
 def list_table_names():
     """List known table names from configuration, without namespace."""
-    return get_config().yaml['schemas'].keys()
+    return get_config().table_names
 
 
-def _get_or_default_throughput(throughput):
+def _get_or_default_throughput(throughput, yaml_config=None):
     if throughput is False:
-        config = get_config()
-        throughput = config.yaml['default_throughput']
+        if yaml_config is None:
+            yaml_config = get_config().yaml
+        throughput = yaml_config['default_throughput']
 
     if not throughput:
         return dict()
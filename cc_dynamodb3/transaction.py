@@ -0,0 +1,217 @@
+"""
+All or nothing writes and consistent reads across items and tables, with TransactWriteItems and TransactGetItems.
+
+    with Transaction() as transaction:
+        transaction.save(agency)
+        transaction.save(agency_summary)
+        transaction.delete(old_caregiver)
+        transaction.increment(Agency, dict(agency_id=1), 'caregiver_count', by=-1)
+        transaction.condition_check(Office, dict(office_id=2), Attr('is_active').eq(True))
+    # On exit, everything is written in one request, or nothing is if any condition fails.
+
+    agency, summary = transact_get([(Agency, dict(agency_id=1)), (AgencySummary, dict(agency_id=1))])
+
+A transaction holds up to TRANSACT_MAX_ITEMS actions, each on a different item.
+Requests go through the low-level client, like client_engine.
+"""
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from botocore.exceptions import ClientError
+
+from . import client_engine, exceptions
+from .cache import item_cache_key
+from .table import get_table_name
+
+
+TRANSACT_MAX_ITEMS = 100
+
+
+class Transaction(object):
+    """Builds one TransactWriteItems request. Use as a context manager, see the module docstring."""
+
+    def __init__(self, client_request_token=None):
+        """
+        :param client_request_token: (string, optional) idempotency token: retrying a committed
+            transaction with the same token, within 10 minutes, does not write it again.
+        """
+        self.client_request_token = client_request_token
+        self._actions = []
+        self._identities = set()
+        self._on_commit = []
+        self._versioned_models = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._rollback()
+        return False
+
+    def __len__(self):
+        return len(self._actions)
+
+    def _add(self, action, model_class, key, request, on_commit=None):
+        if len(self._actions) >= TRANSACT_MAX_ITEMS:
+            raise ValueError('A transaction can hold at most %s actions' % TRANSACT_MAX_ITEMS)
+        identity = item_cache_key(model_class.TABLE_NAME, key)
+        if identity in self._identities:
+            raise ValueError('%s %s is already in this transaction' % (model_class.__name__, key))
+        self._identities.add(identity)
+
+        request['TableName'] = get_table_name(model_class.TABLE_NAME)
+        if 'Key' in request:
+            request['Key'] = client_engine.serialize_item(request['Key'])
+        if 'Item' in request:
+            request['Item'] = client_engine.serialize_item(request['Item'])
+        if 'ExpressionAttributeValues' in request:
+            request['ExpressionAttributeValues'] = client_engine.serialize_item(request['ExpressionAttributeValues'])
+        self._actions.append({action: request})
+        if on_commit:
+            self._on_commit.append(on_commit)
+
+    def save(self, model, overwrite=False):
+        """
+        Add model.save(overwrite): an Update of its unsaved fields, or a Put. Nothing is added if it has no changes.
+
+        VERSION_FIELD conditions apply, and fail the whole transaction.
+        """
+        is_update, has_changed_primary_key = model._before_save(overwrite)
+        if is_update:
+            request = model._update_item_kwargs(skip_primary_key_check=has_changed_primary_key)
+            if request is None:
+                return
+            action = 'Update'
+        else:
+            request = model._put_item_kwargs(overwrite=overwrite)
+            action = 'Put'
+        if model.VERSION_FIELD:
+            self._versioned_models.append(model)
+        request.pop('ReturnValues')
+        self._add(action, model.__class__, model.get_primary_key(), request,
+                  on_commit=lambda: model._after_save(dict(), overwrite, is_update, 'NONE'))
+
+    def delete(self, model):
+        """Add model.delete(). Already deleted models are skipped."""
+        if model._is_deleted:
+            return
+
+        def on_commit():
+            model._invalidate_cached_item()
+            model._is_deleted = True
+
+        self._add('Delete', model.__class__, model.get_primary_key(), dict(Key=model.get_primary_key()),
+                  on_commit=on_commit)
+
+    def condition_check(self, model_class, key, condition):
+        """
+        Only commit if the item with primary key key meets condition, without writing it.
+
+        :param condition: boto3 condition, e.g. Attr('is_active').eq(True) or Attr('agency_id').exists()
+        """
+        if not isinstance(condition, ConditionBase):
+            raise ValueError('condition must be a boto3.dynamodb.conditions condition, got %r' % (condition,))
+        built = ConditionExpressionBuilder().build_expression(condition)
+        request = dict(Key=key, ConditionExpression=built.condition_expression,
+                       ExpressionAttributeNames=built.attribute_name_placeholders)
+        if built.attribute_value_placeholders:
+            request['ExpressionAttributeValues'] = built.attribute_value_placeholders
+        self._add('ConditionCheck', model_class, key, request)
+
+    def increment(self, model_class, key, field_name, by=1):
+        """Add model_class.increment(key, field_name, by). The item must exist."""
+        self._add('Update', model_class, key, model_class._increment_kwargs(key, field_name, by),
+                  on_commit=lambda: model_class._invalidate_cached_key(key))
+
+    def add_to_set(self, model_class, key, field_name, values):
+        """Add model_class.add_to_set(key, field_name, values). The item must exist."""
+        self._add('Update', model_class, key, model_class._set_update_kwargs(key, field_name, 'ADD', values),
+                  on_commit=lambda: model_class._invalidate_cached_key(key))
+
+    def remove_from_set(self, model_class, key, field_name, values):
+        """Add model_class.remove_from_set(key, field_name, values). The item must exist."""
+        self._add('Update', model_class, key, model_class._set_update_kwargs(key, field_name, 'DELETE', values),
+                  on_commit=lambda: model_class._invalidate_cached_key(key))
+
+    def _rollback(self):
+        for model in self._versioned_models:
+            model._restore_version()
+        self._reset()
+
+    def _reset(self):
+        self._actions = []
+        self._identities = set()
+        self._on_commit = []
+        self._versioned_models = []
+
+    def commit(self):
+        """
+        Send all actions in one TransactWriteItems request, and start over with an empty transaction.
+
+        Raises TransactionCanceledException, with the reason of each action, if any condition failed.
+
+        :return: the transact_write_items response, or None if there was nothing to write
+        """
+        if not self._actions:
+            return None
+        request = dict(TransactItems=self._actions)
+        if self.client_request_token:
+            request['ClientRequestToken'] = self.client_request_token
+        try:
+            response = client_engine._client().transact_write_items(**request)
+        except ClientError as e:
+            self._rollback()
+            _raise_if_canceled(e)
+            raise
+
+        on_commit = self._on_commit
+        self._reset()
+        for callback in on_commit:
+            callback()
+        return response
+
+
+def _raise_if_canceled(client_error):
+    e = client_error
+    if getattr(e, 'response', None) and e.response.get('Error', {}).get('Code') == 'TransactionCanceledException':
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        raise exceptions.TransactionCanceledException(str(e), reasons)
+
+
+def transact_get(gets, readonly=False):
+    """
+    Read up to TRANSACT_MAX_ITEMS items, from any tables, as of one point in time (TransactGetItems).
+
+    :param gets: list of (model class, primary key dictionary)
+    :param readonly: return ReadOnlyRows instead of models
+    :return: list of models, in the order of gets, None for items not found
+    """
+    gets = list(gets)
+    if len(gets) > TRANSACT_MAX_ITEMS:
+        raise ValueError('transact_get reads at most %s items, got %s' % (TRANSACT_MAX_ITEMS, len(gets)))
+    if not gets:
+        return []
+    for model_class, key in gets:
+        model_class._validate_primary_key(key)
+
+    try:
+        response = client_engine._client().transact_get_items(TransactItems=[
+            dict(Get=dict(TableName=get_table_name(model_class.TABLE_NAME), Key=client_engine.serialize_item(key)))
+            for model_class, key in gets
+        ])
+    except ClientError as e:
+        _raise_if_canceled(e)
+        raise
+
+    metadata = response.get('ResponseMetadata')
+    models = []
+    for (model_class, key), item_response in zip(gets, response['Responses']):
+        wire_item = item_response.get('Item')
+        if not wire_item:
+            models.append(None)
+        elif readonly:
+            models.append(model_class.from_wire_readonly(wire_item, metadata))
+        else:
+            models.append(model_class.from_wire(wire_item, metadata))
+    return models
@@ -0,0 +1,212 @@
+import six
+import pytest
+
+if six.PY2:
+    pytest.skip('asyncio API is Python 3 only', allow_module_level=True)
+
+import asyncio
+import sys
+
+import mock
+
+from cc_dynamodb3 import aio
+from cc_dynamodb3.cache import clear_item_caches
+from cc_dynamodb3.exceptions import NotFound
+from cc_dynamodb3.models import ReadOnlyRow
+from cc_dynamodb3.session import Session, get_session
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+from .test_item_cache import FakeRedis, RedisCachedModel
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class CachedModel(HashOnlyModel):
+    CACHE_TTL = 60
+
+
+@pytest.fixture
+def in_memory():
+    transport = aio.InMemoryTransport()
+    aio.set_transport(transport)
+    yield transport
+    aio.set_transport(None)
+
+
+def test_asave_then_aget(in_memory):
+    obj = HashOnlyModel.build(agency_subdomain='metzler', external_id=123)
+    run(obj.asave())
+    assert obj._expect_exists_in_db
+
+    obj.external_id = 124
+    result = run(obj.asave())
+    assert result['Attributes']['external_id'] == 123
+
+    reloaded = run(HashOnlyModel.aget(agency_subdomain='metzler'))
+    assert reloaded.external_id == 124
+    assert reloaded.created == obj.created.replace(microsecond=0)
+
+
+def test_aget_not_found(in_memory):
+    with pytest.raises(NotFound):
+        run(HashOnlyModel.aget(agency_subdomain='missing'))
+
+
+def test_adelete(in_memory):
+    obj = HashOnlyModel.build(agency_subdomain='metzler')
+    run(obj.asave())
+
+    assert run(obj.adelete())
+    assert not run(obj.adelete())
+    assert run(obj.areload()) is None
+
+
+def test_aget_options(in_memory):
+    run(HashOnlyModel.build(agency_subdomain='metzler', external_id=123, name='Metzler').asave())
+
+    row = run(HashOnlyModel.aget(agency_subdomain='metzler', readonly=True))
+    assert isinstance(row, ReadOnlyRow) and row.external_id == 123
+
+    partial = run(HashOnlyModel.aget(agency_subdomain='metzler', attributes=['name']))
+    assert partial.name == 'Metzler'
+    assert partial.external_id is None
+    assert partial._loaded_fields == frozenset(['agency_subdomain', 'name'])
+
+    with Session() as session:
+        obj = run(HashOnlyModel.aget(agency_subdomain='metzler'))
+        assert run(HashOnlyModel.aget(agency_subdomain='metzler')) is obj
+        assert session.lookup(HashOnlyModel, dict(agency_subdomain='metzler')) is obj
+
+
+def test_aget_uses_the_item_cache(in_memory):
+    clear_item_caches()
+    run(CachedModel.build(agency_subdomain='metzler', external_id=123).asave())
+    run(CachedModel.aget(agency_subdomain='metzler'))
+    del in_memory.tables['hash_only']
+
+    assert run(CachedModel.aget(agency_subdomain='metzler')).external_id == 123
+    assert CachedModel.cache_stats()['hits'] == 1
+    with pytest.raises(NotFound):
+        run(CachedModel.aget(agency_subdomain='metzler', consistent_read=True))
+    clear_item_caches()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='contextvars is Python 3.7+')
+def test_sessions_are_per_task(in_memory):
+    run(HashOnlyModel.build(agency_subdomain='metzler', external_id=123).asave())
+    seen = dict()
+
+    async def with_session(opened, checked):
+        with Session() as session:
+            seen['first'] = await HashOnlyModel.aget(agency_subdomain='metzler')
+            opened.set()
+            await checked.wait()
+            assert get_session() is session
+
+    async def without_session(opened, checked):
+        await opened.wait()
+        seen['session'] = get_session()
+        seen['second'] = await HashOnlyModel.aget(agency_subdomain='metzler')
+        checked.set()
+
+    async def both():
+        opened, checked = asyncio.Event(), asyncio.Event()
+        await asyncio.gather(with_session(opened, checked), without_session(opened, checked))
+
+    run(both())
+    assert seen['session'] is None
+    assert seen['second'] is not seen['first']
+
+
+def test_aget_calls_blocking_caches_through_the_transport(in_memory):
+    redis = FakeRedis()
+    run(RedisCachedModel.build(agency_subdomain='metzler', external_id=123).asave())
+    with mock.patch('cc_dynamodb3.cache.get_redis_cache', return_value=redis), \
+            mock.patch.object(in_memory, 'run_blocking', wraps=in_memory.run_blocking) as run_blocking:
+        clear_item_caches()
+        run(RedisCachedModel.aget(agency_subdomain='metzler'))
+        assert len(redis.values) == 1
+        assert run(RedisCachedModel.aget(agency_subdomain='metzler')).external_id == 123
+        assert RedisCachedModel.cache_stats()['hits'] == 1
+        assert run_blocking.call_count == 3  # miss, set, hit
+    clear_item_caches()
+
+
+def test_aquery_on_index(in_memory):
+    for subdomain, external_id in (('metzler', 1), ('other', 1), ('third', 2)):
+        run(HashOnlyModel.build(agency_subdomain=subdomain, external_id=external_id).asave())
+
+    query = run(aio.alist(HashOnlyModel.aquery(external_id=1, query_index='HashOnlyExternalId')))
+    assert [obj.agency_subdomain for obj in query] == ['metzler', 'other']
+
+    query = run(aio.alist(HashOnlyModel.aquery(external_id=1, query_index='HashOnlyExternalId',
+                                               descending=True, limit=1)))
+    assert [obj.agency_subdomain for obj in query] == ['other']
+
+
+def test_aall_and_ascan_pages(in_memory):
+    for i in range(5):
+        run(HashOnlyModel.build(agency_subdomain='agency%s' % i).asave())
+
+    assert len(run(aio.alist(HashOnlyModel.aall()))) == 5
+    assert len(run(aio.alist(HashOnlyModel.aall(limit=2)))) == 2
+    assert [obj.agency_subdomain for obj in run(aio.alist(HashOnlyModel.aall(
+        filter_expression=dict(agency_subdomain__begins_with='agency3'))))] == ['agency3']
+    rows = run(aio.alist(HashOnlyModel.aall(readonly=True, attributes=['name'])))
+    assert all(isinstance(row, ReadOnlyRow) for row in rows)
+    assert set(rows[0].item) == set(['agency_subdomain'])
+    with pytest.raises(TypeError):
+        HashOnlyModel.aall(segments=2)
+
+    pages = []
+    response = run(in_memory.scan('hash_only', limit=2))
+    pages.append(response['Items'])
+    while 'LastEvaluatedKey' in response:
+        response = run(in_memory.scan('hash_only', limit=2, exclusive_start_key=response['LastEvaluatedKey']))
+        pages.append(response['Items'])
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_aquery_all_in_table_with_filter(in_memory):
+    for i in range(4):
+        run(HashOnlyModel.build(agency_subdomain='agency%s' % i, external_id=7, is_enabled=i % 2 == 0).asave())
+
+    rows = run(aio.alist(aio.aquery_all_in_table('hash_only', query_index='HashOnlyExternalId', external_id=7,
+                                                 filter_expression=dict(is_enabled=True))))
+    assert [row['agency_subdomain'] for row, metadata in rows] == ['agency0', 'agency2']
+
+
+def test_abatch_get(in_memory):
+    for i in range(5):
+        run(HashOnlyModel.build(agency_subdomain='agency%s' % i, external_id=i).asave())
+    keys = [dict(agency_subdomain=name) for name in ('agency3', 'missing', 'agency1')]
+
+    results = run(aio.alist(HashOnlyModel.abatch_get(keys, preserve_order=True)))
+    assert [obj.external_id for obj in results] == [3, 1]
+
+
+def test_executor_transport_uses_boto3():
+    aio.set_transport(aio.ExecutorTransport())
+    try:
+        HashOnlyModelFactory.create_table()
+        HashOnlyModelFactory(agency_subdomain='metzler', external_id=123)
+
+        obj = run(HashOnlyModel.aget(agency_subdomain='metzler'))
+        assert obj.external_id == 123
+        assert set(run(HashOnlyModel.aget(agency_subdomain='metzler', attributes=['name'])).item) == \
+            set(['agency_subdomain'])
+
+        obj.external_id = 124
+        run(obj.asave())
+        assert HashOnlyModel.get(agency_subdomain='metzler').external_id == 124
+
+        results = run(aio.alist(HashOnlyModel.abatch_get([dict(agency_subdomain='metzler')])))
+        assert len(results) == 1
+    finally:
+        aio.set_transport(None)
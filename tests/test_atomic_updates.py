@@ -0,0 +1,82 @@
+import pytest
+from schematics import types as fields
+
+from cc_dynamodb3.cache import clear_item_caches
+from cc_dynamodb3.cc_types import SetType
+from cc_dynamodb3.exceptions import NotFound, ValidationError
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class TaggedModel(HashOnlyModel):
+    CACHE_TTL = 60
+
+    tags = SetType(fields.StringType())
+
+
+class VersionedTaggedModel(TaggedModel):
+    VERSION_FIELD = 'version'
+
+    version = fields.IntType()
+
+
+KEY = dict(agency_subdomain='metzler')
+
+
+@pytest.fixture(autouse=True)
+def item():
+    clear_item_caches()
+    HashOnlyModelFactory.create_table()
+    TaggedModel.create(external_id=10, tags={'a'}, **KEY)
+
+
+def test_increment():
+    response = TaggedModel.increment(KEY, 'external_id')
+    assert not response.get('Attributes')
+    assert TaggedModel.increment(KEY, 'external_id', by=-3, return_new_value=True) == 8
+    assert TaggedModel.get(consistent_read=True, **KEY).external_id == 8
+
+
+def test_increment_invalidates_the_cache():
+    assert TaggedModel.get(**KEY).external_id == 10
+    TaggedModel.increment(KEY, 'external_id', by=5)
+    assert TaggedModel.get(**KEY).external_id == 15
+
+
+def test_add_to_and_remove_from_set():
+    assert TaggedModel.add_to_set(KEY, 'tags', ['b', 'c'], return_new_value=True) == {'a', 'b', 'c'}
+    assert TaggedModel.remove_from_set(KEY, 'tags', {'a', 'b'}, return_new_value=True) == {'c'}
+    assert TaggedModel.remove_from_set(KEY, 'tags', {'c'}, return_new_value=True) == set()
+    assert 'tags' not in TaggedModel.get(consistent_read=True, **KEY).item
+
+
+def test_missing_item():
+    with pytest.raises(NotFound):
+        TaggedModel.increment(dict(agency_subdomain='missing'), 'external_id')
+
+
+@pytest.mark.parametrize('method, field_name, value', [
+    ('increment', 'name', 1),
+    ('increment', 'agency_subdomain', 1),
+    ('increment', 'external_id', '1'),
+    ('increment', 'external_id', True),
+    ('add_to_set', 'external_id', ['a']),
+    ('add_to_set', 'tags', []),
+    ('remove_from_set', 'not_a_field', ['a']),
+])
+def test_validation(method, field_name, value):
+    with pytest.raises(ValidationError):
+        getattr(TaggedModel, method)(KEY, field_name, value)
+
+
+def test_invalid_key():
+    with pytest.raises(ValidationError):
+        TaggedModel.increment(dict(external_id=10), 'external_id')
+
+
+def test_versioned_model_version_is_incremented():
+    obj = VersionedTaggedModel.get(**KEY)
+    VersionedTaggedModel.add_to_set(KEY, 'tags', ['b'])
+    VersionedTaggedModel.remove_from_set(KEY, 'tags', ['a'])
+    assert VersionedTaggedModel.get(consistent_read=True, **KEY).version == 2
+    assert obj.version is None
@@ -0,0 +1,88 @@
+import mock
+import pytest
+
+from cc_dynamodb3.exceptions import BatchRetriesExceededException, ValidationError
+from cc_dynamodb3.table import batch_get_from_table
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+def _create_items(count):
+    HashOnlyModelFactory.create_table()
+    return [HashOnlyModelFactory(agency_subdomain='agency%03d' % i, external_id=i)
+            for i in range(count)]
+
+
+def test_batch_get_returns_models():
+    _create_items(3)
+
+    results = list(HashOnlyModel.batch_get([
+        dict(agency_subdomain='agency000'),
+        dict(agency_subdomain='agency002'),
+    ]))
+    assert set(obj.external_id for obj in results) == {0, 2}
+    assert all(isinstance(obj, HashOnlyModel) for obj in results)
+
+
+def test_batch_get_chunks_over_100_keys():
+    _create_items(150)
+    keys = [dict(agency_subdomain='agency%03d' % i) for i in range(150)]
+
+    results = list(HashOnlyModel.batch_get(keys))
+    assert len(results) == 150
+
+
+def test_batch_get_preserve_order_skips_missing_and_keeps_duplicates():
+    _create_items(5)
+    keys = [dict(agency_subdomain=name) for name in
+            ('agency004', 'missing', 'agency001', 'agency004', 'agency003')]
+
+    results = list(HashOnlyModel.batch_get(keys, preserve_order=True))
+    assert [obj.external_id for obj in results] == [4, 1, 4, 3]
+    assert results[0] is not results[2]
+
+
+def test_batch_get_validates_keys():
+    _create_items(1)
+    with pytest.raises(ValidationError):
+        list(HashOnlyModel.batch_get([dict(agency_subdomain='agency000', external_id=0)]))
+
+
+@mock.patch('cc_dynamodb3.table._batch_retry_sleep')
+def test_batch_get_retries_unprocessed_keys(retry_sleep):
+    _create_items(2)
+    table = HashOnlyModel.table()
+    original_batch_get_item = table.meta.client.batch_get_item
+    calls = []
+
+    def batch_get_item(RequestItems):
+        calls.append(RequestItems)
+        keys = RequestItems[table.name]['Keys']
+        response = original_batch_get_item(RequestItems={
+            table.name: dict(RequestItems[table.name], Keys=keys[:1]),
+        })
+        if len(keys) > 1:
+            response['UnprocessedKeys'] = {table.name: dict(RequestItems[table.name], Keys=keys[1:])}
+        return response
+
+    with mock.patch.object(table.meta.client, 'batch_get_item', side_effect=batch_get_item):
+        rows = list(batch_get_from_table(table, [dict(agency_subdomain='agency000'),
+                                                 dict(agency_subdomain='agency001')]))
+
+    assert len(calls) == 2
+    assert retry_sleep.call_count == 1
+    assert set(row['agency_subdomain'] for row, metadata in rows) == {'agency000', 'agency001'}
+
+
+@mock.patch('cc_dynamodb3.table._batch_retry_sleep')
+def test_batch_get_raises_when_retries_exceeded(retry_sleep):
+    _create_items(1)
+    table = HashOnlyModel.table()
+    request = {table.name: dict(Keys=[dict(agency_subdomain='agency000')], ConsistentRead=False)}
+
+    with mock.patch.object(table.meta.client, 'batch_get_item',
+                           return_value=dict(Responses={}, UnprocessedKeys=request)):
+        with pytest.raises(BatchRetriesExceededException) as exc_info:
+            list(batch_get_from_table(table, [dict(agency_subdomain='agency000')]))
+
+    assert exc_info.value.unprocessed == request
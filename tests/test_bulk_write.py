@@ -0,0 +1,88 @@
+import mock
+import pytest
+
+from cc_dynamodb3.exceptions import NotFound, ValidationError
+from cc_dynamodb3.table import batch_write_to_table
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+def test_bulk_save_puts_all_models():
+    HashOnlyModelFactory.create_table()
+    models = [HashOnlyModel.build(agency_subdomain='agency%03d' % i, external_id=i) for i in range(60)]
+
+    saved = HashOnlyModel.bulk_save(models)
+
+    assert len(saved) == 60
+    assert len(list(HashOnlyModel.all())) == 60
+    for model in models:
+        assert model._expect_exists_in_db
+        assert not model.get_unsaved_fields()
+
+
+def test_bulk_save_then_save_issues_update():
+    HashOnlyModelFactory.create_table()
+    model = HashOnlyModel.build(agency_subdomain='metzler', external_id=1)
+    HashOnlyModel.bulk_save([model])
+
+    model.external_id = 2
+    assert list(model.get_attribute_updates().keys()) == ['external_id']
+    model.save()
+    assert HashOnlyModel.get(agency_subdomain='metzler').external_id == 2
+
+
+def test_bulk_save_dedupes_by_primary_key_keeping_last():
+    HashOnlyModelFactory.create_table()
+    first = HashOnlyModel.build(agency_subdomain='metzler', external_id=1)
+    last = HashOnlyModel.build(agency_subdomain='metzler', external_id=2)
+
+    saved = HashOnlyModel.bulk_save([first, last])
+
+    assert saved == [last]
+    assert last._expect_exists_in_db
+    assert not first._expect_exists_in_db
+    assert HashOnlyModel.get(agency_subdomain='metzler').external_id == 2
+
+
+def test_bulk_save_validates_models():
+    HashOnlyModelFactory.create_table()
+    with pytest.raises(ValidationError):
+        HashOnlyModel.bulk_save([HashOnlyModel.build(external_id=1)])
+
+
+def test_bulk_delete():
+    HashOnlyModelFactory.create_table()
+    models = [HashOnlyModelFactory(agency_subdomain='agency%03d' % i) for i in range(30)]
+
+    deleted = HashOnlyModel.bulk_delete(models + models[:1])
+
+    assert len(deleted) == 30
+    assert all(model._is_deleted for model in models)
+    assert not list(HashOnlyModel.all())
+    assert HashOnlyModel.bulk_delete(models) == []
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='agency000')
+
+
+@mock.patch('cc_dynamodb3.table._batch_retry_sleep')
+def test_batch_write_retries_unprocessed_items(retry_sleep):
+    HashOnlyModelFactory.create_table()
+    table = HashOnlyModel.table()
+    original_batch_write_item = table.meta.client.batch_write_item
+    calls = []
+
+    def batch_write_item(RequestItems):
+        calls.append(RequestItems)
+        requests = RequestItems[table.name]
+        response = original_batch_write_item(RequestItems={table.name: requests[:1]})
+        if len(requests) > 1:
+            response['UnprocessedItems'] = {table.name: requests[1:]}
+        return response
+
+    items = [dict(agency_subdomain='agency%03d' % i) for i in range(3)]
+    with mock.patch.object(table.meta.client, 'batch_write_item', side_effect=batch_write_item):
+        batch_write_to_table(table, put_items=items)
+
+    assert len(calls) == 3
+    assert [call[0][0] for call in retry_sleep.call_args_list] == [0, 1]
+    assert len(list(HashOnlyModel.all())) == 3
@@ -0,0 +1,105 @@
+import datetime
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary, TypeDeserializer
+
+from cc_dynamodb3 import client_engine
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.models import ReadOnlyRow
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class ClientHashOnlyModel(HashOnlyModel):
+    ENGINE = CLIENT_ENGINE
+
+
+CREATED = datetime.datetime(2015, 1, 2, 3, 4, 5)
+
+
+def _create_items():
+    HashOnlyModelFactory.create_table()
+    HashOnlyModelFactory(agency_subdomain='metzler', external_id=1, name='Metzler', is_enabled=True,
+                         created=CREATED)
+    HashOnlyModelFactory(agency_subdomain='other', external_id=1, name='Other', is_enabled=False)
+    HashOnlyModelFactory(agency_subdomain='third', external_id=2)
+
+
+def test_deserialize_matches_boto3():
+    item = dict(
+        string='abc',
+        number=Decimal('1.5'),
+        binary=Binary(b'\x00'),
+        boolean=True,
+        null=None,
+        strings={'a', 'b'},
+        numbers={Decimal('1'), Decimal('2')},
+        binaries={Binary(b'\x01')},
+        list=['a', Decimal('1'), {'nested': ['b']}],
+        map=dict(a=dict(b=Decimal('2'))),
+    )
+    wire_item = client_engine.serialize_item(item)
+    deserializer = TypeDeserializer()
+
+    assert client_engine.deserialize_item(wire_item) == item
+    assert client_engine.deserialize_item(wire_item) == dict(
+        (name, deserializer.deserialize(value)) for name, value in wire_item.items())
+
+
+def test_get_decodes_wire_item_into_model():
+    _create_items()
+    obj = ClientHashOnlyModel.get(agency_subdomain='metzler')
+
+    assert isinstance(obj, ClientHashOnlyModel)
+    assert obj.external_id == 1
+    assert obj.is_enabled is True
+    assert obj.created == CREATED
+    assert obj.item == HashOnlyModel.get(agency_subdomain='metzler').item
+    assert obj.get_unsaved_fields() == {}
+
+    obj.name = 'Renamed'
+    obj.save()
+    assert HashOnlyModel.get(agency_subdomain='metzler').name == 'Renamed'
+
+
+def test_query_and_all_match_resource_engine():
+    _create_items()
+
+    client_objs = list(ClientHashOnlyModel.query(external_id=1, query_index='HashOnlyExternalId',
+                                                 filter_expression=dict(is_enabled=True)))
+    resource_objs = list(HashOnlyModel.query(external_id=1, query_index='HashOnlyExternalId',
+                                             filter_expression=dict(is_enabled=True)))
+    assert [obj.item for obj in client_objs] == [obj.item for obj in resource_objs]
+    assert [obj.agency_subdomain for obj in client_objs] == ['metzler']
+
+    assert (sorted(obj.agency_subdomain for obj in ClientHashOnlyModel.all()) ==
+            ['metzler', 'other', 'third'])
+
+
+def test_paginated_query_returns_python_last_evaluated_key():
+    _create_items()
+
+    rows, lek = ClientHashOnlyModel.paginated_query(external_id=1, query_index='HashOnlyExternalId', limit=1)
+    assert len(rows) == 1
+    assert lek['agency_subdomain'] == rows[0].agency_subdomain
+    assert lek['external_id'] == Decimal('1')
+
+    more, lek = ClientHashOnlyModel.paginated_query(external_id=1, query_index='HashOnlyExternalId', limit=5,
+                                                    exclusive_start_key=lek)
+    assert set(obj.agency_subdomain for obj in rows + more) == {'metzler', 'other'}
+
+
+def test_readonly_and_projection():
+    _create_items()
+
+    row = ClientHashOnlyModel.get(agency_subdomain='metzler', readonly=True)
+    assert isinstance(row, ReadOnlyRow)
+    assert row.created == CREATED
+
+    obj = ClientHashOnlyModel.get(agency_subdomain='metzler', attributes=['name'])
+    assert set(obj.item) == {'agency_subdomain', 'name'}
+
+    rows = list(ClientHashOnlyModel.all(readonly=True, attributes=['is_enabled']))
+    assert sorted((row.agency_subdomain, row.is_enabled) for row in rows) == [
+        ('metzler', True), ('other', False), ('third', None)]
+
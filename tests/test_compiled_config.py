@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import mock
+import pytest
+
+import cc_dynamodb3.config
+import cc_dynamodb3.table
+from cc_dynamodb3.config import get_config, set_config
+
+from .conftest import AWS_DYNAMODB_CONFIG_PATH
+
+
+@pytest.fixture
+def config_path(tmpdir):
+    path = str(tmpdir.join('dynamodb.yml'))
+    shutil.copy(AWS_DYNAMODB_CONFIG_PATH, path)
+    return path
+
+
+@pytest.fixture
+def compiled_path(tmpdir):
+    return str(tmpdir.join('dynamodb.yml.pickle'))
+
+
+def _set_config(config_path, **kwargs):
+    set_config(config_file_path=config_path, aws_access_key_id='<KEY>', aws_secret_access_key='<SECRET>',
+               namespace='dev_', **kwargs)
+
+
+def test_yaml_is_parsed_once_per_content(config_path, compiled_path):
+    _set_config(config_path, compiled_config_path=compiled_path)
+    assert os.path.exists(compiled_path)
+    compiled_yaml = get_config().yaml
+
+    with mock.patch.object(cc_dynamodb3.config.yaml, 'load') as yaml_load, \
+            mock.patch.object(cc_dynamodb3.table, 'compile_table_metadata') as compile_table_metadata:
+        _set_config(config_path, compiled_config_path=compiled_path)
+        assert not yaml_load.called
+        assert not compile_table_metadata.called
+    assert get_config().yaml == compiled_yaml
+
+    with open(config_path, 'a') as config_file:
+        config_file.write('\nextra_setting: 1\n')
+    _set_config(config_path, compiled_config_path=compiled_path)
+    assert get_config().yaml['extra_setting'] == 1
+
+
+def test_corrupt_compiled_config_is_rewritten(config_path, compiled_path):
+    with open(compiled_path, 'wb') as compiled_file:
+        compiled_file.write(b'not a pickle')
+
+    _set_config(config_path, compiled_config_path=compiled_path)
+    assert 'nps_survey' in get_config().table_names
+    assert cc_dynamodb3.config._read_compiled_config(compiled_path)
+
+
+def test_no_compiled_config_by_default(config_path, tmpdir):
+    _set_config(config_path)
+    assert tmpdir.listdir() == [tmpdir.join('dynamodb.yml')]
+
+
+def test_table_metadata_is_precompiled(config_path):
+    _set_config(config_path)
+    config = get_config()
+    compiled = config.table_metadata['change_in_condition']
+
+    with mock.patch.object(cc_dynamodb3.table, '_build_table_metadata') as build_table_metadata:
+        metadata = cc_dynamodb3.table._get_table_metadata('change_in_condition')
+        assert not build_table_metadata.called
+    assert metadata == cc_dynamodb3.table._build_table_metadata(
+        config.yaml, 'change_in_condition', config.yaml['schemas']['change_in_condition'])
+    assert metadata == compiled
+    assert 'GlobalSecondaryIndexes' in metadata and 'LocalSecondaryIndexes' in metadata
+    assert 'table_metadata' not in config.thaw()
@@ -0,0 +1,129 @@
+import pytest
+import six
+from boto3.dynamodb.conditions import Attr
+
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.conditions import Q, split_argument
+from cc_dynamodb3.exceptions import ValidationError
+from cc_dynamodb3.mocks import mock_table_with_data
+
+from .factories.map_type_model import MapTypeModel, MapTypeModelFactory
+from .test_prepared_query import ChangeInCondition, ClientChangeInCondition
+
+
+class ClientMapTypeModel(MapTypeModel):
+    ENGINE = CLIENT_ENGINE
+
+
+@pytest.fixture
+def changes():
+    mock_table_with_data('change_in_condition', [
+        dict(carelog_id=1, time=time, session_id=time, note='note %s' % time) if time % 2 else
+        dict(carelog_id=1, time=time, note='x' * time)
+        for time in range(10)
+    ])
+
+
+@pytest.fixture
+def maps():
+    MapTypeModelFactory.create_table()
+    MapTypeModelFactory(agency_subdomain='a', request_data=dict(address=dict(zip='10001'), tags=['x']))
+    MapTypeModelFactory(agency_subdomain='b', request_data=dict(address=dict(zip='94103'), tags=['x', 'y', 'z']))
+    MapTypeModelFactory(agency_subdomain='c', request_data=dict(tags=[]))
+
+
+@pytest.mark.parametrize('argument, expected', [
+    ('time', ('time', 'eq', False)),
+    ('time__between', ('time', 'between', False)),
+    ('data__address__zip__eq', ('data.address.zip', 'eq', False)),
+    ('data.address.zip', ('data.address.zip', 'eq', False)),
+    ('data.address.zip__gt', ('data.address.zip', 'gt', False)),
+    ('data__address__zip__begins_with', ('data.address.zip', 'begins_with', False)),
+    ('tags__size__gt', ('tags', 'gt', True)),
+    ('tags__size', ('tags', 'eq', True)),
+    ('note__attribute_not_exists', ('note', 'not_exists', False)),
+])
+def test_split_argument(argument, expected):
+    assert split_argument(argument) == expected
+
+
+@pytest.mark.parametrize('model_class', [ChangeInCondition, ClientChangeInCondition])
+def test_query_operators(changes, model_class):
+    def times(**filter_expression):
+        return [change.time for change in model_class.query(carelog_id=1, time__between=(2, 7),
+                                                           filter_expression=filter_expression)]
+
+    assert times() == [2, 3, 4, 5, 6, 7]
+    assert times(session_id__exists=True) == [3, 5, 7]
+    assert times(session_id__exists=False) == [2, 4, 6]
+    assert times(session_id__not_exists=True) == [2, 4, 6]
+    assert times(note__size__gt=4) == [3, 5, 6, 7]
+    assert times(session_id__between=(4, 6)) == [5]
+
+
+@pytest.mark.parametrize('model_class', [ChangeInCondition, ClientChangeInCondition])
+def test_q_objects(changes, model_class):
+    def times(filter_expression):
+        return [change.time for change in model_class.query(carelog_id=1, filter_expression=filter_expression)]
+
+    assert times(Q(time__lt=2) | Q(session_id__gte=7)) == [0, 1, 7, 9]
+    assert times(~Q(session_id__exists=True) & Q(note__size__lte=2)) == [0, 2]
+    assert times(Q(note__begins_with='note') & ~(Q(session_id=1) | Q(session_id=3))) == [5, 7, 9]
+    assert times(Q() | Attr('session_id').eq(9)) == [9]
+
+
+@pytest.mark.parametrize('model_class', [MapTypeModel, ClientMapTypeModel])
+def test_nested_attributes_and_size_in_scans(maps, model_class):
+    def subdomains(filter_expression):
+        return sorted(obj.agency_subdomain for obj in model_class.all(filter_expression=filter_expression))
+
+    assert subdomains(dict(request_data__address__zip__eq='94103')) == ['b']
+    assert subdomains({'request_data.address.zip': '94103'}) == ['b']
+    assert subdomains(dict(request_data__address__zip__exists=False)) == ['c']
+    assert subdomains(Q(request_data__tags__size__gte=1) & ~Q(request_data__tags__contains='y')) == ['a']
+
+
+def test_invalid_conditions(changes):
+    with pytest.raises(ValidationError):
+        list(ChangeInCondition.query(carelog_id__not_an_operator=1))
+    with pytest.raises(ValidationError):
+        list(ChangeInCondition.query(carelog_id=1, time__size__gt=1))
+    with pytest.raises(ValidationError):
+        list(ChangeInCondition.query(carelog_id=1, time__exists=True))
+    with pytest.raises(ValidationError):
+        list(ChangeInCondition.query(carelog_id=1, filter_expression='session_id > 1'))
+    with pytest.raises(ValidationError):
+        list(ChangeInCondition.query(carelog_id=1, filter_expression=dict(note__startswith='n')))
+    with pytest.raises(ValidationError):
+        Q(data__address__zip='10001')
+    with pytest.raises(ValueError):
+        ~Q()
+
+
+@pytest.mark.skipif(six.PY2, reason='asyncio API is Python 3 only')
+def test_in_memory_transport():
+    import asyncio
+
+    from cc_dynamodb3 import aio
+
+    transport = aio.InMemoryTransport()
+    loop = asyncio.new_event_loop()
+    try:
+        for time in range(6):
+            item = dict(carelog_id=1, time=time, data=dict(tags=['x'] * time))
+            if time % 2:
+                item['session_id'] = time
+            loop.run_until_complete(transport.put_item('change_in_condition', Item=item))
+
+        def times(**kwargs):
+            response = loop.run_until_complete(transport.query('change_in_condition', carelog_id=1, **kwargs))
+            return [int(item['time']) for item in response['Items']]
+
+        assert times(time__between=(1, 4)) == [1, 2, 3, 4]
+        assert times(filter_expression=Q(session_id__exists=False) | Q(data__tags__size__gte=5)) == [0, 2, 4, 5]
+        assert times(filter_expression=~Q(data__tags__size__lt=3)) == [3, 4, 5]
+        response = loop.run_until_complete(transport.scan('change_in_condition',
+                                                          filter_expression=dict(data__tags__size=2)))
+        assert [int(item['time']) for item in response['Items']] == [2]
+    finally:
+        loop.close()
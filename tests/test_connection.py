@@ -0,0 +1,92 @@
+import threading
+import time
+
+import mock
+import pytest
+
+import cc_dynamodb3.config
+import cc_dynamodb3.connection
+from cc_dynamodb3.exceptions import ConfigurationError
+
+from .conftest import AWS_DYNAMODB_CONFIG_PATH
+
+
+def _set_config(**kwargs):
+    config = dict(
+        config_file_path=AWS_DYNAMODB_CONFIG_PATH,
+        aws_access_key_id='<KEY>',
+        aws_secret_access_key='<SECRET>',
+        namespace='dev_',
+    )
+    config.update(kwargs)
+    cc_dynamodb3.config.set_config(**config)
+
+
+def _in_threads(func, count=8):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(func())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_default_client_config():
+    assert cc_dynamodb3.connection.get_client_config() is None
+
+
+def test_pool_timeouts_and_retries_are_passed_to_botocore():
+    _set_config(max_pool_connections='50', connect_timeout=2, read_timeout='5.5', retry_mode='adaptive')
+
+    client_config = cc_dynamodb3.connection.get_client_config()
+    assert client_config.max_pool_connections == 50
+    assert client_config.connect_timeout == 2.0
+    assert client_config.read_timeout == 5.5
+    assert client_config.retries == dict(mode='adaptive')
+
+    client = cc_dynamodb3.connection.get_connection(as_resource=False)
+    assert client.meta.config.max_pool_connections == 50
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(retry_mode='sometimes'),
+    dict(read_timeout='soon'),
+    dict(max_pool_connections='many'),
+])
+def test_invalid_connection_settings(kwargs):
+    with pytest.raises(ConfigurationError):
+        _set_config(**kwargs)
+
+
+def test_changing_pool_size_invalidates_connection():
+    connection = cc_dynamodb3.connection.get_connection()
+    _set_config(max_pool_connections=50)
+    assert cc_dynamodb3.connection.get_connection() is not connection
+
+
+def test_concurrent_get_connection_creates_one_connection():
+    cc_dynamodb3.connection.clear_connection_cache()
+    create_connection = cc_dynamodb3.connection._create_connection
+
+    def slow_create_connection(as_resource):
+        time.sleep(0.01)
+        return create_connection(as_resource)
+
+    with mock.patch('cc_dynamodb3.connection._create_connection', side_effect=slow_create_connection) as create:
+        connections = _in_threads(cc_dynamodb3.connection.get_connection)
+
+    assert create.call_count == 1
+    assert len(set(id(connection) for connection in connections)) == 1
+
+
+def test_per_thread_connections():
+    _set_config(per_thread_connections=True)
+    connection = cc_dynamodb3.connection.get_connection()
+    assert cc_dynamodb3.connection.get_connection() is connection
+
+    others = _in_threads(cc_dynamodb3.connection.get_connection, count=2)
+    assert len(set(id(other) for other in others + [connection])) == 3
+
+    cc_dynamodb3.connection.clear_connection_cache()
+    assert cc_dynamodb3.connection.get_connection() is not connection
@@ -0,0 +1,122 @@
+import mock
+
+import cc_dynamodb3.models
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+from .factories.map_type_model import MapTypeModel, MapTypeModelFactory
+
+
+def test_loaded_model_has_no_unsaved_fields_and_no_copies():
+    row = dict(agency_subdomain='metzler', request_data={'a': {'b': [1, 2]}}, tags=set(['x']))
+    with mock.patch('cc_dynamodb3.models.copy.deepcopy') as deepcopy:
+        obj = MapTypeModel.from_row(row, metadata={})
+        assert obj.get_unsaved_fields() == {}
+        assert obj.get_attribute_updates() == {}
+        assert not deepcopy.called
+
+    assert obj._container_snapshots == {}
+    assert obj._saved_values == {}
+
+
+def test_loaded_model_read_after_save_is_watched():
+    MapTypeModelFactory.create_table()
+    MapTypeModelFactory(agency_subdomain='metzler', request_data={'a': 1})
+    obj = MapTypeModel.get(agency_subdomain='metzler')
+    request_data = obj.request_data
+    assert set(obj._container_snapshots) == set(['request_data'])
+    obj.save()
+
+    request_data['a'] = 2
+    assert obj.get_unsaved_fields() == dict(request_data={'a': 2})
+
+
+def test_setattr_marks_field_unsaved():
+    obj = HashOnlyModel.from_row(dict(agency_subdomain='metzler', external_id=1), metadata={})
+    obj.external_id = 2
+    obj.name = 'new'
+
+    assert obj.get_unsaved_fields() == dict(external_id=2, name='new')
+    assert obj._saved_values == dict(external_id=1, name=cc_dynamodb3.models._MISSING)
+    assert obj._last_saved_item['external_id'] == 1
+    assert 'name' not in obj._last_saved_item
+
+
+def test_setattr_back_to_saved_value_is_not_unsaved():
+    obj = HashOnlyModel.from_row(dict(agency_subdomain='metzler', external_id=1), metadata={})
+    obj.external_id = 2
+    obj.external_id = 1
+
+    assert obj.get_unsaved_fields() == {}
+
+
+def test_fields_safe_to_overwrite_are_ignored():
+    obj = HashOnlyModel.from_row(dict(agency_subdomain='metzler', external_id=1), metadata={})
+    obj.FIELDS_SAFE_TO_OVERWRITE = ['external_id']
+    obj.external_id = 2
+
+    assert obj.get_unsaved_fields() == {}
+
+
+def test_map_changed_in_place_is_unsaved():
+    obj = MapTypeModel.from_row(dict(agency_subdomain='metzler', request_data={'a': 1}), metadata={})
+    obj.request_data['a'] = 2
+
+    assert obj.get_unsaved_fields() == dict(request_data={'a': 2})
+    assert obj._last_saved_item['request_data'] == {'a': 1}
+
+
+def test_map_changed_in_place_after_save_is_saved():
+    MapTypeModelFactory.create_table()
+    obj = MapTypeModelFactory(agency_subdomain='metzler', request_data={'a': 1})
+    request_data = obj.request_data
+    request_data['a'] = 2
+    obj.save()
+    assert obj.get_unsaved_fields() == {}
+
+    request_data['b'] = 3
+    assert obj.get_attribute_updates() == dict(request_data=dict(Value={'a': 2, 'b': 3}, Action='PUT'))
+    obj.save()
+
+    assert MapTypeModel.get(agency_subdomain='metzler').request_data == {'a': 2, 'b': 3}
+
+
+def test_save_resets_unsaved_fields():
+    HashOnlyModelFactory.create_table()
+    obj = HashOnlyModelFactory(agency_subdomain='metzler', external_id=1)
+    obj.external_id = 2
+    obj.save()
+
+    assert obj.get_unsaved_fields() == {}
+    assert obj._last_saved_item == obj.item
+
+
+def test_container_set_then_changed_after_save_is_unsaved():
+    MapTypeModelFactory.create_table()
+    obj = MapTypeModelFactory(agency_subdomain='metzler')
+    request_data = {'a': 1}
+    obj.request_data = request_data
+    obj.save()
+    request_data['b'] = 2
+
+    assert obj.get_unsaved_fields() == dict(request_data={'a': 1, 'b': 2})
+    obj.save()
+    assert MapTypeModel.get(agency_subdomain='metzler').request_data == {'a': 1, 'b': 2}
+
+
+def test_item_assigned_directly_is_unsaved():
+    obj = MapTypeModel.from_row(dict(agency_subdomain='metzler', request_data={'a': 1}), metadata={})
+    obj.item['request_data'] = {'z': 1}
+    obj.item['other'] = 'new'
+
+    assert obj.get_unsaved_fields() == dict(request_data={'z': 1}, other='new')
+
+
+def test_built_model_item_changed_in_place_after_save_is_unsaved():
+    MapTypeModelFactory.create_table()
+    obj = MapTypeModel.build(agency_subdomain='metzler', request_data={'a': 1})
+    obj.save()
+    obj.item['request_data']['a'] = 2
+
+    assert obj.get_unsaved_fields() == dict(request_data={'a': 2})
+    obj.save()
+    assert MapTypeModel.get(agency_subdomain='metzler').request_data == {'a': 2}
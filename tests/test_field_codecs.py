@@ -0,0 +1,76 @@
+import datetime
+import decimal
+import uuid
+
+from schematics import types as fields
+
+from cc_dynamodb3.models import DynamoDBModel
+
+from .factories.hash_only_model import HashOnlyModel
+
+
+class UUIDModel(DynamoDBModel):
+    TABLE_NAME = 'hash_only'
+
+    agency_subdomain = fields.StringType(required=True)
+    id = fields.UUIDType()
+    other_uuid = fields.UUIDType()
+
+
+class CustomEncoderModel(HashOnlyModel):
+    @classmethod
+    def _value_to_dynamodb(cls, key, value):
+        if key == 'name' and value:
+            return value.upper()
+        return super(CustomEncoderModel, cls)._value_to_dynamodb(key, value)
+
+
+def test_codecs_are_built_once_per_class():
+    assert HashOnlyModel._field_codecs() is HashOnlyModel._field_codecs()
+    assert CustomEncoderModel._field_codecs() is not HashOnlyModel._field_codecs()
+
+
+def test_build_encodes_fields():
+    created = datetime.datetime(2015, 1, 2, 3, 4, 5)
+    obj = HashOnlyModel.build(agency_subdomain='metzler', name='', is_enabled=True, created=created,
+                              not_a_field='ignored')
+
+    assert obj.item['is_enabled'] == decimal.Decimal('1')
+    assert obj.item['created'] == decimal.Decimal(1420167845)
+    assert obj.item['name'] is None
+    assert 'not_a_field' not in obj.item
+
+
+def test_from_row_decodes_fields():
+    obj = HashOnlyModel.from_row(dict(agency_subdomain='metzler', is_enabled=decimal.Decimal('0'),
+                                      created=decimal.Decimal(1420167845)))
+
+    assert obj.is_enabled is False
+    assert obj.created == datetime.datetime(2015, 1, 2, 3, 4, 5)
+    assert obj._dynamodb_to_model(dict(created=0))['created'] is None
+
+
+def test_setattr_encodes_fields():
+    obj = HashOnlyModel.build(agency_subdomain='metzler')
+    obj.is_enabled = False
+    obj.created = None
+
+    assert obj.item['is_enabled'] == decimal.Decimal('0')
+    assert obj.item['created'] == 0
+
+
+def test_uuid_fields():
+    value = uuid.uuid4()
+    obj = UUIDModel.build(agency_subdomain='metzler', other_uuid=value)
+
+    assert obj.item['other_uuid'] == str(value)
+    assert isinstance(obj.id, uuid.UUID)
+    assert UUIDModel._field_codecs().uuid_id_fields == ['id']
+
+
+def test_custom_value_to_dynamodb_is_used():
+    obj = CustomEncoderModel.build(agency_subdomain='metzler', name='test')
+    assert obj.item['name'] == 'TEST'
+
+    obj.name = 'other'
+    assert obj.item['name'] == 'OTHER'
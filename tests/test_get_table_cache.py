@@ -0,0 +1,103 @@
+import gc
+import threading
+import weakref
+
+import cc_dynamodb3.config
+import cc_dynamodb3.connection
+import cc_dynamodb3.table
+
+from .conftest import AWS_DYNAMODB_CONFIG_PATH
+
+
+def _set_config(**kwargs):
+    config = dict(
+        config_file_path=AWS_DYNAMODB_CONFIG_PATH,
+        aws_access_key_id='<KEY>',
+        aws_secret_access_key='<SECRET>',
+        namespace='dev_',
+    )
+    config.update(kwargs)
+    cc_dynamodb3.config.set_config(**config)
+
+
+def test_get_table_returns_cached_handle():
+    table = cc_dynamodb3.table.get_table('nps_survey')
+    assert cc_dynamodb3.table.get_table('nps_survey') is table
+    assert cc_dynamodb3.table.get_table('hash_only') is not table
+
+
+def test_get_table_does_not_keep_explicit_connections():
+    table = cc_dynamodb3.table.get_table('nps_survey')
+    connection = cc_dynamodb3.connection.get_connection(use_cache=False)
+    connection_ref = weakref.ref(connection)
+
+    other_table = cc_dynamodb3.table.get_table('nps_survey', connection=connection)
+    assert other_table is not table
+    assert other_table.name == table.name
+    assert cc_dynamodb3.table.get_table('nps_survey') is table
+
+    del connection, other_table
+    gc.collect()
+    assert connection_ref() is None
+
+
+def test_get_table_caches_per_thread_connection():
+    _set_config(per_thread_connections=True)
+    try:
+        table = cc_dynamodb3.table.get_table('nps_survey')
+        assert cc_dynamodb3.table.get_table('nps_survey') is table
+        tables = []
+        thread = threading.Thread(target=lambda: tables.append(cc_dynamodb3.table.get_table('nps_survey')))
+        thread.start()
+        thread.join()
+        assert tables[0] is not table
+        assert not any(entry[1] in (table, tables[0]) for entry in cc_dynamodb3.table._table_cache.values())
+
+        cc_dynamodb3.connection.clear_connection_cache()
+        assert cc_dynamodb3.table.get_table('nps_survey') is not table
+    finally:
+        _set_config()
+
+
+def test_set_config_same_settings_keeps_cache():
+    table = cc_dynamodb3.table.get_table('nps_survey')
+    _set_config()
+    assert cc_dynamodb3.table.get_table('nps_survey') is table
+
+
+def test_set_config_new_namespace_invalidates_cache():
+    table = cc_dynamodb3.table.get_table('nps_survey')
+    connection = cc_dynamodb3.connection.get_connection()
+    _set_config(namespace='other_')
+
+    other_table = cc_dynamodb3.table.get_table('nps_survey')
+    assert other_table is not table
+    assert other_table.name == 'other_nps_survey'
+    assert cc_dynamodb3.connection.get_connection() is connection
+
+
+def test_set_config_new_endpoint_invalidates_connection():
+    table = cc_dynamodb3.table.get_table('nps_survey')
+    connection = cc_dynamodb3.connection.get_connection()
+    _set_config(host='localhost', port=8000)
+
+    assert cc_dynamodb3.connection.get_connection() is not connection
+    assert cc_dynamodb3.table.get_table('nps_survey') is not table
+    _set_config()
+
+
+def test_get_table_is_thread_safe():
+    cc_dynamodb3.connection.get_connection()
+    cc_dynamodb3.table.clear_table_cache()
+    tables = []
+
+    def get():
+        tables.append(cc_dynamodb3.table.get_table('nps_survey'))
+
+    threads = [threading.Thread(target=get) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(id(table) for table in tables)) == 1
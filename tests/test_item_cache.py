@@ -0,0 +1,181 @@
+import decimal
+import pickle
+
+import mock
+import pytest
+from boto3.dynamodb.types import Binary
+
+from cc_dynamodb3.cache import REDIS_CACHE, RedisItemCache, clear_item_caches, item_cache_key
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.exceptions import NotFound
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class CachedModel(HashOnlyModel):
+    CACHE_TTL = 60
+    CACHE_MAX_SIZE = 2
+
+
+class ClientCachedModel(CachedModel):
+    ENGINE = CLIENT_ENGINE
+
+
+class RedisCachedModel(HashOnlyModel):
+    CACHE_TTL = 60
+    CACHE_BACKEND = REDIS_CACHE
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.values = dict()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, seconds, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def item_caches():
+    clear_item_caches()
+    HashOnlyModelFactory.create_table()
+    for name in ('one', 'two', 'three'):
+        HashOnlyModelFactory(agency_subdomain=name, external_id=1)
+
+
+def _get_item_calls(model_class):
+    return mock.patch.object(model_class.table(), 'get_item', wraps=model_class.table().get_item)
+
+
+def test_get_is_cached():
+    with _get_item_calls(CachedModel) as get_item:
+        first = CachedModel.get(agency_subdomain='one')
+        second = CachedModel.get(agency_subdomain='one')
+
+    assert get_item.call_count == 1
+    assert second.item == first.item
+    assert second is not first
+    assert CachedModel.cache_stats()['hits'] == 1
+    assert CachedModel.cache_stats()['misses'] == 1
+
+
+def test_cached_models_are_independent_copies():
+    first = CachedModel.get(agency_subdomain='one')
+    first.name = 'changed locally'
+
+    second = CachedModel.get(agency_subdomain='one')
+    assert second.name is None
+    assert second.get_unsaved_fields() == {}
+
+
+def test_save_and_delete_invalidate():
+    obj = CachedModel.get(agency_subdomain='one')
+    obj.name = 'Renamed'
+    obj.save()
+    assert CachedModel.get(agency_subdomain='one').name == 'Renamed'
+
+    obj.delete()
+    with pytest.raises(NotFound):
+        CachedModel.get(agency_subdomain='one')
+    assert CachedModel.cache_stats()['invalidations'] == 2
+
+
+def test_consistent_read_and_projection_skip_the_cache():
+    CachedModel.get(agency_subdomain='one')
+    with _get_item_calls(CachedModel) as get_item:
+        CachedModel.get(agency_subdomain='one', consistent_read=True)
+        CachedModel.get(agency_subdomain='one', attributes=['name'])
+    assert get_item.call_count == 2
+
+
+def test_reload_skips_the_cache():
+    obj = CachedModel.get(agency_subdomain='one')
+    CachedModel.table().update_item(Key=dict(agency_subdomain='one'), UpdateExpression='SET #n = :v',
+                                    ExpressionAttributeNames={'#n': 'name'}, ExpressionAttributeValues={':v': 'remote'})
+
+    assert obj.reload().name == 'remote'
+    assert CachedModel.get(agency_subdomain='one').name == 'remote'
+
+
+def test_cache_keys_do_not_collide():
+    assert (item_cache_key('change_in_condition', dict(carelog_id='1&time=2', time='3')) !=
+            item_cache_key('change_in_condition', dict(carelog_id='1', time='2&time=3')))
+    assert item_cache_key('hash_only', dict(agency_subdomain=1)) == \
+        item_cache_key('hash_only', dict(agency_subdomain=decimal.Decimal('1.0')))
+
+
+def test_ttl_expiry():
+    with mock.patch('cc_dynamodb3.cache.time.time', return_value=1000):
+        CachedModel.get(agency_subdomain='one')
+    with mock.patch('cc_dynamodb3.cache.time.time', return_value=1061):
+        CachedModel.get(agency_subdomain='one')
+    assert CachedModel.cache_stats()['misses'] == 2
+
+
+def test_lru_eviction():
+    for name in ('one', 'two', 'one', 'three'):
+        CachedModel.get(agency_subdomain=name)
+
+    stats = CachedModel.cache_stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+    CachedModel.get(agency_subdomain='one')
+    assert CachedModel.cache_stats()['hits'] == 2
+
+
+def test_client_engine_shares_the_table_cache():
+    CachedModel.get(agency_subdomain='one')
+    obj = ClientCachedModel.get(agency_subdomain='one')
+
+    assert obj.external_id == 1
+    assert ClientCachedModel.cache_stats()['hits'] == 1
+
+
+def test_uncached_model():
+    assert HashOnlyModel.item_cache() is None
+    assert HashOnlyModel.cache_stats() is None
+
+
+def test_redis_backend():
+    redis = FakeRedis()
+    with mock.patch('cc_dynamodb3.cache.get_redis_cache', return_value=redis):
+        assert isinstance(RedisCachedModel.item_cache(), RedisItemCache)
+
+    obj = RedisCachedModel.get(agency_subdomain='one')
+    assert len(redis.values) == 1
+    assert RedisCachedModel.get(agency_subdomain='one', readonly=True).external_id == 1
+    assert RedisCachedModel.cache_stats() == dict(hits=1, misses=1, invalidations=0)
+
+    obj.save(overwrite=True)
+    assert redis.values == {}
+
+
+def test_redis_backend_falls_back_to_memory():
+    with mock.patch('cc_dynamodb3.cache.get_redis_cache', return_value=None):
+        assert not isinstance(RedisCachedModel.item_cache(), RedisItemCache)
+
+
+def test_redis_rows_are_json():
+    cache = RedisItemCache(FakeRedis())
+    row = dict(id='a', count=decimal.Decimal('1.5'), tags=set(['x', 'y']), numbers=set([decimal.Decimal(1)]),
+               data=Binary(b'\x00\xff'), blobs=set([Binary(b'\x01')]), enabled=True, nothing=None,
+               nested=dict(items=[decimal.Decimal(2), dict(raw=Binary(b'\x02'))]))
+    cache.set('key', row, 60)
+
+    assert cache.redis.values['cc_dynamodb3_item:key'].startswith('{')
+    assert cache.get('key') == row
+
+
+def test_redis_invalid_entries_are_misses():
+    cache = RedisItemCache(FakeRedis())
+    cache.redis.values['cc_dynamodb3_item:key'] = pickle.dumps(dict(id='a'))
+
+    with mock.patch('pickle.loads') as loads:
+        assert cache.get('key') is None
+        assert not loads.called
+    assert cache.stats()['misses'] == 1
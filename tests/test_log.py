@@ -0,0 +1,51 @@
+import logging
+
+import mock
+
+from cc_dynamodb3 import log
+from cc_dynamodb3.config import get_config
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+def test_disabled_level_does_no_work():
+    message = mock.Mock(return_value='message')
+    extra = mock.Mock(return_value=dict())
+    with mock.patch.object(log, 'get_config') as get_config_mock, \
+            mock.patch.object(log.logger, 'log') as log_mock:
+        log.log_data(message, logging_level='debug', extra=extra)
+
+    assert not log.log_enabled('debug')
+    assert not message.called
+    assert not extra.called
+    assert not get_config_mock.called
+    assert not log_mock.called
+
+
+def test_lazy_message_and_extra():
+    config = get_config().thaw()
+    config.log_extra_callback = lambda: dict(request_id=1)
+    with mock.patch.object(log, 'get_config', return_value=config), \
+            mock.patch.object(log.logger, 'log') as log_mock:
+        log.log_data(lambda: 'built', logging_level='error', extra=lambda: dict(item=1), exc_info=False)
+
+    log_mock.assert_called_once_with(logging.ERROR, 'built', exc_info=False,
+                                     extra=dict(item=1, namespace='dev_', request_id=1))
+
+
+def test_save_skips_unsafe_save_check_when_error_logging_is_disabled():
+    HashOnlyModelFactory.create_table()
+    obj = HashOnlyModelFactory(agency_subdomain='metzler', external_id=1)
+    other = HashOnlyModel.get(agency_subdomain='metzler')
+    other.name = 'Changed elsewhere'
+    other.save()
+
+    obj.external_id = 2
+    with mock.patch.object(HashOnlyModel, 'log_if_unsafe_save') as log_if_unsafe_save:
+        with mock.patch.object(log.logger, 'isEnabledFor', return_value=False):
+            obj.save()
+        assert not log_if_unsafe_save.called
+
+        obj.external_id = 3
+        obj.save()
+        assert log_if_unsafe_save.called
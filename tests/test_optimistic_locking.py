@@ -0,0 +1,112 @@
+import mock
+import pytest
+import six
+from schematics import types as fields
+
+from cc_dynamodb3.exceptions import VersionConflictException
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class VersionedModel(HashOnlyModel):
+    VERSION_FIELD = 'version'
+
+    version = fields.IntType()
+
+
+def test_version_starts_at_one_and_new_models_do_not_overwrite():
+    HashOnlyModelFactory.create_table()
+    obj = VersionedModel.create(agency_subdomain='metzler', external_id=1)
+    assert obj.version == 1
+    assert VersionedModel.get(agency_subdomain='metzler').version == 1
+
+    with pytest.raises(VersionConflictException):
+        VersionedModel.build(agency_subdomain='metzler', external_id=2).save()
+    assert VersionedModel.get(agency_subdomain='metzler').external_id == 1
+
+
+def test_duplicate_create_conflicts():
+    HashOnlyModelFactory.create_table()
+    obj = VersionedModel.create(agency_subdomain='metzler', external_id=1)
+    assert VersionedModel.build(agency_subdomain='x')._put_item_kwargs()['ExpressionAttributeNames'] == {
+        '#hk': 'agency_subdomain'}
+    obj.external_id = 2
+    obj.save()
+
+    with pytest.raises(VersionConflictException):
+        VersionedModel.create(agency_subdomain='metzler', external_id=3)
+    stored = VersionedModel.get(agency_subdomain='metzler', consistent_read=True)
+    assert (stored.external_id, stored.version) == (2, 2)
+
+
+def test_update_increments_version():
+    HashOnlyModelFactory.create_table()
+    obj = VersionedModel.create(agency_subdomain='metzler', external_id=1)
+
+    obj.external_id = 2
+    update_kwargs = obj._update_item_kwargs()
+    assert update_kwargs['ConditionExpression'] == '#ver = :ver'
+    assert update_kwargs['ExpressionAttributeValues'][':ver'] == 1
+    assert update_kwargs['ReturnValues'] == 'NONE'
+    obj.save()
+
+    assert obj.version == 2
+    assert VersionedModel.get(agency_subdomain='metzler', consistent_read=True).item['version'] == 2
+    assert obj.save() == dict()  # nothing changed, nothing written
+    assert obj.version == 2
+
+
+def test_concurrent_update_conflicts():
+    HashOnlyModelFactory.create_table()
+    VersionedModel.create(agency_subdomain='metzler', external_id=1)
+    first = VersionedModel.get(agency_subdomain='metzler')
+    second = VersionedModel.get(agency_subdomain='metzler')
+
+    first.name = 'First'
+    first.save()
+    second.name = 'Second'
+    with mock.patch.object(VersionedModel, 'reload') as reload_mock:
+        with pytest.raises(VersionConflictException):
+            second.save()
+    assert not reload_mock.called
+    assert second.version == 1
+    assert second.get_unsaved_fields() == dict(name='Second')
+    assert VersionedModel.get(agency_subdomain='metzler', consistent_read=True).name == 'First'
+
+
+def test_unversioned_item_and_overwrite():
+    HashOnlyModelFactory.create_table()
+    HashOnlyModelFactory(agency_subdomain='metzler', external_id=1)
+    obj = VersionedModel.get(agency_subdomain='metzler')
+    assert obj.version is None
+
+    obj.external_id = 2
+    assert obj._update_item_kwargs()['ConditionExpression'] == 'attribute_not_exists(#ver)'
+    obj.save()
+    assert obj.version == 1
+
+    stale = VersionedModel.build(agency_subdomain='metzler', external_id=3)
+    stale.save(overwrite=True)
+    assert VersionedModel.get(agency_subdomain='metzler', consistent_read=True).external_id == 3
+
+
+if six.PY3:
+    def test_in_memory_transport_conflict():
+        import asyncio
+        from cc_dynamodb3 import aio
+
+        aio.set_transport(aio.InMemoryTransport())
+        try:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(VersionedModel.build(agency_subdomain='metzler').asave())
+            first = loop.run_until_complete(VersionedModel.aget(agency_subdomain='metzler'))
+            second = loop.run_until_complete(VersionedModel.aget(agency_subdomain='metzler'))
+
+            first.name = 'First'
+            loop.run_until_complete(first.asave())
+            assert first.version == 2
+            second.name = 'Second'
+            with pytest.raises(VersionConflictException):
+                loop.run_until_complete(second.asave())
+        finally:
+            aio.set_transport(None)
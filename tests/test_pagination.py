@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import mock
+import pytest
+from boto3.dynamodb.types import Binary
+
+from cc_dynamodb3 import table
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.exceptions import ValidationError
+from cc_dynamodb3.table import decode_lek, encode_lek, next_page_limit
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class ClientHashOnlyModel(HashOnlyModel):
+    ENGINE = CLIENT_ENGINE
+
+
+QUERY = dict(external_id=1, query_index='HashOnlyExternalId')
+
+
+@pytest.fixture(autouse=True)
+def items():
+    HashOnlyModelFactory.create_table()
+    for i in range(12):
+        HashOnlyModelFactory(agency_subdomain='agency%02d' % i, external_id=1, is_enabled=i % 3 == 0)
+
+
+def _query_table_calls():
+    return mock.patch.object(table, 'query_table', wraps=table.query_table)
+
+
+def _all_pages(model_class, limit, **kwargs):
+    pages = []
+    lek = None
+    while True:
+        rows, lek = model_class.paginated_query(limit=limit, exclusive_start_key=lek, **dict(QUERY, **kwargs))
+        pages.append([row.agency_subdomain for row in rows])
+        if not lek:
+            return pages
+
+
+def test_limit_is_only_what_remains():
+    with _query_table_calls() as query_table:
+        rows, lek = HashOnlyModel.paginated_query(limit=5, **QUERY)
+    assert len(rows) == 5
+    assert lek
+    assert [call[1]['limit'] for call in query_table.call_args_list] == [5]
+
+
+def test_filter_never_returns_more_than_limit():
+    filter_expression = dict(is_enabled=True)
+    with _query_table_calls() as query_table:
+        rows, lek = HashOnlyModel.paginated_query(limit=3, filter_expression=filter_expression, **QUERY)
+    assert len(rows) == 3
+    limits = [call[1]['limit'] for call in query_table.call_args_list]
+    assert limits[0] == 3
+    assert all(limit > 1 for limit in limits[1:])  # grown from the observed selectivity
+
+    pages = _all_pages(HashOnlyModel, 3, filter_expression=filter_expression)
+    assert all(len(page) <= 3 for page in pages)
+    assert sorted(sum(pages, [])) == ['agency00', 'agency03', 'agency06', 'agency09']
+
+
+@pytest.mark.parametrize('model_class', [HashOnlyModel, ClientHashOnlyModel])
+def test_pages_cover_everything_once(model_class):
+    pages = _all_pages(model_class, 5, filter_expression=dict(is_enabled=False), attributes=['name'])
+    assert sorted(sum(pages, [])) == ['agency%02d' % i for i in range(12) if i % 3]
+
+
+def test_token():
+    rows, token = HashOnlyModel.paginated_query(limit=5, as_token=True, **QUERY)
+    assert set(token) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+    more, token = HashOnlyModel.paginated_query(limit=20, exclusive_start_key=token, as_token=True, **QUERY)
+    assert len(rows) + len(more) == 12
+    assert token is None
+
+
+def test_encode_and_decode_lek():
+    lek = dict(name=u'caf\xe9', number=Decimal('1.5'), binary=Binary(b'\x00\xff'))
+    assert decode_lek(encode_lek(lek)) == lek
+    assert encode_lek(None) is None
+    assert decode_lek(None) is None
+    with pytest.raises(ValidationError):
+        decode_lek('not a token')
+
+
+@pytest.mark.parametrize('remaining, returned, scanned, previous, expected', [
+    (10, 0, 0, 10, 10),    # first page
+    (5, 5, 5, 10, 5),      # no filter
+    (8, 2, 10, 10, 40),    # 1 in 5 pass the filter
+    (8, 0, 10, 10, 20),    # none passed yet: double
+    (8, 1, 1000, 1000, table.PAGINATION_MAX_PAGE_SIZE),
+])
+def test_next_page_limit(remaining, returned, scanned, previous, expected):
+    assert next_page_limit(remaining, returned, scanned, previous) == expected
@@ -0,0 +1,87 @@
+import mock
+import pytest
+
+from cc_dynamodb3.table import scan_all_in_table, scan_table
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+def _create_items(count):
+    HashOnlyModelFactory.create_table()
+    for i in range(count):
+        HashOnlyModelFactory(agency_subdomain='agency%03d' % i, external_id=i)
+
+
+def _segmented_scan_table(table, exclusive_start_key=None, limit=None, Segment=None, TotalSegments=None,
+                          **scan_kwargs):
+    """moto ignores Segment/TotalSegments: emulate them, two items per page, keyed by external_id."""
+    response = scan_table(table, **scan_kwargs)
+    items = sorted((item for item in response['Items'] if item['external_id'] % TotalSegments == Segment),
+                   key=lambda item: item['external_id'])
+    start = exclusive_start_key['position'] if exclusive_start_key else 0
+    response['Items'] = items[start:start + 2]
+    response['Count'] = len(response['Items'])
+    if start + 2 < len(items):
+        response['LastEvaluatedKey'] = dict(position=start + 2)
+    return response
+
+
+@mock.patch('cc_dynamodb3.table.scan_table', side_effect=_segmented_scan_table)
+def test_scan_all_with_segments_returns_every_row_once(scan_table_mock):
+    _create_items(25)
+
+    results = list(scan_all_in_table(HashOnlyModel.table(), segments=4))
+
+    assert sorted(row['external_id'] for row, metadata in results) == list(range(25))
+    segments = set(call[1]['Segment'] for call in scan_table_mock.call_args_list)
+    assert segments == {0, 1, 2, 3}
+
+
+@mock.patch('cc_dynamodb3.table.scan_table', side_effect=_segmented_scan_table)
+def test_scan_all_with_segments_respects_limit(scan_table_mock):
+    _create_items(25)
+
+    results = list(scan_all_in_table(HashOnlyModel.table(), segments=4, limit=5))
+    assert len(results) == 5
+
+
+@mock.patch('cc_dynamodb3.table.scan_table', side_effect=_segmented_scan_table)
+def test_scan_all_with_segments_resumes_from_resume_keys(scan_table_mock):
+    _create_items(25)
+    table = HashOnlyModel.table()
+
+    seen = set()
+    checkpoint = None
+    for row, metadata, resume_keys in scan_all_in_table(table, segments=3, paginate=True):
+        seen.add(row['external_id'])
+        if len(seen) == 10:
+            checkpoint = dict(resume_keys)
+            break
+
+    resumed = []
+    for row, metadata, resume_keys in scan_all_in_table(table, segments=3, paginate=True,
+                                                        exclusive_start_key=checkpoint):
+        resumed.append(row['external_id'])
+    assert seen | set(resumed) == set(range(25))
+    assert len(resumed) < 25
+    assert resume_keys == {0: None, 1: None, 2: None}
+
+
+def test_scan_all_with_segments_rejects_invalid_resume_keys():
+    _create_items(1)
+    with pytest.raises(ValueError):
+        list(scan_all_in_table(HashOnlyModel.table(), segments=2, exclusive_start_key={2: None}))
+
+
+def test_scan_all_with_segments_raises_worker_errors():
+    _create_items(1)
+    with mock.patch('cc_dynamodb3.table.scan_table', side_effect=RuntimeError('boom')):
+        with pytest.raises(RuntimeError):
+            list(scan_all_in_table(HashOnlyModel.table(), segments=2))
+
+
+@mock.patch('cc_dynamodb3.table.scan_table', side_effect=_segmented_scan_table)
+def test_model_all_with_segments(scan_table_mock):
+    _create_items(10)
+
+    assert sorted(obj.external_id for obj in HashOnlyModel.all(segments=2)) == list(range(10))
@@ -0,0 +1,114 @@
+import mock
+import pytest
+from schematics import types as fields
+
+from cc_dynamodb3 import table
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.exceptions import UnknownTableException, ValidationError
+from cc_dynamodb3.mocks import mock_table_with_data
+from cc_dynamodb3.models import DynamoDBModel
+from cc_dynamodb3.table import PreparedQuery
+
+
+class ChangeInCondition(DynamoDBModel):
+    TABLE_NAME = 'change_in_condition'
+
+    carelog_id = fields.IntType(required=True)
+    time = fields.IntType(required=True)
+    saved_in_rdb = fields.IntType()
+    session_id = fields.IntType()
+    note = fields.StringType()
+    is_urgent = fields.BooleanType()
+
+
+class ClientChangeInCondition(ChangeInCondition):
+    ENGINE = CLIENT_ENGINE
+
+
+@pytest.fixture(autouse=True)
+def changes():
+    mock_table_with_data('change_in_condition', [
+        dict(carelog_id=carelog_id, time=time, saved_in_rdb=time % 2, session_id=time,
+             note='note %s' % time, is_urgent=int(time % 3 == 0))
+        for carelog_id in (1, 2) for time in range(10)
+    ])
+
+
+def test_prepared_query_table():
+    prepared = PreparedQuery('change_in_condition', key_ops=['carelog_id', 'time__between'],
+                             filter_ops=['is_urgent', 'note__is_in'])
+    rows = [row for row, metadata in prepared.query_all(carelog_id=1, time__between=(2, 8), is_urgent=True,
+                                                         note__is_in=['note 3', 'note 6', 'note 7'])]
+    assert [row['time'] for row in rows] == [3, 6]
+
+    response = prepared.query(carelog_id=2, time__between=(0, 9), is_urgent=False, note__is_in=['note 1'])
+    assert [row['time'] for row in response['Items']] == [1]
+
+
+def test_values_are_bound_once_for_all_pages():
+    query = ChangeInCondition.prepare_query(key_ops=['carelog_id'])
+    prepared = query.prepared
+    with mock.patch.object(prepared, 'bind', wraps=prepared.bind) as bind, \
+            mock.patch.object(prepared, '_send', wraps=prepared._send) as send, \
+            mock.patch.object(table, 'PAGINATION_MAX_PAGE_SIZE', 1):
+        changes, lek = query.paginated_query(limit=3, carelog_id=1)
+
+    assert [change.time for change in changes] == [0, 1, 2]
+    assert lek == dict(carelog_id=1, time=2)
+    assert bind.call_count == 1
+    requests = [call[0][0] for call in send.call_args_list]
+    assert [request.get('ExclusiveStartKey') for request in requests] == [
+        None, dict(carelog_id=1, time=0), dict(carelog_id=1, time=1)]
+    assert all(request['Limit'] == 1 for request in requests)
+    assert all(request['KeyConditionExpression'] is requests[0]['KeyConditionExpression'] for request in requests)
+
+
+@pytest.mark.parametrize('model_class', [ChangeInCondition, ClientChangeInCondition])
+def test_model_prepare_query(model_class):
+    recent = model_class.prepare_query(key_ops=['carelog_id', 'time__gte'], filter_ops=['saved_in_rdb'],
+                                       descending=True)
+    with mock.patch.object(table, 'build_condition') as build_condition:
+        changes = list(recent.query(carelog_id=1, time__gte=4, saved_in_rdb=0))
+        assert not build_condition.called
+    assert [change.time for change in changes] == [8, 6, 4]
+    assert all(isinstance(change, ChangeInCondition) for change in changes)
+
+    page, lek = recent.paginated_query(limit=2, carelog_id=2, time__gte=0, saved_in_rdb=1, as_token=True)
+    assert [change.time for change in page] == [9, 7]
+    page, lek = recent.paginated_query(limit=5, exclusive_start_key=lek, carelog_id=2, time__gte=0, saved_in_rdb=1)
+    assert [change.time for change in page] == [5, 3, 1]
+    assert lek is None
+
+
+def test_index_and_projection():
+    unsaved = ChangeInCondition.prepare_query(query_index='SavedInRDB', key_ops=['saved_in_rdb', 'time__lt'],
+                                              readonly=True, attributes=['note'])
+    rows = list(unsaved.query(saved_in_rdb=0, time__lt=4))
+    assert sorted((row.carelog_id, row.time) for row in rows) == [(1, 0), (1, 2), (2, 0), (2, 2)]
+    assert all(row.note and row.session_id is None for row in rows)
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(key_ops=['time__gte']),                                  # no hash key condition
+    dict(key_ops=['carelog_id__gt']),                             # hash key needs eq
+    dict(key_ops=['carelog_id', 'note']),                         # not a key
+    dict(key_ops=['carelog_id', 'time__contains']),               # not a range key operator
+    dict(key_ops=['carelog_id'], filter_ops=['time']),            # filter on a key
+    dict(key_ops=['carelog_id'], filter_ops=['note__size__contains']),  # not a size operator
+    dict(key_ops=['carelog_id'], filter_ops=['note', 'note']),    # duplicate
+    dict(query_index='SessionId', key_ops=['carelog_id', 'time']),
+])
+def test_validation(kwargs):
+    with pytest.raises(ValidationError):
+        ChangeInCondition.prepare_query(**kwargs)
+
+
+def test_unknown_index_and_values():
+    with pytest.raises(UnknownTableException):
+        ChangeInCondition.prepare_query(query_index='Nope', key_ops=['carelog_id'])
+
+    prepared = ChangeInCondition.prepare_query(key_ops=['carelog_id'], filter_ops=['note'])
+    with pytest.raises(ValidationError):
+        list(prepared.query(carelog_id=1))
+    with pytest.raises(ValidationError):
+        list(prepared.query(carelog_id=1, note='a', other=2))
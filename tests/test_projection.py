@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+
+from cc_dynamodb3.exceptions import PartialModelException
+from cc_dynamodb3.table import projection_kwargs
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+CREATED = datetime.datetime(2015, 1, 2, 3, 4, 5)
+
+
+def _create_items():
+    HashOnlyModelFactory.create_table()
+    HashOnlyModelFactory(agency_subdomain='metzler', external_id=1, name='Metzler', is_enabled=True,
+                         created=CREATED)
+    HashOnlyModelFactory(agency_subdomain='other', external_id=1, name='Other')
+
+
+def test_projection_kwargs_aliases_every_path_element():
+    kwargs = projection_kwargs(['name', 'address.city', 'address.zip'])
+
+    assert kwargs['ProjectionExpression'] == '#p0, #p1.#p2, #p1.#p3'
+    assert kwargs['ExpressionAttributeNames'] == {
+        '#p0': 'name', '#p1': 'address', '#p2': 'city', '#p3': 'zip',
+    }
+
+
+def test_get_fetches_only_attributes_and_primary_key():
+    _create_items()
+    obj = HashOnlyModel.get(agency_subdomain='metzler', attributes=['name'])
+
+    assert set(obj.item) == {'agency_subdomain', 'name'}
+    assert obj.name == 'Metzler'
+    assert obj.external_id is None
+    assert obj.get_primary_key() == dict(agency_subdomain='metzler')
+
+
+def test_query_and_all_with_attributes():
+    _create_items()
+
+    objs = list(HashOnlyModel.query(external_id=1, query_index='HashOnlyExternalId', attributes=['is_enabled']))
+    assert set(obj.agency_subdomain for obj in objs) == {'metzler', 'other'}
+    assert all(set(obj.item) <= {'agency_subdomain', 'is_enabled'} for obj in objs)
+
+    objs = list(HashOnlyModel.all(attributes=['name']))
+    assert sorted(obj.name for obj in objs) == ['Metzler', 'Other']
+
+    rows, _ = HashOnlyModel.paginated_query(external_id=1, query_index='HashOnlyExternalId', limit=5,
+                                            attributes=['name'], readonly=True)
+    assert sorted(row.name for row in rows) == ['Metzler', 'Other']
+    assert all(row.created is None for row in rows)
+
+
+def test_save_partial_model_updates_loaded_fields_only():
+    _create_items()
+    obj = HashOnlyModel.get(agency_subdomain='metzler', attributes=['name'])
+    obj.name = 'Renamed'
+    result = obj.save()
+
+    assert result['Attributes'] == dict(name='Metzler')
+    stored = HashOnlyModel.get(agency_subdomain='metzler')
+    assert stored.name == 'Renamed'
+    assert stored.external_id == 1
+    assert stored.is_enabled is True
+    assert stored.created == CREATED
+
+
+def test_save_partial_model_rejects_fields_not_loaded():
+    _create_items()
+    obj = HashOnlyModel.get(agency_subdomain='metzler', attributes=['name'])
+    obj.external_id = 2
+
+    with pytest.raises(PartialModelException):
+        obj.save()
+    assert HashOnlyModel.get(agency_subdomain='metzler').external_id == 1
+
+
+def test_partial_model_is_never_put():
+    _create_items()
+    obj = HashOnlyModel.get(agency_subdomain='metzler', attributes=['name'])
+
+    with pytest.raises(PartialModelException):
+        obj.save(overwrite=True)
+    with pytest.raises(PartialModelException):
+        HashOnlyModel.bulk_save([obj])
+
+    obj.agency_subdomain = 'moved'
+    with pytest.raises(PartialModelException):
+        obj.save()
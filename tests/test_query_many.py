@@ -0,0 +1,67 @@
+import pytest
+
+from cc_dynamodb3.client_engine import CLIENT_ENGINE
+from cc_dynamodb3.exceptions import QueryManyException, ValidationError
+from cc_dynamodb3.table import query_many_in_table
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class ClientHashOnlyModel(HashOnlyModel):
+    ENGINE = CLIENT_ENGINE
+
+
+def _create_items():
+    HashOnlyModelFactory.create_table()
+    for external_id in range(5):
+        for i in range(external_id + 1):
+            HashOnlyModelFactory(agency_subdomain='agency%s_%s' % (external_id, i), external_id=external_id)
+
+
+def _queries():
+    return [dict(external_id=external_id, query_index='HashOnlyExternalId') for external_id in (4, 0, 2, 3, 1)]
+
+
+def test_query_many_in_table_returns_rows_of_every_query():
+    _create_items()
+
+    results = list(query_many_in_table('hash_only', _queries(), max_workers=3))
+
+    assert len(results) == 15
+    for position, row, metadata in results:
+        assert row['external_id'] == _queries()[position]['external_id']
+
+
+def test_query_many_ordered():
+    _create_items()
+
+    results = list(HashOnlyModel.query_many(_queries(), max_workers=5, ordered=True))
+
+    assert [obj.external_id for position, obj in results] == [4] * 5 + [0] + [2] * 3 + [3] * 4 + [1] * 2
+    assert [position for position, obj in results] == sorted(position for position, obj in results)
+    assert all(isinstance(obj, HashOnlyModel) for position, obj in results)
+
+
+def test_query_many_reports_failed_queries_after_the_others():
+    _create_items()
+    queries = _queries()
+    queries[1] = dict(external_id__not_an_operator=0, query_index='HashOnlyExternalId')
+
+    results = []
+    with pytest.raises(QueryManyException) as exc_info:
+        for result in HashOnlyModel.query_many(queries, max_workers=2):
+            results.append(result)
+
+    assert sorted(obj.external_id for position, obj in results) == [1] * 2 + [2] * 3 + [3] * 4 + [4] * 5
+    assert list(exc_info.value.errors) == [1]
+    assert isinstance(exc_info.value.errors[1], ValidationError)
+
+
+def test_query_many_with_client_engine_and_projection():
+    _create_items()
+
+    results = list(ClientHashOnlyModel.query_many(_queries(), ordered=True, readonly=True, attributes=['name']))
+
+    assert len(results) == 15
+    assert all(row.agency_subdomain.startswith('agency4_') for position, row in results[:5])
+    assert all(row.external_id is None for position, row in results)
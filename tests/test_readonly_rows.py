@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from cc_dynamodb3.models import ReadOnlyRow
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+def _create_items():
+    HashOnlyModelFactory.create_table()
+    HashOnlyModelFactory(agency_subdomain='metzler', external_id=1, is_enabled=True,
+                         created=datetime.datetime(2015, 1, 2, 3, 4, 5))
+    HashOnlyModelFactory(agency_subdomain='other', external_id=1)
+
+
+def test_get_readonly_decodes_fields():
+    _create_items()
+    row = HashOnlyModel.get(agency_subdomain='metzler', readonly=True)
+
+    assert isinstance(row, ReadOnlyRow)
+    assert row.external_id == 1
+    assert isinstance(row.external_id, int)
+    assert row.is_enabled is True
+    assert row.created == datetime.datetime(2015, 1, 2, 3, 4, 5)
+    assert row.name is None
+    assert row.get_primary_key() == dict(agency_subdomain='metzler')
+    assert row.metadata
+
+
+def test_readonly_row_is_read_only():
+    _create_items()
+    row = HashOnlyModel.get(agency_subdomain='metzler', readonly=True)
+
+    with pytest.raises(AttributeError):
+        row.external_id = 2
+    with pytest.raises(AttributeError):
+        row.not_a_field
+
+
+def test_readonly_row_to_model():
+    _create_items()
+    obj = HashOnlyModel.get(agency_subdomain='metzler', readonly=True).to_model()
+
+    assert isinstance(obj, HashOnlyModel)
+    obj.external_id = 2
+    obj.save()
+    assert HashOnlyModel.get(agency_subdomain='metzler').external_id == 2
+
+
+def test_query_and_all_readonly():
+    _create_items()
+
+    rows = list(HashOnlyModel.query(external_id=1, query_index='HashOnlyExternalId', readonly=True))
+    assert set(row.agency_subdomain for row in rows) == {'metzler', 'other'}
+    assert all(isinstance(row, ReadOnlyRow) for row in rows)
+
+    rows = list(HashOnlyModel.all(readonly=True))
+    assert len(rows) == 2
+    assert all(isinstance(row, ReadOnlyRow) for row in rows)
+
+
+def test_paginated_query_readonly():
+    _create_items()
+
+    rows, last_evaluated_key = HashOnlyModel.paginated_query(agency_subdomain='metzler', limit=5, readonly=True)
+    assert [row.to_dict()['external_id'] for row in rows] == [1]
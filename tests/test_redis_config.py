@@ -13,7 +13,7 @@ def test_load_with_redis_does_not_call_yaml_load(get_redis_cache, yaml_load):
     get_redis_cache.return_value = redis_mock
 
     cc_dynamodb3.config.set_config(
-        config_file_path='/path/to/file.yaml',
+        config_file_path=AWS_DYNAMODB_CONFIG_PATH,
         aws_access_key_id='<KEY>',
         aws_secret_access_key='<SECRET>',
         namespace='dev_')
@@ -45,3 +45,26 @@ def test_load_with_redis_calls_yaml_load_if_cache_miss(get_redis_cache, _redis_c
     assert redis_mock.setex.called
     assert config.aws_access_key_id == '<KEY>'
     assert config.yaml['default_throughput'] == {'read': 10, 'write': 10}
+
+
+@mock.patch.object(cc_dynamodb3.config, '_redis_config')
+@mock.patch('cc_dynamodb3.config.get_redis_cache')
+def test_redis_cache_is_keyed_by_file_content(get_redis_cache, _redis_config, tmpdir):
+    cache = dict()
+    redis_mock = mock.Mock()
+    redis_mock.get = cache.get
+    redis_mock.setex = lambda key, seconds, value: cache.__setitem__(key, value)
+    get_redis_cache.return_value = redis_mock
+    cc_dynamodb3.config.set_redis_config(dict())
+
+    config_path = str(tmpdir.join('dynamodb.yml'))
+    for content in ('setting: 1', 'setting: 2'):
+        with open(config_path, 'w') as config_file:
+            config_file.write(content)
+        cc_dynamodb3.config.set_config(
+            config_file_path=config_path,
+            aws_access_key_id='<KEY>',
+            aws_secret_access_key='<SECRET>',
+            namespace='dev_')
+        assert cc_dynamodb3.config.get_config().yaml['setting'] == int(content[-1])
+    assert len(cache) == 2
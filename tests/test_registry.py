@@ -0,0 +1,66 @@
+import mock
+import pytest
+
+import cc_dynamodb3.config
+from cc_dynamodb3.config import get_config
+from cc_dynamodb3.exceptions import UnknownTableException
+from cc_dynamodb3.registry import TableRegistry, table_registry
+from cc_dynamodb3.table import get_table_index
+
+from .factories.hash_only_model import HashOnlyModel
+
+
+def test_registry_is_built_once_per_config():
+    tables = get_config().tables
+    assert get_config().tables is tables
+    assert set(tables) == get_config().table_names
+    assert 'change_in_condition' in tables
+
+
+def test_table_schema():
+    table = get_config().tables['change_in_condition']
+    assert table.key_names == ('carelog_id', 'time')
+    assert (table.hash_key, table.range_key) == ('carelog_id', 'time')
+    assert table.key_types == dict(carelog_id='HashKey', time='RangeKey')
+    assert table.attribute_types == dict(carelog_id='NUMBER', time='NUMBER', saved_in_rdb='NUMBER',
+                                         session_id='NUMBER')
+    assert table.schema == get_config().yaml['schemas']['change_in_condition']
+
+    gsi, lsi = table.indexes['SavedInRDB'], table.indexes['SessionId']
+    assert (gsi.is_global, gsi.hash_key, gsi.range_key, gsi.projection_type) == (True, 'saved_in_rdb', 'time', 'ALL')
+    assert (lsi.is_global, lsi.hash_key, lsi.range_key) == (False, 'carelog_id', 'session_id')
+    assert table.query_key_names('SavedInRDB') == ('carelog_id', 'time', 'saved_in_rdb')
+    assert table.query_key_names() == ('carelog_id', 'time')
+
+
+def test_hash_and_range_keys():
+    tables = get_config().tables
+    assert tables.hash_and_range_keys('hash_only') == ('agency_subdomain', None)
+    assert tables.hash_and_range_keys('hash_only', 'HashOnlyExternalId') == ('external_id', None)
+    with pytest.raises(UnknownTableException):
+        tables.hash_and_range_keys('nope')
+    with pytest.raises(UnknownTableException):
+        tables.hash_and_range_keys('hash_only', 'Nope')
+
+
+def test_get_table_index():
+    assert get_table_index('change_in_condition', 'SessionId')['parts'][1]['name'] == 'session_id'
+    assert get_table_index('change_in_condition', 'Nope') is None
+    assert get_table_index('nope', 'SessionId') is None
+
+
+def test_models_read_the_registry():
+    obj = HashOnlyModel.build(agency_subdomain='metzler', external_id=1)
+    with mock.patch.object(cc_dynamodb3.config.ConfigSnapshot, 'yaml', create=True) as yaml:
+        assert obj.get_primary_key() == dict(agency_subdomain='metzler')
+        assert HashOnlyModel._query_key_names('HashOnlyExternalId') == ['agency_subdomain', 'external_id']
+        assert not yaml.mock_calls
+
+
+def test_thawed_config_gets_its_own_registry():
+    thawed = get_config().thaw()
+    assert 'tables' not in thawed
+    thawed.yaml['schemas']['new_table'] = [dict(type='HashKey', name='new_id', data_type='STRING')]
+    assert table_registry(thawed)['new_table'].key_names == ('new_id',)
+    assert isinstance(table_registry(thawed), TableRegistry)
+    assert 'new_table' not in get_config().tables
@@ -0,0 +1,127 @@
+import mock
+import pytest
+
+import cc_dynamodb3.models
+from cc_dynamodb3.exceptions import NotFound
+from cc_dynamodb3.session import Session, get_session
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+@pytest.fixture(autouse=True)
+def items():
+    HashOnlyModelFactory.create_table()
+    for name in ('one', 'two', 'three'):
+        HashOnlyModelFactory(agency_subdomain=name, external_id=1)
+
+
+def test_get_returns_the_same_instance():
+    with mock.patch.object(HashOnlyModel.table(), 'get_item', wraps=HashOnlyModel.table().get_item) as get_item:
+        with Session() as session:
+            assert get_session() is session
+            obj = HashOnlyModel.get(agency_subdomain='one')
+            assert HashOnlyModel.get(agency_subdomain='one') is obj
+            assert session.get(HashOnlyModel, agency_subdomain='one') is obj
+            assert HashOnlyModel.get(agency_subdomain='one', readonly=True) is not obj
+
+    assert get_item.call_count == 2  # the readonly get bypasses the session
+    assert get_session() is None
+
+
+def test_new_models_are_batched_and_changed_ones_updated_on_exit():
+    table = HashOnlyModel.table()
+    with mock.patch('cc_dynamodb3.models.batch_write_to_table',
+                    wraps=cc_dynamodb3.models.batch_write_to_table) as batch_write, \
+            mock.patch.object(table, 'update_item', wraps=table.update_item) as update_item:
+        with Session() as session:
+            one = HashOnlyModel.get(agency_subdomain='one')
+            two = HashOnlyModel.get(agency_subdomain='two')
+            HashOnlyModel.get(agency_subdomain='three')
+            one.name = 'One'
+            two.name = 'Two'
+            session.add(HashOnlyModel.build(agency_subdomain='four', external_id=4))
+            session.add(HashOnlyModel.build(agency_subdomain='five', external_id=5))
+            assert len(session.dirty_models()) == 4
+
+    assert batch_write.call_count == 1
+    assert len(batch_write.call_args[1]['put_items']) == 2
+    assert update_item.call_count == 2
+    assert HashOnlyModel.get(agency_subdomain='one').name == 'One'
+    assert HashOnlyModel.get(agency_subdomain='four').external_id == 4
+    assert one.get_unsaved_fields() == {}
+
+
+def test_nothing_is_written_when_the_block_raises():
+    with pytest.raises(RuntimeError):
+        with Session():
+            HashOnlyModel.get(agency_subdomain='one').name = 'One'
+            raise RuntimeError('boom')
+
+    assert HashOnlyModel.get(agency_subdomain='one').name is None
+
+
+def test_delete_and_conflicts():
+    with Session() as session:
+        one = HashOnlyModel.get(agency_subdomain='one')
+        with pytest.raises(ValueError):
+            session.add(HashOnlyModel.build(agency_subdomain='one'))
+        session.delete(one)
+
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='one')
+
+
+def test_partial_and_primary_key_changes_are_saved_one_by_one():
+    with Session() as session:
+        two = HashOnlyModel.get(agency_subdomain='two', attributes=['name'])
+        two.name = 'Two'
+        session.add(two)
+        three = HashOnlyModel.get(agency_subdomain='three')
+        three.agency_subdomain = 'moved'
+
+    assert HashOnlyModel.get(agency_subdomain='two').name == 'Two'
+    assert HashOnlyModel.get(agency_subdomain='two').external_id == 1
+    assert HashOnlyModel.get(agency_subdomain='moved').external_id == 1
+    assert session.lookup(HashOnlyModel, dict(agency_subdomain='moved')) is three
+
+
+def test_concurrent_changes_to_other_fields_are_kept():
+    with Session():
+        one = HashOnlyModel.get(agency_subdomain='one')
+        one.name = 'One'
+        HashOnlyModel.table().update_item(Key=dict(agency_subdomain='one'), UpdateExpression='SET external_id = :v',
+                                          ExpressionAttributeValues={':v': 2})
+
+    saved = HashOnlyModel.get(agency_subdomain='one')
+    assert (saved.name, saved.external_id) == ('One', 2)
+
+
+def test_deleted_keys_stay_deleted_until_flush():
+    with Session() as session:
+        one = HashOnlyModel.get(agency_subdomain='one')
+        session.delete(one)
+        with pytest.raises(NotFound):
+            HashOnlyModel.get(agency_subdomain='one')
+        with pytest.raises(NotFound):
+            session.get(HashOnlyModel, agency_subdomain='one')
+        with pytest.raises(ValueError):
+            session.add(one)
+        assert session.lookup(HashOnlyModel, dict(agency_subdomain='two')) is None
+
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='one')
+    with Session() as session:
+        session.add(HashOnlyModel.build(agency_subdomain='one', external_id=3))
+    assert HashOnlyModel.get(agency_subdomain='one').external_id == 3
+
+
+def test_reload_reads_the_table():
+    with Session() as session:
+        one = HashOnlyModel.get(agency_subdomain='one')
+        one.name = 'local'
+        reloaded = one.reload()
+        assert reloaded is not one
+        assert reloaded.name is None
+        assert session.lookup(HashOnlyModel, dict(agency_subdomain='one')) is one
+        session.delete(HashOnlyModel.get(agency_subdomain='two'))
+        assert HashOnlyModel.build(agency_subdomain='two').reload().external_id == 1
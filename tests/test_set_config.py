@@ -1,3 +1,5 @@
+import pytest
+
 import cc_dynamodb3.config
 
 
@@ -5,4 +7,34 @@ def test_success():
     config = cc_dynamodb3.config.get_config()
     assert config.aws_access_key_id == '<KEY>'
     assert config.aws_secret_access_key == '<SECRET>'
-    assert config.namespace == 'dev_'
\ No newline at end of file
+    assert config.namespace == 'dev_'
+
+
+def test_get_config_returns_same_snapshot():
+    assert cc_dynamodb3.config.get_config() is cc_dynamodb3.config.get_config()
+
+
+def test_get_config_is_read_only():
+    config = cc_dynamodb3.config.get_config()
+    with pytest.raises(TypeError):
+        config.namespace = 'other_'
+    with pytest.raises(TypeError):
+        config.yaml['schemas']['new_table'] = []
+    with pytest.raises(TypeError):
+        config.yaml['schemas']['nps_survey'].append({})
+
+
+def test_get_config_precomputes_table_names():
+    config = cc_dynamodb3.config.get_config()
+    assert 'nps_survey' in config.table_names
+    assert 'dev_nps_survey' in config.namespaced_table_names
+
+
+def test_thaw_returns_mutable_copy():
+    config = cc_dynamodb3.config.get_config()
+    thawed = config.thaw()
+    thawed.yaml['schemas']['new_table'] = []
+    thawed.namespace = 'other_'
+
+    assert 'new_table' not in config.yaml['schemas']
+    assert config.namespace == 'dev_'
@@ -0,0 +1,153 @@
+import pytest
+from boto3.dynamodb.conditions import Attr
+from schematics import types as fields
+
+from cc_dynamodb3.exceptions import NotFound, TransactionCanceledException
+from cc_dynamodb3.models import ReadOnlyRow
+from cc_dynamodb3.session import Session
+from cc_dynamodb3.transaction import TRANSACT_MAX_ITEMS, Transaction, transact_get
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+from .factories.map_type_model import MapTypeModel, MapTypeModelFactory
+
+
+class VersionedModel(HashOnlyModel):
+    VERSION_FIELD = 'version'
+
+    version = fields.IntType()
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    HashOnlyModelFactory.create_table()
+    MapTypeModelFactory.create_table()
+
+
+def test_writes_across_tables():
+    existing = HashOnlyModelFactory(agency_subdomain='existing', external_id=1)
+    deleted = HashOnlyModelFactory(agency_subdomain='deleted')
+    new = HashOnlyModel.build(agency_subdomain='new', external_id=2)
+    map_model = MapTypeModel.build(agency_subdomain='map', request_data=dict(a=1))
+
+    with Transaction() as transaction:
+        existing.name = 'Renamed'
+        transaction.save(existing)
+        transaction.save(new)
+        transaction.save(map_model)
+        transaction.delete(deleted)
+        assert len(transaction) == 4
+
+    assert existing.get_unsaved_fields() == dict()
+    assert new._expect_exists_in_db
+    assert deleted._is_deleted
+    assert HashOnlyModel.get(agency_subdomain='existing').name == 'Renamed'
+    assert HashOnlyModel.get(agency_subdomain='new').external_id == 2
+    assert MapTypeModel.get(agency_subdomain='map').request_data == dict(a=1)
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='deleted')
+
+
+def test_failed_condition_writes_nothing():
+    HashOnlyModelFactory(agency_subdomain='one', external_id=1)
+    MapTypeModelFactory(agency_subdomain='disabled', request_data=dict(is_enabled=False))
+    obj = HashOnlyModel.build(agency_subdomain='two')
+
+    transaction = Transaction()
+    transaction.save(obj)
+    transaction.increment(HashOnlyModel, dict(agency_subdomain='one'), 'external_id')
+    transaction.condition_check(MapTypeModel, dict(agency_subdomain='disabled'),
+                                Attr('request_data.is_enabled').eq(True))
+    with pytest.raises(TransactionCanceledException) as exc_info:
+        transaction.commit()
+
+    assert exc_info.value.reasons[2] == 'ConditionalCheckFailed'
+    assert not obj._expect_exists_in_db
+    assert len(transaction) == 0
+    assert HashOnlyModel.get(agency_subdomain='one').external_id == 1
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='two')
+
+
+def test_atomic_updates():
+    HashOnlyModelFactory(agency_subdomain='one', external_id=1)
+    with Transaction() as transaction:
+        transaction.increment(HashOnlyModel, dict(agency_subdomain='one'), 'external_id', by=4)
+    assert HashOnlyModel.get(agency_subdomain='one').external_id == 5
+
+
+def test_version_conflict_restores_versions():
+    VersionedModel.build(agency_subdomain='one').save()
+    first = VersionedModel.get(agency_subdomain='one')
+    second = VersionedModel.get(agency_subdomain='one')
+    first.name = 'First'
+    first.save()
+
+    second.name = 'Second'
+    with pytest.raises(TransactionCanceledException):
+        with Transaction() as transaction:
+            transaction.save(second)
+    assert second.version == 1
+    assert VersionedModel.get(agency_subdomain='one').name == 'First'
+
+
+def test_exception_in_block_rolls_back():
+    VersionedModel.build(agency_subdomain='one').save()
+    obj = VersionedModel.get(agency_subdomain='one')
+    obj.name = 'Changed'
+    with pytest.raises(RuntimeError):
+        with Transaction() as transaction:
+            transaction.save(obj)
+            raise RuntimeError()
+    assert obj.version == 1
+    assert VersionedModel.get(agency_subdomain='one').name is None
+
+
+def test_validation():
+    obj = HashOnlyModel.build(agency_subdomain='one')
+    transaction = Transaction()
+    transaction.save(obj)
+    with pytest.raises(ValueError):
+        transaction.delete(obj)
+    with pytest.raises(ValueError):
+        transaction.condition_check(HashOnlyModel, dict(agency_subdomain='two'), 'attribute_exists(name)')
+
+    for i in range(TRANSACT_MAX_ITEMS - 1):
+        transaction.save(HashOnlyModel.build(agency_subdomain='model%s' % i))
+    with pytest.raises(ValueError):
+        transaction.save(HashOnlyModel.build(agency_subdomain='one too many'))
+
+
+def test_transact_get():
+    HashOnlyModelFactory(agency_subdomain='one', external_id=1)
+    MapTypeModelFactory(agency_subdomain='map', request_data=dict(a=1))
+
+    obj, missing, map_model = transact_get([
+        (HashOnlyModel, dict(agency_subdomain='one')),
+        (HashOnlyModel, dict(agency_subdomain='missing')),
+        (MapTypeModel, dict(agency_subdomain='map')),
+    ])
+    assert isinstance(obj, HashOnlyModel)
+    assert obj.external_id == 1
+    assert missing is None
+    assert map_model.request_data == dict(a=1)
+
+    row, = transact_get([(HashOnlyModel, dict(agency_subdomain='one'))], readonly=True)
+    assert isinstance(row, ReadOnlyRow)
+    assert transact_get([]) == []
+    with pytest.raises(ValueError):
+        transact_get([(HashOnlyModel, dict(agency_subdomain=str(i))) for i in range(TRANSACT_MAX_ITEMS + 1)])
+
+
+def test_transactional_session():
+    HashOnlyModelFactory(agency_subdomain='one', external_id=1)
+    deleted = HashOnlyModelFactory(agency_subdomain='deleted')
+
+    with Session(transactional=True) as session:
+        HashOnlyModel.get(agency_subdomain='one').external_id = 2
+        session.add(HashOnlyModel.build(agency_subdomain='two'))
+        session.delete(deleted)
+
+    assert HashOnlyModel.get(agency_subdomain='one').external_id == 2
+    assert HashOnlyModel.get(agency_subdomain='two')
+    with pytest.raises(NotFound):
+        HashOnlyModel.get(agency_subdomain='deleted')
@@ -0,0 +1,113 @@
+import decimal
+
+import mock
+import six
+from schematics import types as fields
+
+from .factories.hash_only_model import HashOnlyModel, HashOnlyModelFactory
+
+
+class CounterModel(HashOnlyModel):
+    COUNTER_FIELDS = ['external_id']
+
+    tags = fields.BaseType()
+
+
+class QuietModel(HashOnlyModel):
+    RETURN_VALUES = 'NONE'
+
+
+def test_set_and_remove():
+    HashOnlyModelFactory.create_table()
+    obj = HashOnlyModelFactory(agency_subdomain='metzler', external_id=1, name='Metzler')
+
+    obj.name = None
+    obj.external_id = 2
+    update_kwargs = obj._update_item_kwargs()
+    assert update_kwargs['UpdateExpression'] == 'SET #u0 = :u0 REMOVE #u1'
+    assert update_kwargs['ExpressionAttributeNames'] == {'#u0': 'external_id', '#u1': 'name'}
+    assert 'AttributeUpdates' not in update_kwargs
+
+    obj.save()
+    item = HashOnlyModel.get(agency_subdomain='metzler', consistent_read=True).item
+    assert item['external_id'] == 2
+    assert 'name' not in item
+
+
+def test_counter_adds_the_difference():
+    HashOnlyModelFactory.create_table()
+    HashOnlyModelFactory(agency_subdomain='metzler', external_id=10)
+    first = CounterModel.get(agency_subdomain='metzler')
+    second = CounterModel.get(agency_subdomain='metzler')
+
+    first.external_id += 1
+    assert first._update_item_kwargs()['ExpressionAttributeValues'][':u0'] == 1
+    first.save()
+    second.external_id += 5
+    second.save()
+
+    assert CounterModel.get(agency_subdomain='metzler', consistent_read=True).external_id == 16
+
+
+def test_set_add_and_delete():
+    HashOnlyModelFactory.create_table()
+    obj = CounterModel.create(agency_subdomain='metzler', tags={'a', 'b'})
+
+    obj.tags = {'b', 'c'}
+    update_kwargs = obj._update_item_kwargs()
+    assert update_kwargs['UpdateExpression'] == 'ADD #u0 :u0a DELETE #u0 :u0d'
+    assert update_kwargs['ExpressionAttributeValues'][':u0a'] == {'c'}
+    assert update_kwargs['ExpressionAttributeValues'][':u0d'] == {'a'}
+    obj.save()
+    assert CounterModel.get(agency_subdomain='metzler', consistent_read=True).tags == {'b', 'c'}
+
+    obj.tags = set()
+    obj.save()
+    assert 'tags' not in CounterModel.get(agency_subdomain='metzler', consistent_read=True).item
+
+
+@mock.patch('cc_dynamodb3.models.log_data')
+def test_return_values(log_data_mock):
+    HashOnlyModelFactory.create_table()
+    obj = QuietModel.create(agency_subdomain='metzler', external_id=1)
+    other = HashOnlyModel.get(agency_subdomain='metzler')
+    other.name = 'Changed elsewhere'
+    other.save()
+    log_data_mock.reset_mock()
+
+    obj.external_id = 2
+    assert obj._update_item_kwargs()['ReturnValues'] == 'NONE'
+    result = obj.save()
+    assert not result.get('Attributes')
+
+    obj.external_id = 3
+    result = obj.save(return_values='UPDATED_OLD')
+    assert result['Attributes']['external_id'] == 2
+    assert 'name' not in result['Attributes']
+    assert not log_data_mock.called
+    assert QuietModel._put_item_kwargs(QuietModel.build(agency_subdomain='x'), 'UPDATED_OLD')['ReturnValues'] == 'NONE'
+
+
+if six.PY3:
+    def test_in_memory_transport_update_expression():
+        import asyncio
+        from cc_dynamodb3 import aio
+
+        aio.set_transport(aio.InMemoryTransport())
+        try:
+            loop = asyncio.new_event_loop()
+            obj = CounterModel.build(agency_subdomain='metzler', external_id=1, tags={'a'})
+            loop.run_until_complete(obj.asave())
+
+            obj.external_id = 3
+            obj.tags = {'b'}
+            obj.name = 'Metzler'
+            result = loop.run_until_complete(obj.asave(return_values='UPDATED_OLD'))
+            assert result['Attributes'] == {'external_id': decimal.Decimal(1), 'tags': {'a'}}
+
+            reloaded = loop.run_until_complete(CounterModel.aget(agency_subdomain='metzler'))
+            assert reloaded.external_id == 3
+            assert reloaded.tags == {'b'}
+            assert reloaded.name == 'Metzler'
+        finally:
+            aio.set_transport(None)
@@ -28,7 +28,7 @@ def test_update_table_should_not_update_if_same_throughput():
 def test_update_table_should_create_delete_gsi():
     cc_dynamodb3.table.create_table('change_in_condition')
 
-    original_config = cc_dynamodb3.config.get_config()
+    original_config = cc_dynamodb3.config.get_config().thaw()
     patcher = mock.patch('cc_dynamodb3.table.get_config')
     mock_config = patcher.start()
     original_config.yaml['global_indexes']['change_in_condition'] = [{
@@ -56,7 +56,7 @@ def test_update_table_should_create_delete_gsi():
 def test_update_table_should_update_gsi():
     cc_dynamodb3.table.create_table('change_in_condition')
 
-    original_config = cc_dynamodb3.config.get_config()
+    original_config = cc_dynamodb3.config.get_config().thaw()
     patcher = mock.patch('cc_dynamodb3.table.get_config')
     mock_config = patcher.start()
     original_config.yaml['global_indexes']['change_in_condition'][0]['throughput'] = {